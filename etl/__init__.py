@@ -1,5 +1,18 @@
 """ETL utilities for the Guaxindiba Bot project."""
 
-from .pipeline import PipelineConfig, PipelineResult, run_pipeline
+from __future__ import annotations
+
+from ._lazy import lazy_exports
+
+# Resolved on first access, so ``import etl`` (and ``python -m etl.<tool>``)
+# does not import the pipeline and its dependencies up front.
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "PipelineConfig": ".pipeline",
+        "PipelineResult": ".pipeline",
+        "run_pipeline": ".pipeline",
+    },
+)
 
 __all__ = ["PipelineConfig", "PipelineResult", "run_pipeline"]
@@ -0,0 +1,33 @@
+"""Package attributes imported from their submodule on first access (PEP 562)."""
+
+from __future__ import annotations
+
+import sys
+from typing import Any, Callable, Mapping
+
+
+def lazy_exports(package: str, exports: Mapping[str, str]) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """Return the ``(__getattr__, __dir__)`` pair of ``package``.
+
+    ``exports`` maps each public name to the relative module defining it
+    (e.g. ``{"run_pipeline": ".pipeline"}``). The module is imported when the
+    name is first used and the value is then cached in the package namespace.
+    """
+
+    def __getattr__(name: str) -> Any:
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        from importlib import import_module
+
+        value = getattr(import_module(module_name, package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted([*vars(sys.modules[package]), *exports])
+
+    return __getattr__, __dir__
+
+
+__all__ = ["lazy_exports"]
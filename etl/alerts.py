@@ -0,0 +1,141 @@
+"""Alert payloads shared by the notification URL and the subscription webhooks.
+
+:func:`notification_params` turns the fires of a dataframe into the
+``regionId``/``timestamp``/``lat``/``lng`` fields sent to Apps Script by
+:func:`etl.pipeline.notify_intersections` and to partners by
+:mod:`etl.subscriptions`.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def first_per_cluster(df: pd.DataFrame, candidates: pd.Series) -> Any:
+    """Flag one row per ``cluster_id`` among ``candidates``, preferring representatives."""
+
+    import numpy as np
+
+    positions = np.flatnonzero(candidates.to_numpy(dtype=bool))
+    ids = df["cluster_id"].to_numpy()[positions]
+    if "cluster_representative" in df.columns:
+        representative = df["cluster_representative"].fillna(False).to_numpy(dtype=bool)[positions]
+    else:
+        representative = np.zeros(len(positions), dtype=bool)
+    order = np.lexsort((~representative, ids))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = ids[order][1:] != ids[order][:-1]
+    keep = np.zeros(len(df), dtype=bool)
+    keep[positions[order[first]]] = True
+    return keep
+
+
+def format_brazil_timestamps(values: pd.Series) -> list[str]:
+    """Format timestamps as ``dd/MM/yyyy HH:mm:ss``, in America/Sao_Paulo when timezone-aware.
+
+    The column is parsed, converted and formatted once; only values the bulk
+    parse cannot read (e.g. a mix of formats or offsets) are parsed one by one.
+    Naive values are kept as-is, missing ones become ``""`` and unparseable
+    ones are sent verbatim.
+    """
+
+    import numpy as np
+    import pandas as pd
+
+    def _format(parsed: pd.Series) -> np.ndarray:
+        if getattr(parsed.dtype, "tz", None) is not None:
+            parsed = parsed.dt.tz_convert("America/Sao_Paulo").dt.tz_localize(None)
+        # ISO strings sliced into dd/MM/yyyy HH:mm:ss (much faster than Series.dt.strftime).
+        iso = np.datetime_as_string(parsed.to_numpy(dtype="datetime64[s]")).tolist()
+        return np.array([f"{text[8:10]}/{text[5:7]}/{text[:4]} {text[11:19]}" for text in iso], dtype=object)
+
+    missing = values.isna().to_numpy()
+    try:
+        parsed = pd.to_datetime(values, errors="coerce")
+        formatted = _format(parsed)
+        retry = parsed.isna().to_numpy() & ~missing
+    except (TypeError, ValueError):
+        formatted = np.full(len(values), None, dtype=object)
+        retry = ~missing
+
+    if retry.any():
+        cache: dict[Any, str] = {}
+        positions = retry.nonzero()[0]
+        for position, value in zip(positions, values.iloc[positions].tolist()):
+            if value not in cache:
+                try:
+                    stamp = pd.Timestamp(pd.to_datetime(value))
+                except (TypeError, ValueError, OverflowError):
+                    cache[value] = str(value)
+                else:
+                    cache[value] = "" if pd.isna(stamp) else _format(pd.Series([stamp]))[0]
+            formatted[position] = cache[value]
+
+    formatted[missing] = ""
+    return formatted.tolist()
+
+
+def notification_params(
+    df: pd.DataFrame,
+    region_id: str,
+    ts_column: str | None,
+) -> list[tuple[Any, dict[str, Any]]]:
+    """Build the query parameters of every alert in ``df`` column-wise.
+
+    Returns ``(index, params)`` pairs; rows without a point geometry are
+    logged and skipped.
+    """
+
+    import numpy as np
+    import pandas as pd
+    import shapely
+
+    geometries = df["geometry"].to_numpy(dtype=object) if "geometry" in df.columns else np.full(len(df), None)
+    missing = pd.isna(geometries)
+    is_geometry = shapely.is_geometry(geometries)
+    points = np.where(is_geometry, geometries, None)
+    lng = shapely.get_x(points)
+    lat = shapely.get_y(points)
+    valid = is_geometry & ~np.isnan(lng) & ~np.isnan(lat)
+
+    index = df.index.tolist()
+    for position in np.flatnonzero(~valid):
+        reason = "sem geometria" if missing[position] else "com geometria inválida"
+        logger.warning("Registro %s %s; notificação ignorada", index[position], reason)
+
+    columns: dict[str, list[Any]] = {
+        "regionId": [region_id] * len(df),
+        "timestamp": format_brazil_timestamps(df[ts_column]) if ts_column is not None else [""] * len(df),
+        "lat": lat.tolist(),
+        "lng": lng.tolist(),
+    }
+    optional: dict[str, list[Any]] = {}
+    # Distance bands (see etl.transform.zones) and clusters (etl.transform.cluster) travel with the alert.
+    if "zone" in df.columns:
+        zone = df["zone"]
+        optional["zone"] = zone.astype(object).where(zone.notna(), None).tolist()
+        if "distance_to_boundary_m" in df.columns:
+            distance = pd.to_numeric(df["distance_to_boundary_m"], errors="coerce").to_numpy(dtype=float)
+            rounded = np.round(distance)
+            has_distance = ~np.isnan(distance) & zone.notna().to_numpy()
+            optional["distanceM"] = [int(value) if ok else None for value, ok in zip(rounded.tolist(), has_distance)]
+    if "cluster_size" in df.columns:
+        sizes = pd.to_numeric(df["cluster_size"], errors="coerce")
+        optional["clusterSize"] = [None if pd.isna(value) else int(value) for value in sizes.tolist()]
+
+    names = list(columns) + list(optional)
+    rows = zip(*columns.values(), *optional.values())
+    params: list[tuple[Any, dict[str, Any]]] = []
+    for position, (idx, row) in enumerate(zip(index, rows)):
+        if valid[position]:
+            params.append((idx, {name: value for name, value in zip(names, row) if value is not None}))
+    return params
+
+
+__all__ = ["first_per_cluster", "format_brazil_timestamps", "notification_params"]
@@ -60,6 +60,24 @@ def load_environment(path: os.PathLike[str] | str = ENV_FILE, *, override: bool
     return loaded
 
 
+def _load_environment_once() -> dict[str, str]:
+    """Carrega o ``.env`` padrão uma única vez por processo."""
+
+    loaded = globals().get("ENV_VARS")
+    if loaded is None:
+        loaded = load_environment()
+        globals()["ENV_VARS"] = loaded
+    return loaded
+
+
+def __getattr__(name: str) -> dict[str, str]:
+    # ``ENV_VARS`` é carregado no primeiro acesso (ou por ``configure_logging``),
+    # e não como efeito colateral da importação do módulo.
+    if name == "ENV_VARS":
+        return _load_environment_once()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def _resolve_log_level(level: str | int) -> int:
     if isinstance(level, int):
         return level
@@ -79,6 +97,7 @@ def configure_logging(level: str | int | None = None, fmt: str | None = None) ->
             definido em ``GUAXINDIBA_LOG_FORMAT`` ou o padrão.
     """
 
+    _load_environment_once()
     level_value = _resolve_log_level(level or os.getenv(LOG_LEVEL_ENV, "INFO"))
     fmt_value = fmt or os.getenv(LOG_FORMAT_ENV, _DEFAULT_LOG_FORMAT)
 
@@ -94,9 +113,6 @@ def configure_logging(level: str | int | None = None, fmt: str | None = None) ->
     logging.basicConfig(level=level_value, format=fmt_value)
 
 
-ENV_VARS = load_environment()
-configure_logging()
-
 __all__ = [
     "ENV_VARS",
     "ENV_FILE",
@@ -0,0 +1,342 @@
+"""Resident scheduler running the pipeline periodically in one process.
+
+Compared with a cron job starting a fresh interpreter every few minutes,
+the daemon keeps the imported modules, the prepared reserve geometry (and
+the grids/zones memoized for it) and a warm Chrome session between runs.
+Runs follow a fixed grid of ``interval`` seconds shifted by a random
+jitter, or the delays chosen by a :class:`~etl.polling.PollingPolicy`.
+The ``--lock-file`` (also taken by ``python -m etl.pipeline``) keeps two
+runs, e.g. the daemon and a manual run, from overlapping, and
+SIGTERM/SIGINT stop the loop after the current run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from os import PathLike
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+from .pipeline import (
+    DEFAULT_LOCK_FILE,
+    GeometryFetcher,
+    PipelineConfig,
+    PipelineResult,
+    build_parser,
+    config_from_args,
+    run_pipeline,
+    validate_args,
+)
+from .polling import DEFAULT_MAX_INTERVAL, DEFAULT_MIN_INTERVAL, AdaptivePollingPolicy, PollingPolicy
+from .utils import RunLock
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 600.0
+DEFAULT_JITTER = 30.0
+DEFAULT_GEOMETRY_TTL = 24 * 3600.0
+
+
+def memoize_geometry(fetcher: GeometryFetcher, ttl: float | None = DEFAULT_GEOMETRY_TTL) -> GeometryFetcher:
+    """Wrap ``fetcher`` so its prepared result is reused for ``ttl`` seconds.
+
+    ``None`` keeps the geometry for the life of the process.
+    """
+
+    cache: dict[str, tuple[float, BaseGeometry]] = {}
+
+    def _fetch(**kwargs: Any) -> BaseGeometry:
+        key = repr(sorted(kwargs.items(), key=lambda item: item[0]))
+        hit = cache.get(key)
+        if hit is not None and (ttl is None or time.monotonic() - hit[0] < ttl):
+            return hit[1]
+        geometry = fetcher(**kwargs)
+        shapely.prepare(geometry)
+        cache[key] = (time.monotonic(), geometry)
+        return geometry
+
+    return _fetch
+
+
+@dataclass(slots=True)
+class DaemonConfig:
+    """Configuration container used by :class:`PipelineDaemon`."""
+
+    pipeline: PipelineConfig
+    interval: float = DEFAULT_INTERVAL
+    jitter: float = DEFAULT_JITTER
+    lock_file: Path | str | PathLike[str] | None = DEFAULT_LOCK_FILE
+    max_runs: int | None = None
+    geometry_ttl: float | None = DEFAULT_GEOMETRY_TTL
+    policy: PollingPolicy | None = None
+
+    def __post_init__(self) -> None:
+        if self.interval <= 0:
+            raise ValueError("interval must be positive")
+        if self.jitter < 0 or self.jitter >= self.interval / 2:
+            raise ValueError("jitter must be between 0 and half the interval")
+
+
+class PipelineDaemon:
+    """Run :func:`etl.pipeline.run_pipeline` on a schedule until stopped."""
+
+    def __init__(
+        self,
+        config: DaemonConfig,
+        *,
+        runner: Callable[[PipelineConfig], PipelineResult] = run_pipeline,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+        rng: random.Random | None = None,
+        on_close: Callable[[], Any] | None = None,
+    ) -> None:
+        self.config = config
+        self.runner = runner
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.rng = rng or random.Random()
+        self.on_close = on_close
+        self.runs = 0
+        self.failures = 0
+        self._stop = threading.Event()
+        self._lock = RunLock(config.lock_file) if config.lock_file is not None else None
+
+        pipeline = config.pipeline
+        if pipeline.get_reserve_geometry is not None:
+            pipeline.get_reserve_geometry = memoize_geometry(pipeline.get_reserve_geometry, config.geometry_ttl)
+
+    def stop(self, *_: Any) -> None:
+        """Ask the loop to exit once the current run (if any) finishes."""
+
+        if not self._stop.is_set():
+            logger.info("Encerramento solicitado; aguardando o fim da execução atual")
+        self._stop.set()
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop.is_set()
+
+    def install_signal_handlers(self) -> None:
+        """Stop gracefully on SIGTERM/SIGINT (a second SIGINT interrupts immediately)."""
+
+        def _on_sigint(signum: int, frame: Any) -> None:
+            if self._stop.is_set():
+                raise KeyboardInterrupt
+            self.stop()
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, _on_sigint)
+
+    def run_once(self) -> PipelineResult | None:
+        """Run the pipeline now unless another run holds the lock.
+
+        Failures are logged and counted; the daemon keeps its schedule.
+        """
+
+        if self._lock is not None and not self._lock.acquire():
+            logger.warning("Execução anterior ainda em andamento (%s); pulando este ciclo", self._lock.path)
+            return None
+        started = self.clock()
+        try:
+            result = self.runner(self.config.pipeline)
+        except Exception:
+            self.failures += 1
+            logger.exception("Execução do pipeline falhou (%s falhas até agora)", self.failures)
+            return None
+        finally:
+            if self._lock is not None:
+                self._lock.release()
+            self.runs += 1
+        logger.info("Execução %s concluída em %.1f s", self.runs, self.clock() - started)
+        return result
+
+    def next_start(self, slot: float, now: float) -> tuple[float, float]:
+        """Return ``(next slot, start time)`` after ``slot`` given the current time.
+
+        Slots lie on a fixed ``interval`` grid, so jitter does not drift the
+        schedule; slots already missed by a long run are skipped.
+        """
+
+        interval = self.config.interval
+        slot += interval
+        if slot <= now:
+            missed = int((now - slot) // interval) + 1
+            logger.warning("Execução excedeu o intervalo; %s ciclo(s) pulado(s)", missed)
+            slot += missed * interval
+        return slot, slot + self.rng.uniform(-self.config.jitter, self.config.jitter)
+
+    def serve(self) -> int:
+        """Run until stopped or ``max_runs`` is reached; return the number of runs."""
+
+        logger.info(
+            "Daemon iniciado (intervalo=%.0f s, jitter=±%.0f s, lock=%s)",
+            self.config.interval,
+            self.config.jitter,
+            self._lock.path if self._lock is not None else None,
+        )
+        slot = self.clock()
+        try:
+            while not self.stopping:
+                result = self.run_once()
+                if self.config.max_runs is not None and self.runs >= self.config.max_runs:
+                    break
+                if self.config.policy is not None:
+                    delay = self.config.policy.next_delay(result, self.wall_clock())
+                    jitter = min(self.config.jitter, delay / 4)
+                    delay = max(delay + self.rng.uniform(-jitter, jitter), 0.0)
+                else:
+                    slot, start = self.next_start(slot, self.clock())
+                    delay = max(start - self.clock(), 0.0)
+                logger.info("Próxima execução em %.0f s", delay)
+                if self._stop.wait(delay):
+                    break
+        finally:
+            if self.on_close is not None:
+                self.on_close()
+            logger.info("Daemon encerrado após %s execuções (%s falhas)", self.runs, self.failures)
+        return self.runs
+
+
+def build_daemon_parser() -> argparse.ArgumentParser:
+    """Return the pipeline CLI parser extended with the daemon options."""
+
+    parser = build_parser()
+    parser.description = "Executa o pipeline ETL periodicamente em um processo residente."
+    group = parser.add_argument_group("daemon")
+    group.add_argument(
+        "--interval-minutes",
+        type=float,
+        default=DEFAULT_INTERVAL / 60,
+        help="Intervalo entre execuções, em minutos (padrão: 10).",
+    )
+    group.add_argument(
+        "--jitter-seconds",
+        type=float,
+        default=DEFAULT_JITTER,
+        help="Deslocamento aleatório máximo (±) de cada execução, em segundos (padrão: 30).",
+    )
+    group.add_argument(
+        "--max-runs",
+        type=int,
+        default=None,
+        help="Encerra após este número de execuções (padrão: sem limite).",
+    )
+    group.add_argument(
+        "--adaptive",
+        action="store_true",
+        help=(
+            "Ajusta o intervalo pelo histórico de quando 'Data / Hora' avança por satélite: coletas densas "
+            "perto das janelas esperadas e espaçamento crescente quando nada muda."
+        ),
+    )
+    group.add_argument(
+        "--min-interval-minutes",
+        type=float,
+        default=DEFAULT_MIN_INTERVAL / 60,
+        help="Intervalo mínimo entre coletas no modo --adaptive (padrão: 2).",
+    )
+    group.add_argument(
+        "--max-interval-minutes",
+        type=float,
+        default=DEFAULT_MAX_INTERVAL / 60,
+        help="Intervalo máximo entre coletas no modo --adaptive (padrão: 30).",
+    )
+    group.add_argument(
+        "--polling-state",
+        type=Path,
+        default=Path("cache/polling_state.json"),
+        help="Arquivo onde o histórico de atualizações por satélite é mantido entre reinícios.",
+    )
+    group.add_argument(
+        "--polling-satellite",
+        action="append",
+        default=None,
+        help="Aprende só com este satélite (pode repetir); padrão: todos.",
+    )
+    group.add_argument(
+        "--geometry-ttl-hours",
+        type=float,
+        default=DEFAULT_GEOMETRY_TTL / 3600,
+        help="Tempo em que a geometria da reserva fica em memória antes de ser recarregada (0 = sempre).",
+    )
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Entry-point used by ``python -m etl.daemon``."""
+
+    from .config import configure_logging
+
+    configure_logging()
+
+    parser = build_daemon_parser()
+    args = parser.parse_args(argv)
+    validate_args(parser, args)
+    logger.info("Parâmetros recebidos: %s", args)
+
+    session = None
+    osm_cache = None
+
+    def _close() -> None:
+        if session is not None:
+            session.close()
+        if osm_cache is not None:
+            osm_cache.log_stats()
+
+    try:
+        pipeline, osm_cache = config_from_args(args)
+        if not args.offline_sample:
+            from .extract.terrabrasilis import BrowserSession
+
+            session = BrowserSession(pipeline.fetch_fire_kwargs.get("config"))
+            pipeline.fetch_fire_data = session
+        policy = None
+        if args.adaptive:
+            policy = AdaptivePollingPolicy(
+                min_interval=args.min_interval_minutes * 60,
+                max_interval=args.max_interval_minutes * 60,
+                satellites=args.polling_satellite,
+                state_path=args.polling_state,
+            )
+        daemon = PipelineDaemon(
+            DaemonConfig(
+                pipeline=pipeline,
+                interval=args.interval_minutes * 60,
+                jitter=args.jitter_seconds,
+                lock_file=args.lock_file,
+                max_runs=args.max_runs,
+                geometry_ttl=args.geometry_ttl_hours * 3600 if args.geometry_ttl_hours > 0 else None,
+                policy=policy,
+            ),
+            on_close=_close,
+        )
+    except ValueError as exc:
+        _close()
+        parser.error(str(exc))
+    daemon.install_signal_handlers()
+    daemon.serve()
+    return 0
+
+
+__all__ = [
+    "DaemonConfig",
+    "PipelineDaemon",
+    "RunLock",
+    "build_daemon_parser",
+    "main",
+    "memoize_geometry",
+]
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,9 +1,25 @@
 """Extraction helpers for the Guaxindiba bot."""
 
-from .reserve import RESERVE_NAME, get_reserve_geometry
-from .terrabrasilis import TerraBrasilisConfig, TerraBrasilisFilters, fetch_fire_data
+from __future__ import annotations
+
+from .._lazy import lazy_exports
+
+# selenium/webdriver_manager (terrabrasilis) and osmnx (reserve) are only
+# imported when one of their names is first used.
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "BrowserSession": ".terrabrasilis",
+        "TerraBrasilisConfig": ".terrabrasilis",
+        "TerraBrasilisFilters": ".terrabrasilis",
+        "fetch_fire_data": ".terrabrasilis",
+        "RESERVE_NAME": ".reserve",
+        "get_reserve_geometry": ".reserve",
+    },
+)
 
 __all__ = [
+    "BrowserSession",
     "TerraBrasilisConfig",
     "TerraBrasilisFilters",
     "fetch_fire_data",
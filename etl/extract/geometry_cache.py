@@ -0,0 +1,334 @@
+"""Content-addressed on-disk cache for resolved reserve geometries."""
+
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from os import PathLike
+from pathlib import Path
+from typing import Any, Callable, Mapping, Sequence
+
+from shapely.geometry import mapping
+from shapely.geometry.base import BaseGeometry
+
+from .prepared_geometry import load_geometry_file, sidecar_path, write_prepared
+
+logger = logging.getLogger(__name__)
+
+MEMO_SIZE = 16
+# Longest wait, in seconds, for background refreshes when the interpreter exits.
+EXIT_REFRESH_TIMEOUT = 120.0
+
+_memo: OrderedDict[tuple[str, str], tuple[tuple[int, int], "CacheEntry"]] = OrderedDict()
+_memo_lock = threading.Lock()
+_refreshing: dict[tuple[str, str], threading.Thread] = {}
+
+
+@dataclass(frozen=True, slots=True)
+class CacheEntry:
+    """A cached geometry together with the metadata stored alongside it."""
+
+    key: str
+    geometry: BaseGeometry
+    source: str
+    fetched_at: datetime
+    osm_timestamp: str | None = None
+    metadata: Mapping[str, Any] | None = None
+
+    def age(self, now: datetime | None = None) -> float:
+        """Return the entry age in seconds."""
+
+        current = now or datetime.now(timezone.utc)
+        return (current - self.fetched_at).total_seconds()
+
+
+def cache_key(
+    name: str,
+    search_places: Sequence[str] | None = None,
+    *,
+    strategy: Mapping[str, Any] | None = None,
+) -> str:
+    """Return the cache key for a geometry lookup.
+
+    The key hashes the reserve name, the (ordered) search places and the tag
+    strategy so that changing any of them never returns a stale polygon.
+    """
+
+    payload = {
+        "name": name,
+        "search_places": list(search_places) if search_places else None,
+        "strategy": dict(strategy or {}),
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def clear_memo() -> None:
+    """Drop every geometry memoized in this process."""
+
+    with _memo_lock:
+        _memo.clear()
+
+
+def wait_for_refreshes(timeout: float | None = None) -> bool:
+    """Wait for the background refreshes started by ``revalidate``; return ``True`` when all finished.
+
+    Called at interpreter exit (bounded by :data:`EXIT_REFRESH_TIMEOUT`), so
+    a one-shot CLI run still stores the refreshed geometry for the next run.
+    """
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        with _memo_lock:
+            pending = list(_refreshing.values())
+        if not pending:
+            return True
+        for thread in pending:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            thread.join(remaining)
+        if deadline is not None and time.monotonic() >= deadline:
+            with _memo_lock:
+                return not _refreshing
+
+
+def _wait_at_exit() -> None:
+    with _memo_lock:
+        pending = len(_refreshing)
+    if pending:
+        logger.info("Aguardando %s revalidações de geometria antes de encerrar", pending)
+        if not wait_for_refreshes(EXIT_REFRESH_TIMEOUT):
+            logger.warning("Revalidação de geometria não concluída em %.0f s; abandonada", EXIT_REFRESH_TIMEOUT)
+
+
+# The refresh threads are daemons so a hung fetch cannot block exit forever;
+# atexit handlers run before daemon threads are killed.
+atexit.register(_wait_at_exit)
+
+
+class GeometryCache:
+    """Directory of geometry entries keyed by :func:`cache_key`.
+
+    Parameters
+    ----------
+    directory:
+        Folder holding one GeoJSON file per key.
+    ttl:
+        Maximum age in seconds before an entry is considered stale. ``None``
+        keeps entries forever.
+    """
+
+    def __init__(self, directory: Path | str | PathLike[str], *, ttl: float | None = None) -> None:
+        self.directory = Path(directory)
+        self.ttl = ttl
+
+    def path_for(self, key: str) -> Path:
+        """Return the GeoJSON file of ``key``; a binary ``.wkb`` sidecar sits next to it."""
+
+        return self.directory / f"{key}.geojson"
+
+    def _memo_key(self, key: str) -> tuple[str, str]:
+        return (str(self.directory.resolve()), key)
+
+    def is_fresh(self, entry: CacheEntry, now: datetime | None = None) -> bool:
+        return self.ttl is None or entry.age(now) <= self.ttl
+
+    def load(self, key: str) -> CacheEntry | None:
+        """Return the entry stored under ``key`` or ``None`` when missing."""
+
+        path = self.path_for(key)
+        try:
+            signature = _signature(path)
+        except FileNotFoundError:
+            return None
+
+        memo_key = self._memo_key(key)
+        with _memo_lock:
+            memoized = _memo.get(memo_key)
+            if memoized is not None and memoized[0] == signature:
+                _memo.move_to_end(memo_key)
+                return memoized[1]
+
+        try:
+            entry = _read_entry(key, path)
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("Entrada de cache de geometria inválida em %s: %s", path, exc)
+            return None
+
+        self._remember(memo_key, signature, entry)
+        return entry
+
+    def store(
+        self,
+        key: str,
+        geometry: BaseGeometry,
+        *,
+        source: str,
+        osm_timestamp: str | None = None,
+        metadata: Mapping[str, Any] | None = None,
+    ) -> CacheEntry:
+        """Persist ``geometry`` under ``key`` atomically and return the new entry."""
+
+        entry = CacheEntry(
+            key=key,
+            geometry=geometry,
+            source=source,
+            fetched_at=datetime.now(timezone.utc),
+            osm_timestamp=osm_timestamp,
+            metadata=dict(metadata or {}),
+        )
+        path = self.path_for(key)
+        _write_entry(entry, path)
+        self._remember(self._memo_key(key), _signature(path), entry)
+        return entry
+
+    def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], BaseGeometry],
+        *,
+        source: str = "osm",
+        revalidate: bool = False,
+        metadata: Mapping[str, Any] | None = None,
+        osm_timestamp: Callable[[], str | None] | None = None,
+    ) -> BaseGeometry:
+        """Return a fresh cached geometry or call ``fetch`` and store its result.
+
+        When the entry is stale and ``revalidate`` is ``True`` the stale
+        geometry is returned immediately while a background thread refreshes
+        it; the refresh is awaited at interpreter exit (see
+        :func:`wait_for_refreshes`), so one-shot runs also update the cache.
+        Without ``revalidate`` the refresh happens inline and the stale
+        geometry is only used if ``fetch`` fails. ``osm_timestamp`` is called
+        after a successful fetch to record the OSM data timestamp.
+        """
+
+        entry = self.load(key)
+        if entry is not None and self.is_fresh(entry):
+            return entry.geometry
+
+        if entry is not None and revalidate:
+            logger.info("Geometria em cache expirada (%s); revalidando em segundo plano", key)
+            self._refresh_in_background(
+                key, fetch, source=source, metadata=metadata, osm_timestamp=osm_timestamp
+            )
+            return entry.geometry
+
+        try:
+            geometry = fetch()
+        except Exception:
+            if entry is None:
+                raise
+            logger.warning("Falha ao atualizar geometria %s; usando versão expirada do cache", key, exc_info=True)
+            return entry.geometry
+
+        self.store(
+            key,
+            geometry,
+            source=source,
+            osm_timestamp=osm_timestamp() if osm_timestamp else None,
+            metadata=metadata,
+        )
+        return geometry
+
+    def _refresh_in_background(
+        self,
+        key: str,
+        fetch: Callable[[], BaseGeometry],
+        *,
+        source: str,
+        metadata: Mapping[str, Any] | None,
+        osm_timestamp: Callable[[], str | None] | None,
+    ) -> None:
+        memo_key = self._memo_key(key)
+
+        def _refresh() -> None:
+            try:
+                geometry = fetch()
+                self.store(
+                    key,
+                    geometry,
+                    source=source,
+                    osm_timestamp=osm_timestamp() if osm_timestamp else None,
+                    metadata=metadata,
+                )
+                logger.info("Geometria %s revalidada em segundo plano", key)
+            except Exception:
+                logger.warning("Falha na revalidação em segundo plano da geometria %s", key, exc_info=True)
+            finally:
+                with _memo_lock:
+                    _refreshing.pop(memo_key, None)
+
+        with _memo_lock:
+            if memo_key in _refreshing:
+                return
+            thread = threading.Thread(target=_refresh, name=f"geometry-refresh-{key[:8]}", daemon=True)
+            _refreshing[memo_key] = thread
+            thread.start()
+
+    @staticmethod
+    def _remember(memo_key: tuple[str, str], signature: tuple[int, int], entry: CacheEntry) -> None:
+        with _memo_lock:
+            _memo[memo_key] = (signature, entry)
+            _memo.move_to_end(memo_key)
+            while len(_memo) > MEMO_SIZE:
+                _memo.popitem(last=False)
+
+
+def _signature(path: Path) -> tuple[int, int]:
+    stat = path.stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _read_entry(key: str, path: Path) -> CacheEntry:
+    prepared = load_geometry_file(path)
+    properties = dict(prepared.metadata)
+    fetched_at = datetime.fromisoformat(properties.pop("fetched_at"))
+    return CacheEntry(
+        key=key,
+        geometry=prepared.geometry,
+        source=str(properties.pop("source", "unknown")),
+        fetched_at=fetched_at,
+        osm_timestamp=properties.pop("osm_timestamp", None),
+        metadata=properties,
+    )
+
+
+def _write_entry(entry: CacheEntry, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    properties = {
+        **dict(entry.metadata or {}),
+        "source": entry.source,
+        "fetched_at": entry.fetched_at.isoformat(),
+        "osm_timestamp": entry.osm_timestamp,
+    }
+    feature_collection = {
+        "type": "FeatureCollection",
+        "features": [{"type": "Feature", "properties": properties, "geometry": mapping(entry.geometry)}],
+    }
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(feature_collection, fh, ensure_ascii=False)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+    write_prepared(
+        entry.geometry,
+        sidecar_path(path),
+        metadata=properties,
+        source_signature=_signature(path),
+    )
+
+
+__all__ = ["CacheEntry", "GeometryCache", "cache_key", "clear_memo", "wait_for_refreshes"]
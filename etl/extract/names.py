@@ -0,0 +1,214 @@
+"""Normalized name index used to match OpenStreetMap features by name."""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Any, Hashable, Literal, Sequence
+
+import numpy as np
+import pandas as pd
+from unidecode import unidecode
+
+MatchMode = Literal["substring", "token", "fuzzy"]
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(text: str) -> str:
+    """Normalize strings for name comparison (lower case, ASCII, stripped)."""
+
+    return unidecode((text or "").lower().strip())
+
+
+class NameIndex:
+    """Row-aligned index of normalized names over one or more text columns.
+
+    Each distinct raw value is normalized only once. Rows are stored as integer
+    codes into the array of unique normalized names so that matching a query
+    only touches the unique names and then broadcasts the result back to the
+    rows with NumPy indexing.
+    """
+
+    __slots__ = ("columns", "names", "codes", "fingerprint", "_tokens")
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        codes: np.ndarray,
+        columns: Sequence[Hashable] = (),
+        fingerprint: str | None = None,
+    ) -> None:
+        self.names = np.asarray(names, dtype=str)
+        self.codes = codes
+        self.columns = tuple(columns)
+        self.fingerprint = fingerprint
+        self._tokens: list[frozenset[str]] | None = None
+
+    @staticmethod
+    def name_columns(frame: Any) -> list[Hashable]:
+        """Return the ``name*`` columns of ``frame`` (``name``, ``name:pt``, ...)."""
+
+        return [column for column in frame.columns if str(column).startswith("name")]
+
+    @staticmethod
+    def fingerprint_of(frame: Any, columns: Sequence[Hashable]) -> str:
+        """Hash the row index and raw values of ``columns`` without normalizing them."""
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(pd.util.hash_pandas_object(frame.index).to_numpy().tobytes())
+        for column in columns:
+            digest.update(str(column).encode("utf-8"))
+            digest.update(pd.util.hash_pandas_object(frame[column], index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def from_frame(
+        cls,
+        frame: Any,
+        columns: Sequence[Hashable] | None = None,
+        *,
+        fingerprint: str | None = None,
+    ) -> "NameIndex":
+        """Build an index from ``columns`` of ``frame`` (defaults to ``name*`` columns)."""
+
+        if columns is None:
+            columns = cls.name_columns(frame)
+
+        lookup: dict[str, int] = {}
+        normalized: list[str] = []
+        codes = np.full((len(frame), len(columns)), -1, dtype=np.intp)
+
+        for position, column in enumerate(columns):
+            local_codes, uniques = pd.factorize(frame[column])
+            mapping = np.empty(len(uniques), dtype=np.intp)
+            for unique_position, raw in enumerate(uniques):
+                name = normalize_name(str(raw))
+                code = lookup.get(name)
+                if code is None:
+                    code = lookup[name] = len(normalized)
+                    normalized.append(name)
+                mapping[unique_position] = code
+            valid = local_codes >= 0
+            codes[valid, position] = mapping[local_codes[valid]]
+
+        if fingerprint is None:
+            fingerprint = cls.fingerprint_of(frame, columns)
+        return cls(normalized, codes, columns, fingerprint)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _tokens_per_name(self) -> list[frozenset[str]]:
+        if self._tokens is None:
+            self._tokens = [frozenset(str(name).split()) for name in self.names]
+        return self._tokens
+
+    def _name_scores(self, query: str) -> np.ndarray:
+        target = normalize_name(query)
+        scores = np.zeros(len(self.names), dtype=float)
+        for position, name in enumerate(self.names):
+            matcher = SequenceMatcher(None, target, str(name), autojunk=False)
+            if matcher.real_quick_ratio() > 0.0:
+                scores[position] = matcher.ratio()
+        return scores
+
+    def _name_hits(self, query: str, mode: MatchMode, cutoff: float) -> np.ndarray:
+        target = normalize_name(query)
+        if not len(self.names):
+            return np.zeros(0, dtype=bool)
+        if mode == "substring":
+            return np.char.find(self.names, target) >= 0
+        if mode == "token":
+            wanted = frozenset(target.split())
+            return np.fromiter(
+                (wanted <= tokens for tokens in self._tokens_per_name()),
+                dtype=bool,
+                count=len(self.names),
+            )
+        if mode == "fuzzy":
+            return self._name_scores(query) >= cutoff
+        raise ValueError(f"unknown match mode: {mode!r}")
+
+    def match(self, query: str, *, mode: MatchMode = "substring", cutoff: float = 0.8) -> np.ndarray:
+        """Return a boolean array flagging rows where any column matches ``query``.
+
+        Parameters
+        ----------
+        query:
+            Name to look for; it is normalized the same way as the indexed names.
+        mode:
+            ``"substring"`` (query contained in the name), ``"token"`` (every query
+            word present in the name) or ``"fuzzy"`` (similarity ratio of at least
+            ``cutoff``).
+        cutoff:
+            Minimum similarity in ``[0, 1]`` used by the ``"fuzzy"`` mode.
+        """
+
+        hits = np.append(self._name_hits(query, mode, cutoff), False)
+        # Missing values are coded as -1 and therefore pick the trailing ``False``.
+        return hits[self.codes].any(axis=1) if self.codes.shape[1] else np.zeros(len(self), dtype=bool)
+
+    def rank(self, query: str, *, limit: int | None = None) -> list[tuple[int, float]]:
+        """Return ``(row position, similarity)`` pairs sorted by decreasing similarity."""
+
+        if not self.codes.shape[1]:
+            return []
+        scores = np.append(self._name_scores(query), 0.0)[self.codes].max(axis=1)
+        order = np.argsort(-scores, kind="stable")
+        order = order[scores[order] > 0.0]
+        if limit is not None:
+            order = order[:limit]
+        return [(int(position), float(scores[position])) for position in order]
+
+
+class NameIndexCache:
+    """Small thread-safe LRU of :class:`NameIndex` objects keyed per OSM response."""
+
+    def __init__(self, maxsize: int = 32) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, NameIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, frame: Any, columns: Sequence[Hashable] | None = None) -> NameIndex:
+        """Return the cached index for ``key`` or build it from ``frame``.
+
+        A cached index is only reused when ``frame`` hashes to the same
+        fingerprint, i.e. when it holds the same rows and raw names.
+        """
+
+        if columns is None:
+            columns = NameIndex.name_columns(frame)
+        fingerprint = NameIndex.fingerprint_of(frame, columns)
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached.fingerprint == fingerprint and cached.columns == tuple(columns):
+                self._entries.move_to_end(key)
+                return cached
+
+        index = NameIndex.from_frame(frame, columns, fingerprint=fingerprint)
+
+        with self._lock:
+            self._entries[key] = index
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return index
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+name_index_cache = NameIndexCache()
+
+__all__ = [
+    "MatchMode",
+    "NameIndex",
+    "NameIndexCache",
+    "name_index_cache",
+    "normalize_name",
+]
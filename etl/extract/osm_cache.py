@@ -0,0 +1,362 @@
+"""Managed cache for raw osmnx HTTP responses (Nominatim and Overpass).
+
+osmnx stores every response as ``<sha1(url)>.json`` in ``settings.cache_folder``
+and never prunes them. :class:`OSMResponseCache` replaces the osmnx cache
+hooks while active so that responses are stored compressed, evicted by
+TTL/size (least recently used first), counted, and optionally served
+*exclusively* from disk (offline mode).
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from os import PathLike
+from pathlib import Path
+from typing import Any, Iterator, Literal
+
+try:  # pragma: no cover - optional dependency
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+Compression = Literal["auto", "zstd", "gzip", "none"]
+
+_EXTENSIONS = {"zstd": ".json.zst", "gzip": ".json.gz", "none": ".json"}
+
+_active_cache: "OSMResponseCache | None" = None
+_install_lock = threading.RLock()
+
+
+class OfflineCacheMiss(LookupError):
+    """Raised in offline mode when a response is not available in the cache."""
+
+
+@dataclass(slots=True)
+class CacheStats:
+    """Counters collected while a cache is active."""
+
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    expired: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+
+def _resolve_compression(compression: Compression) -> str:
+    if compression == "auto":
+        return "zstd" if zstandard is not None else "gzip"
+    if compression == "zstd" and zstandard is None:
+        raise ImportError("zstd compression requires the 'zstandard' package")
+    if compression not in _EXTENSIONS:
+        raise ValueError(f"unknown compression: {compression!r}")
+    return compression
+
+
+def _encode(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    return data
+
+
+def _decode(path: Path) -> bytes:
+    raw = path.read_bytes()
+    if path.name.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError(f"reading {path} requires the 'zstandard' package")
+        return zstandard.ZstdDecompressor().decompress(raw)
+    if path.name.endswith(".gz"):
+        return gzip.decompress(raw)
+    return raw
+
+
+class OSMResponseCache:
+    """Size-bounded, compressed cache of osmnx HTTP responses.
+
+    Parameters
+    ----------
+    directory:
+        Cache folder. Legacy uncompressed osmnx files found there are still read.
+    compression:
+        ``"zstd"``, ``"gzip"``, ``"none"`` or ``"auto"`` (zstd when the
+        ``zstandard`` package is installed, gzip otherwise).
+    max_bytes:
+        Total size cap. Least recently used responses are evicted first.
+    ttl:
+        Maximum age, in seconds, of a stored response. Expired responses are
+        treated as misses (except in offline mode) and removed by :meth:`prune`.
+    offline:
+        Serve responses exclusively from the cache, raising
+        :class:`OfflineCacheMiss` instead of touching the network.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str | PathLike[str] = "cache",
+        *,
+        compression: Compression = "auto",
+        max_bytes: int | None = None,
+        ttl: float | None = None,
+        offline: bool = False,
+    ) -> None:
+        self.directory = Path(directory)
+        self.compression = _resolve_compression(compression)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.offline = offline
+        self.stats = CacheStats()
+        self.latest_osm_timestamp: str | None = None
+        self._lock = threading.Lock()
+        self._saved_hooks: tuple[Any, Any] | None = None
+        self._previous_active: OSMResponseCache | None = None
+        self._depth = 0
+
+    # -- storage -----------------------------------------------------------------
+
+    @staticmethod
+    def digest(url: str) -> str:
+        """Return the file stem osmnx uses for ``url``."""
+
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _candidates(self, digest: str) -> list[Path]:
+        return [self.directory / f"{digest}{extension}" for extension in _EXTENSIONS.values()]
+
+    def _find(self, digest: str) -> Path | None:
+        for path in self._candidates(digest):
+            if path.is_file():
+                return path
+        return None
+
+    def _is_expired(self, path: Path, now: float | None = None) -> bool:
+        if self.ttl is None:
+            return False
+        return (now or time.time()) - path.stat().st_mtime > self.ttl
+
+    def _note_timestamp(self, response: Any) -> None:
+        if isinstance(response, dict):
+            timestamp = (response.get("osm3s") or {}).get("timestamp_osm_base")
+            if timestamp and (self.latest_osm_timestamp is None or timestamp > self.latest_osm_timestamp):
+                self.latest_osm_timestamp = timestamp
+
+    def get(self, url: str) -> Any | None:
+        """Return the cached response for ``url`` or ``None`` on a miss."""
+
+        path = self._find(self.digest(url))
+        if path is not None and not self.offline and self._is_expired(path):
+            with self._lock:
+                self.stats.expired += 1
+            path = None
+
+        if path is None:
+            with self._lock:
+                self.stats.misses += 1
+            if self.offline:
+                raise OfflineCacheMiss(f"response not cached (offline mode): {url}")
+            return None
+
+        try:
+            response = json.loads(_decode(path))
+        except (OSError, ValueError) as exc:
+            logger.warning("Resposta em cache ilegível em %s: %s", path, exc)
+            with self._lock:
+                self.stats.misses += 1
+            if self.offline:
+                raise OfflineCacheMiss(f"unreadable cached response: {url}") from exc
+            return None
+
+        # Record the access time for LRU eviction while keeping mtime (the store time).
+        try:
+            os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+        except OSError:  # pragma: no cover - read-only caches are still usable
+            pass
+
+        with self._lock:
+            self.stats.hits += 1
+        self._note_timestamp(response)
+        return response
+
+    def put(self, url: str, response: Any, ok: bool = True) -> Path | None:
+        """Store ``response`` for ``url`` (mirrors osmnx's ``_save_to_cache`` rules)."""
+
+        if not ok:
+            logger.debug("Resposta não armazenada no cache: status HTTP não OK")
+            return None
+        if isinstance(response, dict) and "remark" in response:
+            logger.debug("Resposta não armazenada no cache: remark=%r", response["remark"])
+            return None
+
+        digest = self.digest(url)
+        target = self.directory / f"{digest}{_EXTENSIONS[self.compression]}"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        payload = _encode(json.dumps(response).encode("utf-8"), self.compression)
+
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{digest}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(payload)
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        for stale in self._candidates(digest):
+            if stale != target:
+                stale.unlink(missing_ok=True)
+
+        with self._lock:
+            self.stats.stores += 1
+        self._note_timestamp(response)
+
+        if self.max_bytes is not None:
+            self.prune()
+        return target
+
+    def entries(self) -> list[Path]:
+        """Return every cached response file."""
+
+        if not self.directory.is_dir():
+            return []
+        return [
+            path
+            for path in self.directory.iterdir()
+            if path.is_file() and any(path.name.endswith(extension) for extension in _EXTENSIONS.values())
+        ]
+
+    def size(self) -> int:
+        """Return the total size of the cached responses in bytes."""
+
+        return sum(path.stat().st_size for path in self.entries())
+
+    def prune(self) -> int:
+        """Remove expired responses and enforce ``max_bytes``; return how many were removed."""
+
+        now = time.time()
+        removed = 0
+        survivors: list[tuple[float, int, Path]] = []
+        for path in self.entries():
+            stat = path.stat()
+            if self.ttl is not None and now - stat.st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                removed += 1
+                continue
+            survivors.append((stat.st_atime, stat.st_size, path))
+
+        if self.max_bytes is not None:
+            total = sum(size for _, size, _ in survivors)
+            for _, size, path in sorted(survivors, key=lambda item: item[0]):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+
+        with self._lock:
+            self.stats.evictions += removed
+        return removed
+
+    def compress_existing(self) -> int:
+        """Re-encode legacy uncompressed osmnx responses; return how many were converted."""
+
+        if self.compression == "none":
+            return 0
+        converted = 0
+        for path in self.entries():
+            if not path.name.endswith(".json"):
+                continue
+            stat = path.stat()
+            target = path.with_name(path.name[: -len(".json")] + _EXTENSIONS[self.compression])
+            target.write_bytes(_encode(path.read_bytes(), self.compression))
+            os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            path.unlink()
+            converted += 1
+        return converted
+
+    # -- osmnx integration -----------------------------------------------------------
+
+    def _save_hook(self, url: str, response_json: Any, ok: bool) -> None:
+        self.put(url, response_json, ok)
+
+    def install(self) -> None:
+        """Route osmnx cache reads/writes through this cache until :meth:`uninstall`."""
+
+        global _active_cache
+        from osmnx import _http
+
+        with _install_lock:
+            self._depth += 1
+            if self._depth > 1:
+                return
+            self._saved_hooks = (_http._retrieve_from_cache, _http._save_to_cache)
+            _http._retrieve_from_cache = self.get
+            _http._save_to_cache = self._save_hook
+            self._previous_active = _active_cache
+            _active_cache = self
+
+    def uninstall(self) -> None:
+        global _active_cache
+        from osmnx import _http
+
+        with _install_lock:
+            if self._depth == 0:
+                return
+            self._depth -= 1
+            if self._depth > 0 or self._saved_hooks is None:
+                return
+            _http._retrieve_from_cache, _http._save_to_cache = self._saved_hooks
+            self._saved_hooks = None
+            _active_cache = self._previous_active
+
+    @contextmanager
+    def activated(self) -> Iterator["OSMResponseCache"]:
+        """Context manager form of :meth:`install`/:meth:`uninstall`."""
+
+        self.install()
+        try:
+            yield self
+        finally:
+            self.uninstall()
+
+    def log_stats(self) -> None:
+        logger.info(
+            "Cache OSM (%s): %s, %.1f KiB em disco",
+            self.directory,
+            self.stats.as_dict(),
+            self.size() / 1024,
+        )
+
+
+def active_cache() -> OSMResponseCache | None:
+    """Return the cache currently installed into osmnx, if any."""
+
+    return _active_cache
+
+
+__all__ = [
+    "CacheStats",
+    "Compression",
+    "OSMResponseCache",
+    "OfflineCacheMiss",
+    "active_cache",
+]
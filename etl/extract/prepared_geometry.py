@@ -0,0 +1,264 @@
+"""Binary, memory-mapped cache of prepared geometries.
+
+GeoJSON files are kept as the human readable source of truth. Next to each
+one a ``<name>.wkb`` sidecar stores the geometry as WKB together with a
+validity-repaired copy (used only for predicates; the geometry itself is
+returned as stored), the bounds and simplified inner/outer envelopes so that
+later runs skip ``json.loads``/``shape`` entirely::
+
+    magic (8 bytes) | header length (uint32, little endian) | JSON header | WKB blobs
+
+The header records the offset/length of every blob, the bounds, free-form
+metadata and the size/mtime of the GeoJSON it was built from.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from dataclasses import dataclass, field
+from os import PathLike
+from pathlib import Path
+from typing import Any, Mapping
+
+import shapely
+from shapely.geometry import shape
+from shapely.geometry.base import BaseGeometry
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GXGEOM1\0"
+SIDECAR_SUFFIX = ".wkb"
+# Fraction of the largest bounds dimension used as default simplification tolerance.
+ENVELOPE_TOLERANCE_RATIO = 0.001
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+class EmptyGeometryFile(ValueError):
+    """Raised when a GeoJSON FeatureCollection has no features."""
+
+
+@dataclass(frozen=True, slots=True)
+class PreparedGeometry:
+    """Geometry loaded from the binary cache, prepared for repeated predicates.
+
+    ``geometry`` is the geometry exactly as stored; ``repaired`` is its
+    ``make_valid`` copy (the same object when already valid), meant for
+    predicates only.
+    """
+
+    geometry: BaseGeometry
+    repaired: BaseGeometry
+    bounds: tuple[float, float, float, float]
+    inner: BaseGeometry | None = None
+    outer: BaseGeometry | None = None
+    metadata: Mapping[str, Any] = field(default_factory=dict)
+
+
+def sidecar_path(path: Path | str | PathLike[str]) -> Path:
+    """Return the binary sidecar used for the GeoJSON file ``path``."""
+
+    source = Path(path)
+    return source.with_name(source.name + SIDECAR_SUFFIX)
+
+
+def geometry_from_geojson(data: Mapping[str, Any]) -> tuple[BaseGeometry, dict[str, Any]]:
+    """Return the first geometry of a GeoJSON object and its feature properties."""
+
+    if data.get("type") == "FeatureCollection":
+        features = data.get("features") or []
+        if not features:
+            raise EmptyGeometryFile("Cached geometry does not contain features.")
+        feature = features[0]
+        return shape(feature["geometry"]), dict(feature.get("properties") or {})
+    if data.get("type") == "Feature":
+        return shape(data["geometry"]), dict(data.get("properties") or {})
+    return shape(data), {}
+
+
+def _envelopes(geometry: BaseGeometry, tolerance: float | None) -> tuple[BaseGeometry | None, BaseGeometry | None]:
+    if geometry.is_empty or geometry.geom_type not in {"Polygon", "MultiPolygon"}:
+        return None, None
+
+    if tolerance is None:
+        minx, miny, maxx, maxy = geometry.bounds
+        tolerance = max(maxx - minx, maxy - miny) * ENVELOPE_TOLERANCE_RATIO
+    if tolerance <= 0:
+        return None, None
+
+    simplified = geometry.simplify(tolerance)
+    # The simplified boundary stays within ``tolerance`` of the original one, so
+    # shrinking/growing it by a slightly larger distance bounds the original.
+    margin = tolerance * 1.5
+    inner = simplified.buffer(-margin)
+    outer = simplified.buffer(margin)
+    return (None if inner.is_empty else inner), outer
+
+
+def write_prepared(
+    geometry: BaseGeometry,
+    path: Path | str | PathLike[str],
+    *,
+    metadata: Mapping[str, Any] | None = None,
+    simplify_tolerance: float | None = None,
+    source_signature: tuple[int, int] | None = None,
+) -> Path:
+    """Write ``geometry`` to ``path`` using the binary sidecar format.
+
+    Parameters
+    ----------
+    geometry:
+        Geometry to persist.
+    path:
+        Destination file, written atomically.
+    metadata:
+        JSON-serializable values stored in the header.
+    simplify_tolerance:
+        Tolerance, in geometry units, of the inner/outer envelopes. ``None``
+        derives it from the geometry bounds.
+    source_signature:
+        ``(mtime_ns, size)`` of the GeoJSON file the sidecar mirrors.
+    """
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    repaired = geometry if geometry.is_valid else shapely.make_valid(geometry)
+    inner, outer = _envelopes(repaired, simplify_tolerance)
+
+    blobs: dict[str, bytes] = {"original": shapely.to_wkb(geometry)}
+    if repaired is not geometry:
+        blobs["repaired"] = shapely.to_wkb(repaired)
+    if inner is not None:
+        blobs["inner"] = shapely.to_wkb(inner)
+    if outer is not None:
+        blobs["outer"] = shapely.to_wkb(outer)
+
+    sections: dict[str, list[int]] = {}
+    offset = 0
+    for name, blob in blobs.items():
+        sections[name] = [offset, len(blob)]
+        offset += len(blob)
+
+    header = json.dumps(
+        {
+            "bounds": list(repaired.bounds),
+            "sections": sections,
+            "metadata": dict(metadata or {}),
+            "source_signature": list(source_signature) if source_signature else None,
+        },
+        ensure_ascii=False,
+        default=str,
+    ).encode("utf-8")
+
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(MAGIC)
+            fh.write(_HEADER_LENGTH.pack(len(header)))
+            fh.write(header)
+            for blob in blobs.values():
+                fh.write(blob)
+        os.replace(tmp_name, target)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return target
+
+
+def _read_header(buffer: mmap.mmap) -> tuple[dict[str, Any], int]:
+    if buffer[: len(MAGIC)] != MAGIC:
+        raise ValueError("not a prepared geometry file")
+    start = len(MAGIC) + _HEADER_LENGTH.size
+    (length,) = _HEADER_LENGTH.unpack(buffer[len(MAGIC) : start])
+    return json.loads(buffer[start : start + length].decode("utf-8")), start + length
+
+
+def _read_mapped(path: Path | str | PathLike[str], signature: tuple[int, int] | None = None) -> PreparedGeometry | None:
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        header, data_start = _read_header(buffer)
+        if signature is not None and header.get("source_signature") != list(signature):
+            return None
+        geometries: dict[str, BaseGeometry] = {}
+        for name, (offset, length) in header["sections"].items():
+            start = data_start + offset
+            geometries[name] = shapely.from_wkb(buffer[start : start + length])
+
+    original = geometries["original"]
+    repaired = geometries.get("repaired", original)
+    for geometry in geometries.values():
+        shapely.prepare(geometry)
+
+    return PreparedGeometry(
+        geometry=original,
+        repaired=repaired,
+        bounds=tuple(header["bounds"]),  # type: ignore[arg-type]
+        inner=geometries.get("inner"),
+        outer=geometries.get("outer"),
+        metadata=header.get("metadata") or {},
+    )
+
+
+def read_prepared(path: Path | str | PathLike[str]) -> PreparedGeometry:
+    """Load a binary geometry file through a memory map and prepare it."""
+
+    prepared = _read_mapped(path)
+    assert prepared is not None
+    return prepared
+
+
+def _source_signature(path: Path) -> tuple[int, int]:
+    stat = path.stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_geometry_file(path: Path | str | PathLike[str], *, use_sidecar: bool = True) -> PreparedGeometry:
+    """Load a GeoJSON (or binary) geometry file, preferring its binary sidecar.
+
+    When the sidecar is missing or was built from a different version of the
+    GeoJSON it is rebuilt after parsing, so only the first load pays for
+    ``json.loads``/``shape``. Feature properties end up in ``metadata``.
+    """
+
+    source = Path(path)
+    with open(source, "rb") as fh:
+        is_binary = fh.read(len(MAGIC)) == MAGIC
+    if is_binary:
+        return read_prepared(source)
+
+    sidecar = sidecar_path(source)
+    signature = _source_signature(source)
+    if use_sidecar:
+        try:
+            cached = _read_mapped(sidecar, signature)
+        except (OSError, ValueError):
+            cached = None
+        if cached is not None:
+            return cached
+
+    geometry, properties = geometry_from_geojson(json.loads(source.read_text(encoding="utf-8")))
+    if use_sidecar:
+        try:
+            write_prepared(geometry, sidecar, metadata=properties, source_signature=signature)
+            return read_prepared(sidecar)
+        except OSError as exc:
+            logger.warning("Não foi possível gravar o cache binário %s: %s", sidecar, exc)
+
+    repaired = geometry if geometry.is_valid else shapely.make_valid(geometry)
+    shapely.prepare(repaired)
+    return PreparedGeometry(geometry=geometry, repaired=repaired, bounds=repaired.bounds, metadata=properties)
+
+
+__all__ = [
+    "EmptyGeometryFile",
+    "PreparedGeometry",
+    "geometry_from_geojson",
+    "load_geometry_file",
+    "read_prepared",
+    "sidecar_path",
+    "write_prepared",
+]
@@ -2,15 +2,26 @@
 
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Iterable, Sequence
+from typing import Any, Callable, Iterable, Sequence, TypeVar
 
 import json
+import logging
 
 import osmnx as ox
-from shapely.geometry import mapping, shape
+from shapely.geometry import mapping
 from shapely.geometry.base import BaseGeometry
-from unidecode import unidecode
+from .geometry_cache import GeometryCache, cache_key
+from .names import MatchMode, name_index_cache
+from .osm_cache import OfflineCacheMiss, OSMResponseCache
+from .prepared_geometry import load_geometry_file
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
 
 RESERVE_NAME = "Estação Ecológica Estadual de Guaxindiba"
 SEARCH_PLACES = (
@@ -18,33 +29,160 @@ SEARCH_PLACES = (
     "Rio de Janeiro, Brazil",
     "Brazil",
 )
+TAG_SETS: tuple[dict[str, str], ...] = (
+    {"boundary": "protected_area"},
+    {"leisure": "nature_reserve"},
+    {"boundary": "national_park"},
+    # Fallbacks for administrative/municipality polygons (e.g., cities)
+    {"boundary": "administrative", "admin_level": "8"},
+    {"place": "city"},
+)
+
+
+def _iter_places_and_tags(search_places: Sequence[str]) -> Iterable[tuple[str, dict[str, str]]]:
+    for place in search_places:
+        for tags in TAG_SETS:
+            yield place, tags
 
 
-def _normalize(text: str) -> str:
-    """Normalize strings for name comparison."""
+def _combine_tags(tag_sets: Sequence[dict[str, str]]) -> dict[str, str | list[str]]:
+    """Merge tag sets into a single osmnx ``tags`` argument (values are OR-ed)."""
 
-    return unidecode((text or "").lower().strip())
+    combined: dict[str, list[str]] = {}
+    for tags in tag_sets:
+        for key, value in tags.items():
+            values = combined.setdefault(key, [])
+            if value not in values:
+                values.append(value)
+    return {key: values[0] if len(values) == 1 else values for key, values in combined.items()}
 
 
-def _iter_places_and_tags(search_places: Sequence[str]) -> Iterable[tuple[str, dict[str, str]]]:
-    tags_try = [
-        {"boundary": "protected_area"},
-        {"leisure": "nature_reserve"},
-        {"boundary": "national_park"},
-        # Fallbacks for administrative/municipality polygons (e.g., cities)
-        {"boundary": "administrative", "admin_level": "8"},
-        {"place": "city"},
-    ]
+def _tag_mask(gdf: Any, tags: dict[str, str]) -> Any | None:
+    """Return a mask selecting rows matching *all* ``tags`` or ``None`` if impossible."""
+
+    mask: Any = None
+    for key, value in tags.items():
+        if key not in gdf.columns:
+            return None
+        column_mask = gdf[key] == value
+        mask = column_mask if mask is None else (mask & column_mask)
+    return mask
 
-    for place in search_places:
-        for tags in tags_try:
-            yield place, tags
+
+def _union_of(candidates: Any) -> BaseGeometry | None:
+    if candidates.empty:
+        return None
+
+    candidates = candidates.to_crs(4326)
+    geometry = candidates.unary_union
+    if geometry.is_empty:
+        return None
+
+    return geometry
+
+
+def _query_place(
+    place: str,
+    tags: dict[str, str],
+    reserve_name: str,
+    name_match: MatchMode,
+) -> BaseGeometry | None:
+    try:
+        gdf = ox.features_from_place(place, tags=tags)
+    except OfflineCacheMiss:
+        # Offline mode must fail fast instead of looking like "not found".
+        raise
+    except Exception:  # pragma: no cover - network or API errors are ignored
+        return None
+
+    if gdf is None or gdf.empty:
+        return None
+
+    index = name_index_cache.get((place, tuple(sorted(tags.items()))), gdf)
+    if not index.columns:
+        return None
+
+    return _union_of(gdf[index.match(reserve_name, mode=name_match)])
+
+
+def _query_place_combined(place: str, reserve_name: str, name_match: MatchMode) -> BaseGeometry | None:
+    """Run one Overpass query covering every tag set and filter locally in priority order."""
+
+    try:
+        gdf = ox.features_from_place(place, tags=_combine_tags(TAG_SETS))
+    except OfflineCacheMiss:
+        # Offline mode must fail fast instead of looking like "not found".
+        raise
+    except Exception:  # pragma: no cover - network or API errors are ignored
+        return None
+
+    if gdf is None or gdf.empty:
+        return None
+
+    index = name_index_cache.get((place, "combined"), gdf)
+    if not index.columns:
+        return None
+    name_mask = index.match(reserve_name, mode=name_match)
+
+    for tags in TAG_SETS:
+        mask = _tag_mask(gdf, tags)
+        if mask is None:
+            continue
+        geometry = _union_of(gdf[mask & name_mask])
+        if geometry is not None:
+            return geometry
+
+    return None
+
+
+def _first_in_priority_order(tasks: Sequence[Callable[[], T | None]], max_workers: int) -> T | None:
+    """Return the first non-``None`` task result, honouring the order of ``tasks``.
+
+    Tasks run on a bounded thread pool that keeps at most ``max_workers`` queries
+    in flight. A result is only accepted once every higher-priority task has
+    finished without a match; remaining lower-priority work is then cancelled.
+    """
+
+    if max_workers <= 1:
+        for task in tasks:
+            result = task()
+            if result is not None:
+                return result
+        return None
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="osm-lookup")
+    pending: deque[Future[T | None]] = deque()
+    remaining = iter(tasks)
+
+    def _submit_next() -> None:
+        task = next(remaining, None)
+        if task is not None:
+            pending.append(executor.submit(task))
+
+    try:
+        for _ in range(max_workers):
+            _submit_next()
+
+        while pending:
+            result = pending.popleft().result()
+            if result is not None:
+                logger.debug("Consulta OSM encontrou resultado; cancelando %s consultas pendentes", len(pending))
+                return result
+            _submit_next()
+        return None
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 def fetch_reserve_polygon(
     reserve_name: str = RESERVE_NAME,
     *,
     search_places: Sequence[str] | None = None,
+    max_workers: int = 1,
+    combined_query: bool = False,
+    name_match: MatchMode = "substring",
 ) -> BaseGeometry:
     """Fetch a reserve polygon directly from OpenStreetMap.
 
@@ -55,38 +193,30 @@ def fetch_reserve_polygon(
     search_places:
         Optional list/tuple of place strings to scope the OSM search. If
         omitted, a broad search across Brazil is used.
+    max_workers:
+        Number of (place, tags) queries allowed in flight at once. Results are
+        still accepted in priority order; ``1`` keeps the lookups sequential.
+    combined_query:
+        When ``True`` a single Overpass query covering every tag set is issued
+        per place and the tag sets are applied locally, in priority order.
+    name_match:
+        How feature names are compared with ``reserve_name``: ``"substring"``
+        (default), ``"token"`` or ``"fuzzy"`` (see :class:`NameIndex`).
     """
 
-    name_norm = _normalize(reserve_name)
     places = tuple(search_places) if search_places else SEARCH_PLACES
 
-    for place, tags in _iter_places_and_tags(places):
-        try:
-            gdf = ox.features_from_place(place, tags=tags)
-        except Exception:  # pragma: no cover - network or API errors are ignored
-            continue
-
-        if gdf is None or gdf.empty:
-            continue
-
-        cols_to_check = [column for column in gdf.columns if column.startswith("name")]
-        if not cols_to_check:
-            continue
-
-        mask = False
-        for column in cols_to_check:
-            mask = mask | gdf[column].apply(lambda value: name_norm in _normalize(str(value)))
-
-        candidates = gdf[mask]
-
-        if candidates.empty:
-            continue
-
-        candidates = candidates.to_crs(4326)
-        geometry = candidates.unary_union
-        if geometry.is_empty:
-            continue
+    tasks: list[Callable[[], BaseGeometry | None]]
+    if combined_query:
+        tasks = [partial(_query_place_combined, place, reserve_name, name_match) for place in places]
+    else:
+        tasks = [
+            partial(_query_place, place, tags, reserve_name, name_match)
+            for place, tags in _iter_places_and_tags(places)
+        ]
 
+    geometry = _first_in_priority_order(tasks, max_workers)
+    if geometry is not None:
         return geometry
 
     # Fallback: geocode the name directly (optionally scoped by search_places)
@@ -97,6 +227,8 @@ def fetch_reserve_polygon(
     for query in geocode_queries:
         try:
             gdf = ox.geocode_to_gdf(query)
+        except OfflineCacheMiss:
+            raise
         except Exception:  # pragma: no cover - network or API errors are ignored
             continue
 
@@ -110,17 +242,15 @@ def fetch_reserve_polygon(
     raise ValueError("Could not find the reserve polygon on OSM.")
 
 
-def _load_geometry_from_cache(cache_path: Path) -> BaseGeometry:
-    data = json.loads(cache_path.read_text())
-    if data.get("type") == "FeatureCollection":
-        features = data.get("features") or []
-        if not features:
-            raise ValueError("Cached geometry does not contain features.")
-        geometry_data = features[0]["geometry"]
-    else:
-        geometry_data = data
+def _fetch_with_osm_cache(osm_cache: OSMResponseCache | None, *args: Any, **kwargs: Any) -> BaseGeometry:
+    if osm_cache is None:
+        return fetch_reserve_polygon(*args, **kwargs)
+    with osm_cache.activated():
+        return fetch_reserve_polygon(*args, **kwargs)
 
-    return shape(geometry_data)
+
+def _load_geometry_from_cache(cache_path: Path) -> BaseGeometry:
+    return load_geometry_file(cache_path).geometry
 
 
 def _dump_geometry_to_cache(geometry: BaseGeometry, cache_path: Path) -> None:
@@ -142,8 +272,15 @@ def get_reserve_geometry(
     name: str = RESERVE_NAME,
     *,
     cache: Path | None = None,
+    cache_dir: Path | None = None,
+    cache_ttl: float | None = None,
+    revalidate: bool = False,
+    osm_cache: OSMResponseCache | None = None,
     geometry_file: Path | None = None,
     search_places: Sequence[str] | None = None,
+    max_workers: int = 1,
+    combined_query: bool = False,
+    name_match: MatchMode = "substring",
 ) -> BaseGeometry:
     """Return a reserve geometry, optionally reusing cache or a local file.
 
@@ -153,7 +290,22 @@ def get_reserve_geometry(
         Reserve name to query on OpenStreetMap. Used only when ``geometry_file``
         is not provided.
     cache:
-        Optional path to store/reuse the resolved geometry.
+        Optional path to store/reuse the resolved geometry. The file is not
+        keyed, so it should only be shared by lookups of the same reserve.
+    cache_dir:
+        Optional directory of cached geometries keyed by a hash of ``name``,
+        ``search_places`` and the tag strategy (see
+        :class:`~etl.extract.geometry_cache.GeometryCache`).
+    cache_ttl:
+        Maximum age, in seconds, of entries in ``cache_dir``. ``None`` never
+        expires them.
+    revalidate:
+        Return stale ``cache_dir`` entries immediately and refresh them in a
+        background thread instead of blocking on OpenStreetMap.
+    osm_cache:
+        Optional :class:`~etl.extract.osm_cache.OSMResponseCache` used for the
+        raw osmnx responses while querying OpenStreetMap. In offline mode the
+        polygon is resolved purely from cached responses.
     geometry_file:
         Optional GeoJSON file containing the reserve geometry. When provided,
         the geometry is loaded from this path and (optionally) copied into
@@ -161,6 +313,8 @@ def get_reserve_geometry(
     search_places:
         Optional list/tuple of place strings to scope the OSM search. Ignored
         when ``geometry_file`` is provided.
+    max_workers, combined_query, name_match:
+        Forwarded to :func:`fetch_reserve_polygon`.
     """
 
     cache_path = cache if cache is None else Path(cache)
@@ -175,7 +329,28 @@ def get_reserve_geometry(
     if cache_path is not None and cache_path.exists():
         return _load_geometry_from_cache(cache_path)
 
-    geometry = fetch_reserve_polygon(name, search_places=search_places)
+    fetch = partial(
+        _fetch_with_osm_cache,
+        osm_cache,
+        name,
+        search_places=search_places,
+        max_workers=max_workers,
+        combined_query=combined_query,
+        name_match=name_match,
+    )
+
+    if cache_dir is not None:
+        strategy = {"tags": TAG_SETS, "combined_query": combined_query, "name_match": name_match}
+        key = cache_key(name, search_places, strategy=strategy)
+        geometry = GeometryCache(cache_dir, ttl=cache_ttl).get_or_fetch(
+            key,
+            fetch,
+            revalidate=revalidate,
+            metadata={"name": name, "search_places": list(search_places) if search_places else None},
+            osm_timestamp=(lambda: osm_cache.latest_osm_timestamp) if osm_cache is not None else None,
+        )
+    else:
+        geometry = fetch()
 
     if cache_path is not None:
         _dump_geometry_to_cache(geometry, cache_path)
@@ -4,12 +4,14 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 import logging
+import threading
 from typing import Iterable, Sequence
 
 import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import Select, WebDriverWait
@@ -19,6 +21,11 @@ import time
 
 logger = logging.getLogger(__name__)
 
+# Browser used by each thread running fetch_fire_data, so an abandoned
+# fetch (see etl.snapshots) can be cancelled from another thread.
+_active_drivers: dict[int, webdriver.Chrome] = {}
+_active_lock = threading.Lock()
+
 
 @dataclass(slots=True)
 class TerraBrasilisFilters:
@@ -80,19 +87,10 @@ def _sleep(delay: float) -> None:
         time.sleep(delay)
 
 
-def fetch_fire_data(filters: TerraBrasilisFilters, *, config: TerraBrasilisConfig | None = None) -> pd.DataFrame:
-    """Fetch fire data from TerraBrasilis using Selenium."""
+def create_driver(config: TerraBrasilisConfig | None = None) -> webdriver.Chrome:
+    """Launch the Chrome session used by :func:`fetch_fire_data`."""
 
     cfg = config or TerraBrasilisConfig()
-
-    logger.info(
-        "Iniciando coleta no TerraBrasilis (headless=%s, estados=%s, países=%s, satélite=%s)",
-        cfg.headless,
-        filters.state_values,
-        filters.country_values,
-        filters.satellite_value,
-    )
-
     options = Options()
     if cfg.headless:
         options.add_argument("--headless=new")
@@ -101,11 +99,61 @@ def fetch_fire_data(filters: TerraBrasilisFilters, *, config: TerraBrasilisConfi
     for arg in cfg.extra_chrome_args:
         options.add_argument(arg)
 
-    driver = webdriver.Chrome(
+    return webdriver.Chrome(
         service=Service(ChromeDriverManager().install()),
         options=options,
     )
+
+
+def cancel_fetch(thread_id: int) -> bool:
+    """Quit the browser used by the fetch running in ``thread_id``; return ``True`` if there was one.
+
+    The fetch then fails with a WebDriver error instead of leaving Chrome
+    running after the process exits.
+    """
+
+    with _active_lock:
+        driver = _active_drivers.pop(thread_id, None)
+    if driver is None:
+        return False
+    logger.warning("Coleta no TerraBrasilis cancelada; fechando o navegador")
+    try:
+        driver.quit()
+    except WebDriverException as exc:  # pragma: no cover - best effort
+        logger.debug("Erro ao fechar o navegador: %s", exc)
+    return True
+
+
+def fetch_fire_data(
+    filters: TerraBrasilisFilters,
+    *,
+    config: TerraBrasilisConfig | None = None,
+    driver: webdriver.Chrome | None = None,
+) -> pd.DataFrame:
+    """Fetch fire data from TerraBrasilis using Selenium.
+
+    When ``driver`` is given the page is reloaded in that (already running)
+    browser, which is left open for the next call; otherwise a new browser
+    is launched and closed according to ``config``.
+    """
+
+    cfg = config or TerraBrasilisConfig()
+
+    logger.info(
+        "Iniciando coleta no TerraBrasilis (headless=%s, estados=%s, países=%s, satélite=%s)",
+        cfg.headless,
+        filters.state_values,
+        filters.country_values,
+        filters.satellite_value,
+    )
+
+    owns_driver = driver is None
+    if driver is None:
+        driver = create_driver(cfg)
     wait = WebDriverWait(driver, cfg.timeout)
+    thread_id = threading.get_ident()
+    with _active_lock:
+        _active_drivers[thread_id] = driver
 
     try:
         driver.get(cfg.url)
@@ -175,7 +223,55 @@ def fetch_fire_data(filters: TerraBrasilisFilters, *, config: TerraBrasilisConfi
         return dataframe
 
     finally:
-        if cfg.should_close_browser():
-            driver.quit()
-        else:
-            logger.info("Navegador permanecerá aberto para inspeção manual")
+        with _active_lock:
+            cancelled = _active_drivers.pop(thread_id, None) is None
+        if owns_driver and not cancelled:
+            if cfg.should_close_browser():
+                driver.quit()
+            else:
+                logger.info("Navegador permanecerá aberto para inspeção manual")
+
+
+class BrowserSession:
+    """Chrome session kept open across :func:`fetch_fire_data` calls.
+
+    The browser is launched on the first fetch and relaunched after a
+    WebDriver failure, so long-running processes pay the start-up once.
+    Instances are callables with the signature of :func:`fetch_fire_data`.
+    """
+
+    def __init__(self, config: TerraBrasilisConfig | None = None) -> None:
+        self.config = config or TerraBrasilisConfig(headless=True, pause_after_apply=False)
+        self._driver: webdriver.Chrome | None = None
+
+    def __call__(
+        self,
+        filters: TerraBrasilisFilters | None = None,
+        *,
+        config: TerraBrasilisConfig | None = None,
+    ) -> pd.DataFrame:
+        if self._driver is None:
+            logger.info("Abrindo sessão persistente do Chrome")
+            self._driver = create_driver(self.config)
+        try:
+            return fetch_fire_data(filters or TerraBrasilisFilters(), config=config or self.config, driver=self._driver)
+        except WebDriverException:
+            logger.warning("Falha no navegador; a sessão será recriada na próxima coleta")
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Quit the browser, if it is running."""
+
+        driver, self._driver = self._driver, None
+        if driver is not None:
+            try:
+                driver.quit()
+            except WebDriverException as exc:  # pragma: no cover - best effort
+                logger.debug("Erro ao fechar o navegador: %s", exc)
+
+    def __enter__(self) -> "BrowserSession":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
@@ -1,5 +1,36 @@
 """Loading helpers for ETL outputs."""
 
-from .csv import save_dataframe, save_geometry
+from __future__ import annotations
 
-__all__ = ["save_dataframe", "save_geometry"]
+from .._lazy import lazy_exports
+
+# Each writer is imported on first use, so loading the CSV writer does not
+# also pull in the GeoJSON and Parquet ones.
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "FireArchive": ".sqlite",
+        "RollupStore": ".rollups",
+        "compact_csv": ".csv",
+        "save_dataframe": ".csv",
+        "save_geometry": ".csv",
+        "save_parquet": ".parquet",
+        "save_points_geojson": ".geojson",
+        "save_points_ndjson": ".geojson",
+        "save_sqlite": ".sqlite",
+        "update_rollups": ".rollups",
+    },
+)
+
+__all__ = [
+    "FireArchive",
+    "RollupStore",
+    "compact_csv",
+    "save_dataframe",
+    "save_geometry",
+    "save_parquet",
+    "save_points_geojson",
+    "save_points_ndjson",
+    "save_sqlite",
+    "update_rollups",
+]
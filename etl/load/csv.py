@@ -2,35 +2,35 @@
 
 from __future__ import annotations
 
+import csv
+import hashlib
 import json
+import logging
+import os
 from os import PathLike
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Iterable, Literal, Sequence
 
+import numpy as np
 import pandas as pd
 from shapely.geometry import mapping
 from shapely.geometry.base import BaseGeometry
 
+from ..utils import DEFAULT_KEY_COLUMNS, atomic_target, ensure_path, replace_file, resolve_key_columns, row_keys
 
-def _ensure_path(path: Path | str | PathLike[str]) -> Path:
-    """Return ``path`` as :class:`pathlib.Path` enforcing valid types."""
+try:  # pragma: no cover - platform dependent
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
 
-    if isinstance(path, Path):
-        return path
-    if isinstance(path, (str, PathLike)):
-        return Path(path)
-    raise TypeError("path must be a string, Path or os.PathLike instance")
+logger = logging.getLogger(__name__)
 
+KEY_INDEX_SUFFIX = ".keys"
+APPEND_CHUNK_SIZE = 10_000
 
-def save_dataframe(df: pd.DataFrame, path: Path | str | PathLike[str]) -> Path:
-    """Persist a dataframe to CSV ensuring the parent directory exists."""
 
-    target = _ensure_path(path)
-    target.parent.mkdir(parents=True, exist_ok=True)
-
-    if hasattr(df, "to_csv"):
-        df.to_csv(target, index=False)  # type: ignore[call-arg]
-        return target
+def _write_rows_fallback(df: Any, fh: Any) -> None:
+    """Serialize objects that only expose ``columns`` and ``__getitem__``."""
 
     columns: Iterable[str] | None = getattr(df, "columns", None)
     if columns is None:
@@ -38,28 +38,291 @@ def save_dataframe(df: pd.DataFrame, path: Path | str | PathLike[str]) -> Path:
 
     columns = list(columns)
     if not columns:
-        target.write_text("", encoding="utf-8")
+        return
+
+    # Materialize every column once instead of indexing the frame per cell.
+    values = [list(df[column]) for column in columns]
+    writer = csv.writer(fh, lineterminator="\n")
+    writer.writerow(columns)
+    writer.writerows(zip(*values))
+
+
+def _file_digest(path: Path | str) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+def _same_content(tmp_name: str, target: Path) -> bool:
+    try:
+        if os.path.getsize(tmp_name) != target.stat().st_size:
+            return False
+    except FileNotFoundError:
+        return False
+    return _file_digest(tmp_name) == _file_digest(target)
+
+
+def _replace_if_changed(tmp_name: str, target: Path) -> bool:
+    """Move ``tmp_name`` over ``target`` unless both hold the same bytes.
+
+    Returns ``True`` when ``target`` was replaced. Skipping keeps the original
+    inode and mtime, so unchanged outputs do not look modified downstream.
+    """
+
+    if _same_content(tmp_name, target):
+        Path(tmp_name).unlink(missing_ok=True)
+        logger.info("Conteúdo de %s inalterado; gravação ignorada", target)
+        return False
+    replace_file(tmp_name, target)
+    return True
+
+
+def _write_atomic(df: Any, target: Path) -> bool:
+    fd, tmp_name = atomic_target(target)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as fh:
+            if hasattr(df, "to_csv"):
+                df.to_csv(fh, index=False)  # type: ignore[call-arg]
+            else:
+                _write_rows_fallback(df, fh)
+        return _replace_if_changed(tmp_name, target)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def key_index_path(path: Path | str | PathLike[str]) -> Path:
+    """Return the sidecar file holding the row keys of the CSV ``path``."""
+
+    target = ensure_path(path)
+    return target.with_name(target.name + KEY_INDEX_SUFFIX)
+
+
+def _csv_signature(path: Path) -> np.ndarray:
+    stat = path.stat()
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def _write_key_index(path: Path, keys: np.ndarray) -> None:
+    index_path = key_index_path(path)
+    fd, tmp_name = atomic_target(index_path)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(_csv_signature(path).tobytes())
+            fh.write(np.ascontiguousarray(keys, dtype=np.uint64).tobytes())
+        replace_file(tmp_name, index_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def _read_key_index(path: Path, key_columns: Sequence[str]) -> np.ndarray:
+    """Return the stored row keys, rebuilding them when the CSV changed behind our back."""
+
+    index_path = key_index_path(path)
+    try:
+        raw = np.fromfile(index_path, dtype=np.int64)
+    except (FileNotFoundError, ValueError):
+        raw = None
+    if raw is not None and len(raw) >= 2 and np.array_equal(raw[:2], _csv_signature(path)):
+        return raw[2:].view(np.uint64)
+
+    existing = pd.read_csv(path, dtype=str, keep_default_na=False, usecols=list(key_columns))
+    keys = row_keys(existing, key_columns)
+    _write_key_index(path, keys)
+    return keys
+
+
+def _read_header(path: Path) -> list[str]:
+    with path.open("r", encoding="utf-8", newline="") as fh:
+        return next(csv.reader(fh), [])
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+def _write_new(df: pd.DataFrame, target: Path, chunk_size: int) -> None:
+    fd, tmp_name = atomic_target(target)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as fh:
+            for start in range(0, max(len(df), 1), chunk_size):
+                df.iloc[start : start + chunk_size].to_csv(fh, index=False, header=start == 0)
+        replace_file(tmp_name, target)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def _append_dataframe(
+    df: pd.DataFrame,
+    target: Path,
+    key_columns: Sequence[str] | None,
+    chunk_size: int,
+) -> Path:
+    if not isinstance(df, pd.DataFrame):
+        df = pd.DataFrame({column: list(df[column]) for column in df.columns})
+
+    header = _read_header(target) if target.exists() and target.stat().st_size else []
+    if header and header != [str(column) for column in df.columns]:
+        if set(header) != set(map(str, df.columns)):
+            logger.info("Colunas de %s mudaram; reescrevendo o arquivo completo", target)
+            existing = pd.read_csv(target, dtype=str, keep_default_na=False)
+            merged = pd.concat([existing, df.astype("string")], ignore_index=True)
+            _write_atomic(merged, target)
+            return compact_csv(target, key_columns=key_columns)
+        df = df[header]
+
+    columns = resolve_key_columns(list(map(str, df.columns)), key_columns)
+    keys = row_keys(df, columns)
+    fresh = ~pd.Series(keys).duplicated().to_numpy()
+    if not header:
+        _write_new(df[fresh], target, chunk_size)
+        _write_key_index(target, keys[fresh])
+        logger.info("%s focos novos acrescentados em %s", int(fresh.sum()), target)
         return target
 
-    first_series = df[columns[0]]
+    fd = os.open(target, os.O_WRONLY | os.O_APPEND)
     try:
-        rows_length = len(first_series)
-    except TypeError:  # pragma: no cover - fallback for exotic series implementations
-        rows_length = len(list(first_series))
-
-    with target.open("w", encoding="utf-8") as fh:
-        fh.write(",".join(columns) + "\n")
-        for row_index in range(rows_length):
-            values: list[str] = []
-            for column in columns:
-                series = df[column]
-                value = series[row_index]
-                values.append(str(value))
-            fh.write(",".join(values) + "\n")
+        if fcntl is not None:
+            # Concurrent appenders wait here, then see each other's keys.
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        stored = _read_key_index(target, columns)
+        fresh &= ~np.isin(keys, stored)
+        new_rows = df[fresh]
+        if new_rows.empty:
+            logger.info("Nenhum foco novo para acrescentar em %s", target)
+            return target
+
+        original_size = os.fstat(fd).st_size
+        try:
+            for start in range(0, len(new_rows), chunk_size):
+                chunk = new_rows.iloc[start : start + chunk_size]
+                _write_all(fd, chunk.to_csv(index=False, header=False).encode("utf-8"))
+        except BaseException:
+            # Drop a partially appended chunk so the CSV still matches its key index.
+            os.ftruncate(fd, original_size)
+            raise
+        _write_key_index(target, np.concatenate([stored, keys[fresh]]))
+    finally:
+        os.close(fd)
+
+    logger.info("%s focos novos acrescentados em %s", len(new_rows), target)
+    return target
+
+
+def save_dataframe(
+    df: pd.DataFrame,
+    path: Path | str | PathLike[str],
+    *,
+    mode: Literal["overwrite", "append"] = "overwrite",
+    key_columns: Sequence[str] | None = None,
+    chunk_size: int = APPEND_CHUNK_SIZE,
+) -> Path:
+    """Persist a dataframe to CSV ensuring the parent directory exists.
+
+    The file is written to a temporary sibling and renamed into place, so
+    readers never observe a partially written CSV. When the serialized
+    content matches the existing file, the file is left untouched.
+
+    Args:
+        df: Dataframe (or any object exposing ``columns`` and ``__getitem__``).
+        path: Destination CSV file.
+        mode: ``"overwrite"`` replaces the file; ``"append"`` only adds rows
+            whose key was not written before, tracked in a ``.keys`` sidecar.
+            Appends go to the end of the existing file under an exclusive
+            lock (no copy of the file), and a failed append is truncated
+            back to the original size.
+        key_columns: Columns identifying a detection in append mode. Defaults
+            to ``Data / Hora``, ``Satélite``, ``Latitude`` and ``Longitude``
+            (those present), or every non-geometry column.
+        chunk_size: Rows serialized per write in append mode.
+    """
+
+    target = ensure_path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    if mode == "append":
+        return _append_dataframe(df, target, key_columns, chunk_size)
+    if mode != "overwrite":
+        raise ValueError(f"unknown mode: {mode!r}")
+
+    if _write_atomic(df, target):
+        key_index_path(target).unlink(missing_ok=True)
+    return target
 
+
+def compact_csv(path: Path | str | PathLike[str], *, key_columns: Sequence[str] | None = None) -> Path:
+    """Drop duplicated rows (keeping the latest) and rebuild the key index of ``path``."""
+
+    target = ensure_path(path)
+    existing = pd.read_csv(target, dtype=str, keep_default_na=False)
+    columns = resolve_key_columns(list(existing.columns), key_columns)
+    keys = row_keys(existing, columns)
+    keep = ~pd.Series(keys).duplicated(keep="last").to_numpy()
+    if not keep.all():
+        logger.info("Compactando %s: %s linhas duplicadas removidas", target, int((~keep).sum()))
+        _write_atomic(existing[keep], target)
+    _write_key_index(target, keys[keep])
     return target
 
 
+class CSVStreamWriter:
+    """Write a CSV chunk by chunk, publishing it atomically on :meth:`close`.
+
+    Chunks go to a temporary sibling of ``path`` which replaces the target
+    only once every chunk was written (and only if the content changed), so
+    memory is bounded by the chunk size and readers never see a partial file.
+    """
+
+    def __init__(self, path: Path | str | PathLike[str]) -> None:
+        self.path = ensure_path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp_name = atomic_target(self.path)
+        self._fh = os.fdopen(fd, "w", encoding="utf-8", newline="")
+        self._header_written = False
+        self.rows = 0
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self._header_written and df.empty:
+            return
+        df.to_csv(self._fh, index=False, header=not self._header_written)
+        self._header_written = True
+        self.rows += len(df)
+
+    def close(self) -> bool:
+        """Publish the file; return ``True`` when the target was replaced."""
+
+        self._fh.close()
+        try:
+            replaced = _replace_if_changed(self._tmp_name, self.path)
+        except BaseException:
+            Path(self._tmp_name).unlink(missing_ok=True)
+            raise
+        if replaced:
+            key_index_path(self.path).unlink(missing_ok=True)
+        return replaced
+
+    def abort(self) -> None:
+        """Discard everything written so far, leaving the target untouched."""
+
+        self._fh.close()
+        Path(self._tmp_name).unlink(missing_ok=True)
+
+    def __enter__(self) -> "CSVStreamWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
 def _geo_interface(obj: Any) -> dict[str, Any]:
     data = getattr(obj, "__geo_interface__", None)
     if isinstance(data, dict):
@@ -96,14 +359,32 @@ def _as_feature_collection(obj: Any) -> dict[str, Any]:
 
 
 def save_geometry(geom: Any, path: Path | str | PathLike[str]) -> Path:
-    """Persist a geometry or GeoJSON-like object to disk as GeoJSON."""
+    """Persist a geometry or GeoJSON-like object to disk as GeoJSON.
 
-    target = _ensure_path(path)
+    The write is atomic and skipped when the file already holds the same content.
+    """
+
+    target = ensure_path(path)
     target.parent.mkdir(parents=True, exist_ok=True)
 
     feature_collection = _as_feature_collection(geom)
-    target.write_text(json.dumps(feature_collection, ensure_ascii=False, indent=2), encoding="utf-8")
+    payload = json.dumps(feature_collection, ensure_ascii=False, indent=2).encode("utf-8")
+    try:
+        if target.stat().st_size == len(payload) and target.read_bytes() == payload:
+            logger.info("Conteúdo de %s inalterado; gravação ignorada", target)
+            return target
+    except FileNotFoundError:
+        pass
+
+    fd, tmp_name = atomic_target(target)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(payload)
+        replace_file(tmp_name, target)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
     return target
 
 
-__all__ = ["save_dataframe", "save_geometry"]
+__all__ = ["CSVStreamWriter", "compact_csv", "key_index_path", "save_dataframe", "save_geometry"]
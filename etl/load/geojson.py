@@ -0,0 +1,154 @@
+"""Streaming GeoJSON writers for fire detection points.
+
+Features are serialized chunk by chunk straight from coordinate arrays, so
+memory stays bounded by ``chunk_size`` regardless of how many points are
+written. Two layouts are supported: a regular ``FeatureCollection`` and
+newline-delimited GeoJSON (one ``Feature`` per line).
+"""
+
+from __future__ import annotations
+
+import os
+from os import PathLike
+from pathlib import Path
+from typing import IO, Callable, Iterator, Literal, Sequence
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from ..utils import atomic_target, ensure_path, replace_file
+
+DEFAULT_PRECISION = 6
+CHUNK_SIZE = 50_000
+
+_LAT_COLUMNS = ("latitude", "lat")
+_LON_COLUMNS = ("longitude", "lon", "long")
+
+
+def _coordinates(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Return x/y arrays from the ``geometry`` column or from lat/lon columns."""
+
+    if "geometry" in df.columns:
+        geometries = np.asarray(df["geometry"].to_numpy(dtype=object), dtype=object)
+        geometries = np.where(pd.isna(geometries), None, geometries)
+        return shapely.get_x(geometries), shapely.get_y(geometries)
+
+    lower = {str(column).lower(): column for column in df.columns}
+    lat = next((lower[name] for name in _LAT_COLUMNS if name in lower), None)
+    lon = next((lower[name] for name in _LON_COLUMNS if name in lower), None)
+    if lat is None or lon is None:
+        raise ValueError("dataframe needs a 'geometry' column or latitude/longitude columns")
+    return (
+        pd.to_numeric(df[lon], errors="coerce").to_numpy(dtype=float),
+        pd.to_numeric(df[lat], errors="coerce").to_numpy(dtype=float),
+    )
+
+
+def _geometry_json(xs: np.ndarray, ys: np.ndarray, precision: int) -> list[str]:
+    # NaN and ±inf have no JSON form; those points get a null geometry.
+    finite = (np.isfinite(xs) & np.isfinite(ys)).tolist()
+    xs = np.round(xs, precision)
+    ys = np.round(ys, precision)
+    return [
+        f'{{"type":"Point","coordinates":[{x!r},{y!r}]}}' if ok else "null"
+        for x, y, ok in zip(xs.tolist(), ys.tolist(), finite)
+    ]
+
+
+def _property_json(frame: pd.DataFrame) -> list[str]:
+    if frame.columns.empty:
+        return ["{}"] * len(frame)
+    encoded = frame.to_json(orient="records", lines=True, date_format="iso", force_ascii=False)
+    return encoded.rstrip("\n").split("\n")
+
+
+def iter_features(
+    df: pd.DataFrame,
+    *,
+    precision: int = DEFAULT_PRECISION,
+    properties: Sequence[str] | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[str]:
+    """Yield every row of ``df`` as a compact GeoJSON ``Feature`` string.
+
+    Parameters
+    ----------
+    df:
+        Points as a ``geometry`` column of shapely points or as latitude and
+        longitude columns.
+    precision:
+        Number of decimal places kept in the coordinates.
+    properties:
+        Columns exported as feature properties; defaults to every column but
+        ``geometry``.
+    chunk_size:
+        Rows converted at once.
+    """
+
+    columns = list(properties) if properties is not None else [c for c in df.columns if c != "geometry"]
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start : start + chunk_size]
+        geometries = _geometry_json(*_coordinates(chunk), precision)
+        for geometry, props in zip(geometries, _property_json(chunk[columns])):
+            yield f'{{"type":"Feature","geometry":{geometry},"properties":{props}}}'
+
+
+def _write_stream(target: Path, write: Callable[[IO[str]], None]) -> Path:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = atomic_target(target)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as fh:
+            write(fh)
+        replace_file(tmp_name, target)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return target
+
+
+def save_points_geojson(
+    df: pd.DataFrame,
+    path: Path | str | PathLike[str],
+    *,
+    layout: Literal["collection", "lines"] = "collection",
+    precision: int = DEFAULT_PRECISION,
+    properties: Sequence[str] | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Path:
+    """Stream fire points to ``path`` as GeoJSON, atomically.
+
+    ``layout="collection"`` writes a single ``FeatureCollection``;
+    ``layout="lines"`` writes newline-delimited GeoJSON. See
+    :func:`iter_features` for the remaining parameters.
+    """
+
+    features = iter_features(df, precision=precision, properties=properties, chunk_size=chunk_size)
+
+    def _collection(fh: IO[str]) -> None:
+        fh.write('{"type":"FeatureCollection","features":[')
+        for index, feature in enumerate(features):
+            if index:
+                fh.write(",")
+            fh.write(feature)
+        fh.write("]}\n")
+
+    def _lines(fh: IO[str]) -> None:
+        for feature in features:
+            fh.write(feature)
+            fh.write("\n")
+
+    if layout == "collection":
+        return _write_stream(ensure_path(path), _collection)
+    if layout == "lines":
+        return _write_stream(ensure_path(path), _lines)
+    raise ValueError(f"unknown layout: {layout!r}")
+
+
+def save_points_ndjson(df: pd.DataFrame, path: Path | str | PathLike[str], **kwargs) -> Path:
+    """Shortcut for :func:`save_points_geojson` with ``layout="lines"``."""
+
+    return save_points_geojson(df, path, layout="lines", **kwargs)
+
+
+__all__ = ["iter_features", "save_points_geojson", "save_points_ndjson"]
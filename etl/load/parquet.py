@@ -0,0 +1,254 @@
+"""Columnar (Parquet/GeoParquet) loader partitioned by detection date and state.
+
+Each call appends one file per partition under a Hive-style layout::
+
+    <root>/date=2025-11-10/state=RIO%20DE%20JANEIRO/part-20251110T163200Z-1a2b3c4d.parquet
+
+Geometries are stored as WKB following the GeoParquet specification, so
+readers such as ``geopandas.read_parquet`` or ``pyarrow.dataset`` can prune
+both columns and partitions (``filters=[("date", ">=", "2025-11-01")]``).
+
+Like the CSV append mode, only detections whose key is not stored in the
+partition yet are written, so re-running over the same window does not
+duplicate rows. Keys are compared by value (:func:`etl.utils.detection_keys`),
+as the stored timestamps and coordinates are no longer text. Each partition
+keeps the keys of its parts in a ``.keys.npz`` sidecar (ignored by Parquet
+readers, like every dot-prefixed file), so an append only reads the parts
+the sidecar does not cover yet instead of every earlier part of the day.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from os import PathLike
+from pathlib import Path
+from typing import Sequence
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from ..utils import (
+    TIMESTAMP_COLUMNS,
+    atomic_target,
+    detection_keys,
+    ensure_path,
+    first_present,
+    replace_file,
+    resolve_key_columns,
+)
+
+logger = logging.getLogger(__name__)
+
+STATE_COLUMNS = ("Estado", "estado", "state")
+UNKNOWN_PARTITION = "unknown"
+KEY_INDEX_NAME = ".keys.npz"
+# TerraBrasilis columns holding measurements; other text columns (codes,
+# names) are stored as text even when they look numeric.
+NUMERIC_COLUMNS = (
+    "Latitude",
+    "Longitude",
+    "lat",
+    "lon",
+    "FRP",
+    "frp",
+    "Risco Fogo",
+    "Precipitação",
+    "N. Dias Sem Chuva",
+)
+
+
+def _require_pyarrow() -> None:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise ImportError("the Parquet loader requires the 'pyarrow' package") from exc
+
+
+def _with_column_dtypes(
+    df: pd.DataFrame,
+    timestamp_column: str | None,
+    numeric_columns: Sequence[str],
+) -> pd.DataFrame:
+    """Return ``df`` with parsed timestamps and the known numeric text columns converted."""
+
+    converted: dict[str, pd.Series] = {}
+    if timestamp_column is not None:
+        converted[timestamp_column] = pd.to_datetime(df[timestamp_column], utc=True, errors="coerce")
+    for column in numeric_columns:
+        if column not in df.columns or column == timestamp_column:
+            continue
+        series = df[column]
+        if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            numeric = pd.to_numeric(series, errors="coerce")
+            if numeric.notna().sum() == series.notna().sum() and series.notna().any():
+                converted[column] = numeric
+    return df.assign(**converted) if converted else df
+
+
+def _stored_keys(directory: Path, key_columns: Sequence[str]) -> tuple[np.ndarray, list[str], bool]:
+    """Return the keys stored in the partition ``directory``, its part files and whether the sidecar covers them.
+
+    Only the parts missing from the :data:`KEY_INDEX_NAME` sidecar are read.
+    A sidecar listing parts that no longer exist (or other key columns) is
+    ignored and rebuilt from the files.
+    """
+
+    import pyarrow.parquet as pq
+
+    parts = sorted(file.name for file in directory.glob("part-*.parquet"))
+    covered: set[str] = set()
+    keys = [np.empty(0, dtype=np.uint64)]
+    try:
+        with np.load(directory / KEY_INDEX_NAME) as index:
+            if index["columns"].tolist() == list(key_columns) and set(index["parts"].tolist()) <= set(parts):
+                covered = set(index["parts"].tolist())
+                keys.append(index["keys"].astype(np.uint64))
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        pass  # missing or unreadable sidecar: read every part
+
+    for name in parts:
+        if name in covered:
+            continue
+        file = directory / name
+        if not set(key_columns).issubset(pq.read_schema(file).names):
+            continue
+        stored = pq.ParquetFile(file).read(columns=list(key_columns)).to_pandas()
+        keys.append(detection_keys(stored, key_columns))
+    return np.concatenate(keys), parts, covered == set(parts)
+
+
+def _write_key_index(directory: Path, key_columns: Sequence[str], parts: Sequence[str], keys: np.ndarray) -> None:
+    target = directory / KEY_INDEX_NAME
+    fd, tmp_name = atomic_target(target)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            np.savez(
+                fh,
+                columns=np.array(list(key_columns), dtype=str),
+                parts=np.array(list(parts), dtype=str),
+                keys=np.ascontiguousarray(keys, dtype=np.uint64),
+            )
+        replace_file(tmp_name, target)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def _partition_values(series: pd.Series | None, length: int) -> pd.Series:
+    if series is None:
+        return pd.Series([UNKNOWN_PARTITION] * length)
+    return series.astype("string").fillna(UNKNOWN_PARTITION).reset_index(drop=True)
+
+
+def save_parquet(
+    df: pd.DataFrame,
+    path: Path | str | PathLike[str],
+    *,
+    partition_by: Sequence[str] = ("date", "state"),
+    timestamp_column: str | None = None,
+    state_column: str | None = None,
+    key_columns: Sequence[str] | None = None,
+    numeric_columns: Sequence[str] = NUMERIC_COLUMNS,
+    compression: str = "zstd",
+) -> Path:
+    """Append the new detections of ``df`` to a partitioned Parquet dataset rooted at ``path``.
+
+    Parameters
+    ----------
+    df:
+        Fire detections. A ``geometry`` column of shapely objects is written as
+        GeoParquet (WKB); other columns keep their dtypes, with the timestamp
+        parsed as UTC datetimes and ``numeric_columns`` given as text
+        converted to numbers.
+    path:
+        Dataset root directory.
+    partition_by:
+        Any of ``"date"`` (UTC detection date) and ``"state"``. Pass an empty
+        sequence to write a single file per call.
+    timestamp_column, state_column:
+        Source columns for the partitions; TerraBrasilis headers
+        (``Data / Hora`` and ``Estado``) are detected automatically.
+    key_columns:
+        Columns identifying a detection. Rows whose key is already stored in
+        their partition (or repeated in ``df``) are skipped. Defaults to
+        ``Data / Hora``, ``Satélite``, ``Latitude`` and ``Longitude`` (those
+        present), or every non-geometry column.
+    numeric_columns:
+        Text columns converted to numbers when every value parses. Other
+        columns are kept as given, so codes keep their leading zeros.
+    compression:
+        Parquet compression codec.
+    """
+
+    _require_pyarrow()
+
+    root = ensure_path(path)
+    root.mkdir(parents=True, exist_ok=True)
+
+    timestamp_column = timestamp_column or first_present(df, TIMESTAMP_COLUMNS)
+    state_column = state_column or first_present(df, STATE_COLUMNS)
+    frame = _with_column_dtypes(df, timestamp_column, numeric_columns).reset_index(drop=True)
+    columns = resolve_key_columns([str(column) for column in frame.columns], key_columns)
+    keys = detection_keys(frame, columns)
+    fresh = ~pd.Series(keys).duplicated().to_numpy()
+
+    if "geometry" in frame.columns:
+        import geopandas as gpd
+
+        frame = gpd.GeoDataFrame(frame, geometry="geometry", crs=getattr(df, "crs", None) or "EPSG:4326")
+
+    partitions: dict[str, pd.Series] = {}
+    for name in partition_by:
+        if name == "date":
+            dates = frame[timestamp_column].dt.strftime("%Y-%m-%d") if timestamp_column else None
+            partitions[name] = _partition_values(dates, len(frame))
+        elif name == "state":
+            partitions[name] = _partition_values(frame[state_column] if state_column else None, len(frame))
+        else:
+            raise ValueError(f"unsupported partition: {name!r}")
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    file_name = f"part-{stamp}-{uuid.uuid4().hex[:8]}.parquet"
+
+    if partitions:
+        groups = pd.DataFrame(partitions).groupby(list(partitions), sort=True, dropna=False).indices.items()
+    else:
+        groups = [((), np.arange(len(frame)))]
+
+    written = 0
+    for values, positions in groups:
+        values = values if isinstance(values, tuple) else (values,)
+        directory = root.joinpath(
+            *(f"{name}={quote(str(value), safe='')}" for name, value in zip(partitions, values))
+        )
+        rows = positions[fresh[positions]]
+        stored, parts, indexed = np.empty(0, dtype=np.uint64), [], True
+        if directory.is_dir():
+            stored, parts, indexed = _stored_keys(directory, columns)
+            rows = rows[~np.isin(keys[rows], stored)]
+        if not len(rows):
+            if not indexed:
+                _write_key_index(directory, columns, parts, stored)
+            continue
+        directory.mkdir(parents=True, exist_ok=True)
+        target = directory / file_name
+        # Dot-prefixed files are ignored by Parquet readers until the rename completes.
+        tmp = directory / f".{file_name}.tmp"
+        frame.iloc[rows].to_parquet(tmp, index=False, compression=compression)
+        os.replace(tmp, target)
+        _write_key_index(directory, columns, [*parts, file_name], np.concatenate([stored, keys[rows]]))
+        written += len(rows)
+
+    if written:
+        logger.info("%s focos novos acrescentados em %s", written, root)
+    else:
+        logger.info("Nenhum foco novo para acrescentar em %s", root)
+    return root
+
+
+__all__ = ["KEY_INDEX_NAME", "NUMERIC_COLUMNS", "save_parquet"]
@@ -0,0 +1,486 @@
+"""Hourly and daily fire counts maintained incrementally in SQLite.
+
+Dashboards ask for fire counts per hour or day, split by region, satellite
+and biome. Instead of re-aggregating the whole history, every run adds only
+the detections it has not counted yet: each row is identified by the same
+key columns as the CSV append mode (``Data / Hora``, ``Satélite``,
+``Latitude``, ``Longitude`` when present), hashed by value with
+:func:`etl.utils.detection_keys` so a history read back from CSV, Parquet or
+SQLite keys alike. Counted keys are remembered per region and the run's new
+rows are grouped and added to the counters with one ``ON CONFLICT DO
+UPDATE``::
+
+    store = RollupStore("data/rollups.sqlite")
+    store.update(df, region="EEEG")
+    daily = store.query("day", region="EEEG", start="2024-09-01", by=("satellite",))
+
+The counters are keyed by ``(granularity, region, bucket, satellite,
+biome)``, so a query reads one index range whose size depends on the period
+asked for, not on the length of the history. Buckets are the start of the
+hour or day (``YYYY-MM-DD HH:MM``) in America/Sao_Paulo for timezone-aware
+timestamps; naive ones are kept as-is.
+
+Counted keys are only kept for the last ``key_retention_days`` days of
+buckets (30 by default), counted back from the newest day seen, so the key
+table does not grow with the history. Rows older than that window can no
+longer be told apart from counted ones and are skipped by :meth:`RollupStore.update`;
+:meth:`RollupStore.rebuild` counts the whole history and prunes at the end.
+
+After editing or importing history, rebuild the tables from the full
+record::
+
+    python -m etl.load.rollups --rollups data/rollups.sqlite --source data/focos_processados.csv --region EEEG
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sqlite3
+from datetime import datetime
+from os import PathLike
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..utils import (
+    SATELLITE_COLUMNS,
+    TIMESTAMP_COLUMNS,
+    detection_keys,
+    ensure_path,
+    first_present,
+    resolve_key_columns,
+)
+
+logger = logging.getLogger(__name__)
+
+TABLE = "rollups"
+KEYS_TABLE = "rollup_keys"
+GRANULARITIES = {"hour": "datetime64[h]", "day": "datetime64[D]"}
+DIMENSIONS = ("region", "satellite", "biome")
+BIOME_COLUMNS = ("Bioma", "bioma", "biome")
+REGION_COLUMN = "region_id"
+LOCAL_TIMEZONE = "America/Sao_Paulo"
+KEY_RETENTION_DAYS = 30
+# Keys looked up per query, below SQLite's default limit of bound parameters.
+_LOOKUP_BATCH = 30_000
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {TABLE} (
+    granularity TEXT NOT NULL,
+    region TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    satellite TEXT NOT NULL,
+    biome TEXT NOT NULL,
+    fires INTEGER NOT NULL,
+    inside INTEGER NOT NULL,
+    PRIMARY KEY (granularity, region, bucket, satellite, biome)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS {TABLE}_bucket ON {TABLE} (granularity, bucket);
+CREATE TABLE IF NOT EXISTS {KEYS_TABLE} (key INTEGER PRIMARY KEY, day INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS {KEYS_TABLE}_day ON {KEYS_TABLE} (day);
+"""
+
+
+def _local_stamp(value: object) -> np.datetime64:
+    try:
+        stamp = pd.Timestamp(value)
+    except (TypeError, ValueError, OverflowError):
+        return np.datetime64("NaT", "s")
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_convert(LOCAL_TIMEZONE).tz_localize(None)
+    return np.datetime64(stamp, "s")
+
+
+def _local_times(values: pd.Series) -> np.ndarray:
+    """Parse ``values`` into naive ``datetime64[s]`` local times (``NaT`` when unreadable).
+
+    The column is parsed at once; values the bulk parse cannot read (e.g. a
+    mix of naive and offset timestamps) are parsed one by one.
+    """
+
+    missing = values.isna().to_numpy()
+    try:
+        parsed = pd.to_datetime(values, errors="coerce")
+        if getattr(parsed.dtype, "tz", None) is not None:
+            parsed = parsed.dt.tz_convert(LOCAL_TIMEZONE).dt.tz_localize(None)
+        times = parsed.to_numpy(dtype="datetime64[s]")
+    except (TypeError, ValueError):
+        times = np.full(len(values), np.datetime64("NaT", "s"))
+    retry = np.isnat(times) & ~missing
+    if retry.any():
+        positions = retry.nonzero()[0]
+        cache: dict[object, np.datetime64] = {}
+        for position, value in zip(positions, values.iloc[positions].tolist()):
+            if value not in cache:
+                cache[value] = _local_stamp(value)
+            times[position] = cache[value]
+    return times
+
+
+def _bucket_labels(times: np.ndarray, granularity: str) -> np.ndarray:
+    floored = times.astype(GRANULARITIES[granularity]).astype("datetime64[m]")
+    # "2024-09-01T15:00" -> "2024-09-01 15:00"
+    return np.char.replace(np.datetime_as_string(floored), "T", " ")
+
+
+def _bound(value: datetime | str | None) -> str | None:
+    if value is None:
+        return None
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_convert(LOCAL_TIMEZONE).tz_localize(None)
+    return stamp.strftime("%Y-%m-%d %H:%M")
+
+
+def _labels(df: pd.DataFrame, candidates: Sequence[str]) -> pd.Series:
+    column = first_present(df, candidates)
+    if column is None:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[column].astype("string").fillna("").str.strip().astype(object)
+
+
+def _flags(series: pd.Series) -> np.ndarray:
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return series.fillna(False).to_numpy(dtype=bool)
+    # CSV round-trips may leave "True"/"False" text behind.
+    return series.astype("string").str.lower().isin(["true", "1", "1.0"]).fillna(False).to_numpy(dtype=bool)
+
+
+class RollupStore:
+    """SQLite database of hourly and daily fire counters.
+
+    Parameters
+    ----------
+    path:
+        Database file; created on first use.
+    key_columns:
+        Columns identifying a detection; defaults to the CSV append keys.
+    granularities:
+        Bucket sizes maintained, among ``"hour"`` and ``"day"``.
+    key_retention_days:
+        Days of buckets, back from the newest one, whose counted keys are
+        kept; older rows are not counted again. ``None`` keeps every key.
+    """
+
+    def __init__(
+        self,
+        path: Path | str | PathLike[str],
+        *,
+        key_columns: Sequence[str] | None = None,
+        granularities: Sequence[str] = tuple(GRANULARITIES),
+        key_retention_days: int | None = KEY_RETENTION_DAYS,
+    ) -> None:
+        unknown = [name for name in granularities if name not in GRANULARITIES]
+        if unknown:
+            raise ValueError(f"unknown granularities: {unknown}")
+        if key_retention_days is not None and key_retention_days < 1:
+            raise ValueError("key_retention_days must be at least 1")
+        self.path = ensure_path(path)
+        self.key_columns = key_columns
+        self.granularities = tuple(granularities)
+        self.key_retention_days = key_retention_days
+
+    def connect(self) -> sqlite3.Connection:
+        """Open the database, creating the schema when needed."""
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(_SCHEMA)
+        return connection
+
+    def update(self, df: pd.DataFrame, *, region: str | None = None, inside_column: str = "inside") -> int:
+        """Add the rows of ``df`` not counted yet; return how many were added.
+
+        Rows take their region from a ``region_id`` column when present,
+        otherwise from ``region``. Rows without a readable timestamp, or
+        older than the key retention window, are skipped.
+        """
+
+        connection = self.connect()
+        try:
+            with connection:
+                added = self._update(connection, df, region or "", inside_column, windowed=True)
+                self._prune(connection)
+        finally:
+            connection.close()
+        logger.info("Agregados %s: %s focos novos contabilizados", self.path, added)
+        return added
+
+    def rebuild(
+        self,
+        frames: Iterable[pd.DataFrame],
+        *,
+        region: str | None = None,
+        inside_column: str = "inside",
+    ) -> int:
+        """Replace every counter with the aggregation of ``frames`` (e.g. a backfill)."""
+
+        connection = self.connect()
+        try:
+            with connection:
+                connection.execute(f"DELETE FROM {TABLE}")
+                connection.execute(f"DELETE FROM {KEYS_TABLE}")
+                # History chunks come in any order: skip nothing, then drop the old keys once.
+                added = sum(self._update(connection, frame, region or "", inside_column) for frame in frames)
+                self._prune(connection)
+            connection.execute("VACUUM")
+        finally:
+            connection.close()
+        logger.info("Agregados %s reconstruídos com %s focos", self.path, added)
+        return added
+
+    def _update(
+        self,
+        connection: sqlite3.Connection,
+        df: pd.DataFrame,
+        region: str,
+        inside_column: str,
+        *,
+        windowed: bool = False,
+    ) -> int:
+        ts_column = first_present(df, TIMESTAMP_COLUMNS)
+        if df.empty or ts_column is None:
+            if not df.empty:
+                logger.warning("Nenhuma coluna de data encontrada; agregados não atualizados")
+            return 0
+
+        times = _local_times(df[ts_column])
+        timed = ~np.isnat(times)
+        if not timed.all():
+            logger.warning("%s focos sem data válida ignorados nos agregados", int((~timed).sum()))
+            df, times = df[timed], times[timed]
+            if df.empty:
+                return 0
+
+        days = times.astype("datetime64[D]").astype(np.int64)
+        horizon = self._horizon(connection, int(days.max())) if windowed else None
+        if horizon is not None and (days < horizon).any():
+            recent = days >= horizon
+            logger.warning(
+                "%s focos anteriores à janela de %s dias das chaves ignorados nos agregados",
+                int((~recent).sum()),
+                self.key_retention_days,
+            )
+            df, times, days = df[recent], times[recent], days[recent]
+            if df.empty:
+                return 0
+
+        regions = np.full(len(df), region, dtype=object)
+        if REGION_COLUMN in df.columns:
+            own = df[REGION_COLUMN].astype("string").to_numpy(dtype=object, na_value=None)
+            regions = np.where(pd.isna(own), regions, own)
+        columns = [str(column) for column in df.columns if column not in ("geometry", REGION_COLUMN)]
+        key_columns = resolve_key_columns(columns, self.key_columns)
+        # One integer key per (region, detection): rowid lookups are the cheapest SQLite offers.
+        keyed = df[key_columns].assign(**{REGION_COLUMN: regions})
+        keys = detection_keys(keyed, [*key_columns, REGION_COLUMN]).view(np.int64)
+
+        fresh = self._fresh(connection, keys)
+        if not fresh.any():
+            return 0
+        df, times, regions = df[fresh], times[fresh], regions[fresh]
+        order = np.argsort(keys[fresh])
+        connection.executemany(
+            f"INSERT INTO {KEYS_TABLE} VALUES (?, ?)",
+            zip(keys[fresh][order].tolist(), days[fresh][order].tolist()),
+        )
+
+        inside = _flags(df[inside_column]) if inside_column in df.columns else np.zeros(len(df), dtype=bool)
+        rows = pd.DataFrame(
+            {
+                "region": regions,
+                "satellite": _labels(df, SATELLITE_COLUMNS).to_numpy(),
+                "biome": _labels(df, BIOME_COLUMNS).to_numpy(),
+                "inside": inside.astype(np.int64),
+            }
+        )
+        for granularity in self.granularities:
+            grouped = (
+                rows.assign(bucket=_bucket_labels(times, granularity))
+                .groupby(["region", "bucket", "satellite", "biome"])["inside"]
+                .agg(["size", "sum"])
+                .reset_index()
+            )
+            connection.executemany(
+                f"INSERT INTO {TABLE} VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (granularity, region, bucket, satellite, biome) "
+                "DO UPDATE SET fires = fires + excluded.fires, inside = inside + excluded.inside",
+                zip(
+                    [granularity] * len(grouped),
+                    grouped["region"].tolist(),
+                    grouped["bucket"].tolist(),
+                    grouped["satellite"].tolist(),
+                    grouped["biome"].tolist(),
+                    grouped["size"].tolist(),
+                    grouped["sum"].tolist(),
+                ),
+            )
+        return len(df)
+
+    def _horizon(self, connection: sqlite3.Connection, newest: int | None = None) -> int | None:
+        """Return the first day (days since the epoch) whose keys are kept, if any are dropped."""
+
+        if self.key_retention_days is None:
+            return None
+        stored = connection.execute(f"SELECT MAX(day) FROM {KEYS_TABLE}").fetchone()[0]
+        candidates = [day for day in (stored, newest) if day is not None]
+        if not candidates:
+            return None
+        return max(candidates) - self.key_retention_days + 1
+
+    def _prune(self, connection: sqlite3.Connection) -> None:
+        horizon = self._horizon(connection)
+        if horizon is not None:
+            connection.execute(f"DELETE FROM {KEYS_TABLE} WHERE day < ?", (horizon,))
+
+    @staticmethod
+    def _fresh(connection: sqlite3.Connection, keys: np.ndarray) -> np.ndarray:
+        """Flag the first occurrence of every key not counted yet."""
+
+        unique, first = np.unique(keys, return_index=True)
+        counted: list[int] = []
+        for start in range(0, len(unique), _LOOKUP_BATCH):
+            batch = unique[start : start + _LOOKUP_BATCH].tolist()
+            counted.extend(
+                row[0]
+                for row in connection.execute(
+                    f"SELECT key FROM {KEYS_TABLE} WHERE key IN ({', '.join('?' * len(batch))})", batch
+                )
+            )
+        fresh = np.zeros(len(keys), dtype=bool)
+        fresh[first[~np.isin(unique, np.asarray(counted, dtype=np.int64))]] = True
+        return fresh
+
+    def query(
+        self,
+        granularity: str = "day",
+        *,
+        region: str | None = None,
+        start: datetime | str | None = None,
+        end: datetime | str | None = None,
+        by: Sequence[str] = DIMENSIONS,
+    ) -> pd.DataFrame:
+        """Return fire counts per bucket.
+
+        Parameters
+        ----------
+        granularity:
+            ``"hour"`` or ``"day"``.
+        region:
+            Only this region; ``None`` covers every region.
+        start, end:
+            Buckets starting in ``[start, end)``; naive values are local
+            times, aware ones are converted to America/Sao_Paulo.
+        by:
+            Dimensions kept in the result, among ``region``, ``satellite``
+            and ``biome``; the others are summed over.
+        """
+
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"unknown granularity: {granularity!r}")
+        unknown = [name for name in by if name not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"unknown dimensions: {unknown}")
+
+        clauses, params = ["granularity = ?"], [granularity]
+        for clause, value in (("region = ?", region), ("bucket >= ?", _bound(start)), ("bucket < ?", _bound(end))):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        group = ", ".join(["bucket", *by])
+        sql = (
+            f"SELECT {group}, SUM(fires), SUM(inside) FROM {TABLE} "
+            f"WHERE {' AND '.join(clauses)} GROUP BY {group} ORDER BY {group}"
+        )
+        connection = self.connect()
+        try:
+            rows = connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+        return pd.DataFrame(rows, columns=["bucket", *by, "fires", "inside"])
+
+
+def read_history(path: Path | str | PathLike[str], *, chunk_size: int = 100_000) -> Iterator[pd.DataFrame]:
+    """Yield the fires stored at ``path`` (CSV in chunks, Parquet or a :class:`FireArchive`)."""
+
+    source = ensure_path(path)
+    suffix = source.suffix.lower()
+    if suffix in (".sqlite", ".db"):
+        from .sqlite import FireArchive
+
+        yield FireArchive(source).query()
+    elif suffix == ".parquet" or source.is_dir():
+        yield pd.read_parquet(source)
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_size)
+
+
+def update_rollups(
+    df: pd.DataFrame,
+    path: Path | str | PathLike[str],
+    *,
+    region: str | None = None,
+    inside_column: str = "inside",
+) -> Path:
+    """Add the new rows of ``df`` to the :class:`RollupStore` at ``path``."""
+
+    store = RollupStore(path)
+    store.update(df, region=region, inside_column=inside_column)
+    return store.path
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the CLI argument parser used by :func:`main`."""
+
+    parser = argparse.ArgumentParser(
+        description="Reconstrói os agregados por hora e dia a partir do histórico completo de focos."
+    )
+    parser.add_argument("--rollups", type=Path, required=True, help="Banco SQLite dos agregados.")
+    parser.add_argument(
+        "--source",
+        type=Path,
+        required=True,
+        help="Histórico de focos: CSV, Parquet (arquivo ou diretório) ou arquivo SQLite do --fires-format sqlite.",
+    )
+    parser.add_argument(
+        "--region",
+        default=None,
+        help="regionId dos focos sem coluna region_id (use o mesmo --reserve-name do pipeline).",
+    )
+    parser.add_argument("--inside-column", default="inside", help="Coluna de interseção (padrão: inside).")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=100_000,
+        help="Linhas lidas por vez de um histórico CSV (padrão: 100000).",
+    )
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Entry-point used by the command line interface."""
+
+    from ..config import configure_logging
+
+    configure_logging()
+
+    args = build_parser().parse_args(argv)
+    store = RollupStore(args.rollups)
+    store.rebuild(
+        read_history(args.source, chunk_size=args.chunk_size),
+        region=args.region,
+        inside_column=args.inside_column,
+    )
+    return 0
+
+
+__all__ = ["GRANULARITIES", "KEY_RETENTION_DAYS", "RollupStore", "read_history", "update_rollups"]
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,420 @@
+"""Persistent SQLite archive of every detection, with spatial and time indexes.
+
+Each run upserts its fires into one table keyed by ``(region, detection
+key)``, where the key hashes the same columns used by the CSV append mode
+(``Data / Hora``, ``Satélite``, ``Latitude``, ``Longitude`` when present)
+by value (:func:`etl.utils.detection_keys`), so repeated detections are
+dropped whatever their dtype. Points are indexed by an R*Tree and the
+detection time by a B-tree, which lets :meth:`FireArchive.query` answer
+"fires within 5 km of the reserve over the last 30 days" without reading
+the whole history::
+
+    archive = FireArchive("data/focos.sqlite", retention_days=365)
+    recent = archive.query(geometry=reserve, within_km=5, start=now - timedelta(days=30))
+
+Source columns are stored as they arrive; bookkeeping columns start with an
+underscore.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import sqlite3
+from datetime import datetime, timezone
+from os import PathLike
+from pathlib import Path
+from typing import Any, Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+from ..utils import TIMESTAMP_COLUMNS, detection_keys, ensure_path, first_present, resolve_key_columns
+
+logger = logging.getLogger(__name__)
+
+TABLE = "fires"
+RTREE = "fires_rtree"
+REGION_COLUMN = "region_id"
+# Vacuum once this share of the file is free pages (e.g. after retention).
+VACUUM_FREE_RATIO = 0.25
+_KM_PER_DEGREE_LAT = 110.574
+_KM_PER_DEGREE_LON = 111.320
+_EPOCH = pd.Timestamp(0, tz="UTC")
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {TABLE} (
+    fid INTEGER PRIMARY KEY,
+    _region TEXT NOT NULL DEFAULT '',
+    _key INTEGER NOT NULL,
+    _detected_at REAL,
+    _lon REAL,
+    _lat REAL,
+    UNIQUE (_region, _key)
+);
+CREATE INDEX IF NOT EXISTS {TABLE}_detected_at ON {TABLE} (_detected_at);
+CREATE INDEX IF NOT EXISTS {TABLE}_region_detected_at ON {TABLE} (_region, _detected_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE} USING rtree(id, min_x, max_x, min_y, max_y);
+"""
+_RESERVED = ("fid", "_region", "_key", "_detected_at", "_lon", "_lat")
+
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _epoch(value: datetime | str | float | None) -> float | None:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is None:
+        stamp = stamp.tz_localize(timezone.utc)
+    return stamp.timestamp()
+
+
+def _coordinates(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Return lon/lat arrays from the ``geometry`` column or lat/lon columns."""
+
+    if "geometry" in df.columns:
+        values = np.asarray(df["geometry"].to_numpy(dtype=object), dtype=object)
+        values = np.where(pd.isna(values), None, values)
+        return shapely.get_x(values), shapely.get_y(values)
+
+    lower = {str(name).lower(): name for name in df.columns}
+    lat_col = next((lower[key] for key in ("lat", "latitude") if key in lower), None)
+    lon_col = next((lower[key] for key in ("lon", "longitude", "long") if key in lower), None)
+    if lat_col is None or lon_col is None:
+        nan = np.full(len(df), np.nan)
+        return nan, nan.copy()
+    return (
+        pd.to_numeric(df[lon_col], errors="coerce").to_numpy(dtype=float),
+        pd.to_numeric(df[lat_col], errors="coerce").to_numpy(dtype=float),
+    )
+
+
+def _column_values(series: pd.Series) -> list[Any]:
+    """Return ``series`` as Python scalars SQLite can bind (missing values as ``None``)."""
+
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        text = series.dt.strftime("%Y-%m-%dT%H:%M:%S%z")
+        return text.astype(object).where(series.notna(), None).tolist()
+    values = series.astype(object).where(series.notna(), None).tolist()
+    return [value.item() if isinstance(value, np.generic) else value for value in values]
+
+
+def _nullable(values: np.ndarray) -> list[float | None]:
+    return [None if math.isnan(value) else value for value in values.tolist()]
+
+
+class FireArchive:
+    """SQLite database holding the detection history.
+
+    Parameters
+    ----------
+    path:
+        Database file; created on first use.
+    retention_days:
+        Detections older than this are deleted after each upsert (``None``
+        keeps everything). Detections without a timestamp are kept.
+    key_columns:
+        Columns identifying a detection; defaults to the CSV append keys.
+    """
+
+    def __init__(
+        self,
+        path: Path | str | PathLike[str],
+        *,
+        retention_days: float | None = None,
+        key_columns: Sequence[str] | None = None,
+    ) -> None:
+        self.path = ensure_path(path)
+        self.retention_days = retention_days
+        self.key_columns = key_columns
+
+    def connect(self) -> sqlite3.Connection:
+        """Open the database, creating the schema when needed."""
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(_SCHEMA)
+        return connection
+
+    @staticmethod
+    def _columns(connection: sqlite3.Connection) -> list[str]:
+        return [row[1] for row in connection.execute(f"PRAGMA table_info({TABLE})")]
+
+    def upsert(self, df: pd.DataFrame, *, region: str | None = None, now: datetime | None = None) -> int:
+        """Insert the detections of ``df`` not archived yet; return how many were added."""
+
+        data_columns = [str(column) for column in df.columns if column != "geometry"]
+        clashes = [column for column in data_columns if column in _RESERVED]
+        if clashes:
+            raise ValueError(f"columns reserved by the archive: {clashes}")
+
+        connection = self.connect()
+        try:
+            with connection:
+                cutoff = self._cutoff(now)
+                inserted = 0 if df.empty else self._insert(connection, df, data_columns, region or "", cutoff)
+                removed = self._apply_retention(connection, cutoff)
+            if removed:
+                self._vacuum_if_sparse(connection)
+        finally:
+            connection.close()
+
+        logger.info("Arquivo %s: %s focos novos, %s removidos pela retenção", self.path, inserted, removed)
+        return inserted
+
+    def _insert(
+        self,
+        connection: sqlite3.Connection,
+        df: pd.DataFrame,
+        data_columns: list[str],
+        region: str,
+        cutoff: float | None,
+    ) -> int:
+        existing = set(self._columns(connection))
+        for column in data_columns:
+            if column not in existing:
+                connection.execute(f"ALTER TABLE {TABLE} ADD COLUMN {_quote(column)}")
+
+        keys = detection_keys(df, resolve_key_columns(data_columns, self.key_columns)).view(np.int64)
+        ts_column = first_present(df, TIMESTAMP_COLUMNS)
+        if ts_column is not None:
+            stamps = pd.to_datetime(df[ts_column], utc=True, errors="coerce")
+            detected = ((stamps - _EPOCH) / pd.Timedelta(seconds=1)).to_numpy(dtype=float, na_value=np.nan)
+        else:
+            detected = np.full(len(df), np.nan)
+
+        # Re-runs mostly resend archived rows; drop them before binding values.
+        fresh = ~self._archived(connection, region, keys, detected)
+        if cutoff is not None:
+            fresh &= ~(detected < cutoff)
+        if not fresh.any():
+            return 0
+        if not fresh.all():
+            df, keys, detected = df[fresh], keys[fresh], detected[fresh]
+        lon, lat = _coordinates(df)
+
+        names = ["_region", "_key", "_detected_at", "_lon", "_lat", *data_columns]
+        columns = [
+            [region] * len(df),
+            keys.tolist(),
+            _nullable(detected),
+            _nullable(np.asarray(lon, dtype=float)),
+            _nullable(np.asarray(lat, dtype=float)),
+            *(_column_values(df[column]) for column in df.columns if column != "geometry"),
+        ]
+
+        (last_fid,) = connection.execute(f"SELECT COALESCE(MAX(fid), 0) FROM {TABLE}").fetchone()
+        before = connection.total_changes
+        connection.executemany(
+            f"INSERT INTO {TABLE} ({', '.join(map(_quote, names))}) "
+            f"VALUES ({', '.join('?' * len(names))}) ON CONFLICT (_region, _key) DO NOTHING",
+            zip(*columns),
+        )
+        inserted = connection.total_changes - before
+        connection.execute(
+            f"INSERT INTO {RTREE} SELECT fid, _lon, _lon, _lat, _lat FROM {TABLE} "
+            "WHERE fid > ? AND _lon IS NOT NULL AND _lat IS NOT NULL",
+            (last_fid,),
+        )
+        return inserted
+
+    @staticmethod
+    def _archived(connection: sqlite3.Connection, region: str, keys: np.ndarray, detected: np.ndarray) -> np.ndarray:
+        """Flag ``keys`` already stored, looking only at the batch's time range."""
+
+        timed = ~np.isnan(detected)
+        if not timed.any():
+            return np.zeros(len(keys), dtype=bool)
+        rows = connection.execute(
+            f"SELECT _key FROM {TABLE} WHERE _region = ? AND _detected_at BETWEEN ? AND ?",
+            (region, float(detected[timed].min()), float(detected[timed].max())),
+        ).fetchall()
+        stored = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        return np.isin(keys, stored)
+
+    def _cutoff(self, now: datetime | None) -> float | None:
+        if self.retention_days is None:
+            return None
+        return _epoch(now or datetime.now(timezone.utc)) - self.retention_days * 86_400.0
+
+    @staticmethod
+    def _apply_retention(connection: sqlite3.Connection, cutoff: float | None) -> int:
+        if cutoff is None:
+            return 0
+        connection.execute(
+            f"DELETE FROM {RTREE} WHERE id IN (SELECT fid FROM {TABLE} WHERE _detected_at < ?)", (cutoff,)
+        )
+        return connection.execute(f"DELETE FROM {TABLE} WHERE _detected_at < ?", (cutoff,)).rowcount
+
+    @staticmethod
+    def _vacuum_if_sparse(connection: sqlite3.Connection) -> None:
+        (free,) = connection.execute("PRAGMA freelist_count").fetchone()
+        (pages,) = connection.execute("PRAGMA page_count").fetchone()
+        if pages and free / pages >= VACUUM_FREE_RATIO:
+            connection.execute("VACUUM")
+
+    def compact(self, now: datetime | None = None) -> None:
+        """Apply the retention, reclaim free pages and refresh the planner statistics."""
+
+        connection = self.connect()
+        try:
+            with connection:
+                self._apply_retention(connection, self._cutoff(now))
+            connection.execute("VACUUM")
+            connection.execute("PRAGMA optimize")
+        finally:
+            connection.close()
+
+    def query(
+        self,
+        *,
+        bbox: tuple[float, float, float, float] | None = None,
+        start: datetime | str | None = None,
+        end: datetime | str | None = None,
+        region: str | None = None,
+        geometry: BaseGeometry | None = None,
+        within_km: float | None = None,
+    ) -> pd.DataFrame:
+        """Return archived detections matching every given filter.
+
+        Parameters
+        ----------
+        bbox:
+            ``(min_lon, min_lat, max_lon, max_lat)`` answered by the R*Tree.
+        start, end:
+            Detection time window (``start`` inclusive, ``end`` exclusive);
+            naive values are taken as UTC.
+        region:
+            Region id given to :meth:`upsert`.
+        geometry, within_km:
+            Keep points inside ``geometry`` or, with ``within_km``, at most
+            that many kilometers from it (measured in its UTM zone).
+
+        The frame has the stored source columns, ``region_id`` and a
+        ``geometry`` column of points, ordered by detection time.
+        """
+
+        if within_km is not None and geometry is None:
+            raise ValueError("within_km requires a geometry")
+        if geometry is not None:
+            bbox = _expand_bounds(geometry.bounds, within_km or 0.0)
+
+        clauses: list[str] = []
+        params: list[Any] = []
+        join = ""
+        if bbox is not None:
+            min_x, min_y, max_x, max_y = bbox
+            join = f" JOIN {RTREE} r ON r.id = f.fid"
+            clauses.append("r.min_x <= ? AND r.max_x >= ? AND r.min_y <= ? AND r.max_y >= ?")
+            params.extend([max_x, min_x, max_y, min_y])
+        if start is not None:
+            clauses.append("f._detected_at >= ?")
+            params.append(_epoch(start))
+        if end is not None:
+            clauses.append("f._detected_at < ?")
+            params.append(_epoch(end))
+        if region is not None:
+            clauses.append("f._region = ?")
+            params.append(region)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        if not self.path.exists():
+            return pd.DataFrame(columns=[REGION_COLUMN, "geometry"])
+        connection = self.connect()
+        try:
+            cursor = connection.execute(
+                f"SELECT f.* FROM {TABLE} f{join}{where} ORDER BY f._detected_at, f.fid", params
+            )
+            names = [description[0] for description in cursor.description]
+            frame = pd.DataFrame.from_records(cursor.fetchall(), columns=names)
+        finally:
+            connection.close()
+
+        lon = frame["_lon"].to_numpy(dtype=float)
+        lat = frame["_lat"].to_numpy(dtype=float)
+        if geometry is not None and len(frame):
+            frame, lon, lat = _filter_near(frame, lon, lat, geometry, within_km)
+
+        points = shapely.points(lon, lat)
+        result = frame.drop(columns=list(_RESERVED))
+        result[REGION_COLUMN] = frame["_region"].replace("", None).to_numpy()
+        result["geometry"] = np.where(np.isnan(lon) | np.isnan(lat), None, points)
+        return result.reset_index(drop=True)
+
+    def __len__(self) -> int:
+        if not self.path.exists():
+            return 0
+        connection = self.connect()
+        try:
+            return connection.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+        finally:
+            connection.close()
+
+    def regions(self) -> Iterator[str]:
+        """Yield the region ids present in the archive."""
+
+        if not self.path.exists():
+            return iter(())
+        connection = self.connect()
+        try:
+            rows = connection.execute(f"SELECT DISTINCT _region FROM {TABLE} ORDER BY _region").fetchall()
+        finally:
+            connection.close()
+        return iter([row[0] for row in rows])
+
+
+def _expand_bounds(bounds: tuple[float, float, float, float], km: float) -> tuple[float, float, float, float]:
+    """Grow lon/lat ``bounds`` by at least ``km`` kilometers on every side."""
+
+    min_x, min_y, max_x, max_y = bounds
+    if km <= 0:
+        return bounds
+    d_lat = km / _KM_PER_DEGREE_LAT
+    widest = min(max(abs(min_y), abs(max_y)) + d_lat, 89.0)
+    d_lon = km / (_KM_PER_DEGREE_LON * math.cos(math.radians(widest)))
+    return min_x - d_lon, min_y - d_lat, max_x + d_lon, max_y + d_lat
+
+
+def _filter_near(
+    frame: pd.DataFrame,
+    lon: np.ndarray,
+    lat: np.ndarray,
+    geometry: BaseGeometry,
+    within_km: float | None,
+) -> tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    if within_km:
+        from ..transform.zones import zones_for
+
+        zone, _ = zones_for(geometry, (within_km,)).classify(lon, lat)
+        keep = zone != None  # noqa: E711 - element-wise comparison
+    else:
+        shapely.prepare(geometry)
+        keep = shapely.intersects_xy(geometry, lon, lat)
+    return frame[keep], lon[keep], lat[keep]
+
+
+def save_sqlite(
+    df: pd.DataFrame,
+    path: Path | str | PathLike[str],
+    *,
+    region: str | None = None,
+    retention_days: float | None = None,
+    key_columns: Sequence[str] | None = None,
+) -> Path:
+    """Upsert ``df`` into the :class:`FireArchive` at ``path`` (a ``dataframe_loader``)."""
+
+    archive = FireArchive(path, retention_days=retention_days, key_columns=key_columns)
+    archive.upsert(df, region=region)
+    return archive.path
+
+
+__all__ = ["FireArchive", "save_sqlite"]
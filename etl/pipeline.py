@@ -3,41 +3,66 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import logging
+import sys
 from dataclasses import dataclass, field
 from os import PathLike
 from pathlib import Path
-from typing import Any, Callable, Mapping, Sequence
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Mapping, Protocol, Sequence
 
-import json
-import urllib.parse
-import urllib.request
+if TYPE_CHECKING:
+    import pandas as pd
+    from shapely.geometry.base import BaseGeometry
 
-import numpy as np
-import pandas as pd
-from shapely.geometry import Point, shape
-from shapely.geometry.base import BaseGeometry
-from unidecode import unidecode
+    from .subscriptions import SubscriptionRegistry
+    from .transform.diff import FrameDiff
 
-from .load.csv import save_dataframe as default_save_dataframe
-from .load.csv import save_geometry as default_save_geometry
+from .alerts import first_per_cluster, notification_params
+from .utils import RunLock, ensure_path, latest_by_satellite, output_signature, output_status, pick_timestamp_column
 
 logger = logging.getLogger(__name__)
 
-FireFetcher = Callable[..., pd.DataFrame]
-GeometryFetcher = Callable[..., BaseGeometry]
-Transformer = Callable[..., pd.DataFrame]
-DataFrameLoader = Callable[[pd.DataFrame, Path | str | PathLike[str]], Any]
-GeometryLoader = Callable[[BaseGeometry, Path | str | PathLike[str]], Any]
-Notifier = Callable[[pd.DataFrame, str, str, str | None], None]
+# Heavy dependencies (pandas, numpy, shapely, selenium, osmnx) are imported
+# inside the functions that need them, so ``--help`` and offline runs only
+# pay for what they use.
+FireFetcher = Callable[..., "pd.DataFrame"]
+GeometryFetcher = Callable[..., "BaseGeometry"]
+Transformer = Callable[..., "pd.DataFrame"]
+DataFrameLoader = Callable[["pd.DataFrame", Path | str | PathLike[str]], Any]
+GeometryLoader = Callable[["BaseGeometry", Path | str | PathLike[str]], Any]
+Notifier = Callable[["pd.DataFrame", str, str, str | None], None]
 
+DEFAULT_LOCK_FILE = Path("cache/pipeline.lock")
 
-def _ensure_path(path: Path | str | PathLike[str]) -> Path:
-    if isinstance(path, Path):
-        return path
-    if isinstance(path, (str, PathLike)):
-        return Path(path)
-    raise TypeError("path must be a string, Path or os.PathLike instance")
+
+def default_save_dataframe(df: pd.DataFrame, path: Path | str | PathLike[str], **kwargs: Any) -> Any:
+    """Default :attr:`PipelineConfig.dataframe_loader` (:func:`etl.load.csv.save_dataframe`)."""
+
+    from .load.csv import save_dataframe
+
+    return save_dataframe(df, path, **kwargs)
+
+
+def default_save_geometry(geometry: BaseGeometry, path: Path | str | PathLike[str]) -> Any:
+    """Default :attr:`PipelineConfig.geometry_loader` (:func:`etl.load.csv.save_geometry`)."""
+
+    from .load.csv import save_geometry
+
+    return save_geometry(geometry, path)
+
+
+class StreamWriter(Protocol):
+    """Incremental output used by the streaming mode of :func:`run_pipeline`."""
+
+    def write(self, df: pd.DataFrame) -> Any: ...
+
+    def close(self) -> Any: ...
+
+    def abort(self) -> Any: ...
+
+
+StreamWriterFactory = Callable[[Path], StreamWriter]
 
 
 @dataclass(slots=True)
@@ -60,11 +85,31 @@ class PipelineConfig:
     notify_column: str = "inside"
     notifier: Notifier | None = None
     region_id: str | None = None
+    chunk_size: int | None = None
+    stream_writer: StreamWriterFactory | None = None
+    zero_copy: bool = False
+    fetch_budget: float | None = None
+    geometry_budget: float | None = None
+    snapshot_dir: Path | str | PathLike[str] | None = None
+    delta_output: Path | str | PathLike[str] | None = None
+    delta_only: bool = False
+    subscriptions: SubscriptionRegistry | None = None
+    rollups_output: Path | str | PathLike[str] | None = None
 
     def __post_init__(self) -> None:
-        self.dataframe_output = _ensure_path(self.dataframe_output)
+        self.dataframe_output = ensure_path(self.dataframe_output)
         if self.geometry_output is not None:
-            self.geometry_output = _ensure_path(self.geometry_output)
+            self.geometry_output = ensure_path(self.geometry_output)
+        if self.snapshot_dir is not None:
+            self.snapshot_dir = ensure_path(self.snapshot_dir)
+        if self.delta_output is not None:
+            self.delta_output = ensure_path(self.delta_output)
+            if self.chunk_size is not None:
+                raise ValueError("delta_output is not supported in streaming mode")
+        elif self.delta_only:
+            raise ValueError("delta_only requires delta_output")
+        if self.rollups_output is not None:
+            self.rollups_output = ensure_path(self.rollups_output)
 
         if self.fetch_fire_data is None:
             from .extract.terrabrasilis import fetch_fire_data, TerraBrasilisConfig, TerraBrasilisFilters
@@ -86,8 +131,11 @@ class PipelineConfig:
 
             self.transformer = mark_points_inside
 
+        if self.zero_copy and getattr(self.transformer, "__name__", None) == "mark_points_inside":
+            self.transformer_kwargs.setdefault("copy", False)
+
         if self.notifier is None:
-            self.notifier = _notify_intersections
+            self.notifier = notify_intersections
         if self.region_id is None:
             reserve_name = self.reserve_kwargs.get("name")
             self.region_id = str(reserve_name) if reserve_name is not None else None
@@ -100,6 +148,13 @@ class PipelineResult:
     fires: pd.DataFrame
     geometry: BaseGeometry
     result: pd.DataFrame
+    outputs: dict[str, str] = field(default_factory=dict)
+    rows: int | None = None
+    stale: tuple[str, ...] = ()
+    delta: FrameDiff | None = None
+    # Newest detection (UTC) per satellite, also filled in streaming mode
+    # where ``fires`` only keeps the schema (see etl.polling).
+    latest_detections: dict[str, pd.Timestamp] = field(default_factory=dict)
 
 
 def _coerce_config(config: PipelineConfig | Mapping[str, Any]) -> PipelineConfig:
@@ -110,31 +165,32 @@ def _coerce_config(config: PipelineConfig | Mapping[str, Any]) -> PipelineConfig
     raise TypeError("config must be a PipelineConfig instance or a mapping")
 
 
-def run_pipeline(config: PipelineConfig | Mapping[str, Any]) -> PipelineResult:
-    """Execute extraction, transformation and loading steps."""
+def _apply_stages(
+    cfg: PipelineConfig,
+    fires: pd.DataFrame,
+    geometry: BaseGeometry,
+    *,
+    notify: bool = True,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Run city filter, geometry, transform and (unless ``notify`` is false) notification on ``fires``.
 
-    cfg = _coerce_config(config)
+    Returns the filtered input (with geometry) and the transformed frame.
+    With ``zero_copy`` both share their column buffers instead of being copies.
+    """
 
-    if cfg.fetch_fire_data is None or cfg.get_reserve_geometry is None:
-        raise ValueError("fetch_fire_data and get_reserve_geometry callables must be provided")
-
-    logger.info("Iniciando execução do pipeline")
+    def _passthrough(frame: pd.DataFrame) -> pd.DataFrame:
+        return frame if cfg.zero_copy else frame.copy()
 
-    logger.info("Buscando focos de queimadas com os parâmetros: %s", cfg.fetch_fire_kwargs)
-    fires = cfg.fetch_fire_data(**cfg.fetch_fire_kwargs)
-    logger.info("%s registros de focos obtidos", len(fires))
     if cfg.city_filter:
         logger.info("Aplicando filtro de município em memória: %s", cfg.city_filter)
-    fires = _filter_by_city(fires, cfg.city_filter)
-    fires = _ensure_geometry_column(fires)
-    geometry = cfg.get_reserve_geometry(**cfg.reserve_kwargs)
-    logger.info("Geometria da reserva carregada com sucesso")
+    fires = filter_by_city(fires, cfg.city_filter)
+    fires = ensure_geometry_column(fires, inplace=cfg.zero_copy)
 
     has_geometry = "geometry" in fires.columns and fires["geometry"].notna().any()
 
     if fires.empty:
         logger.warning("Nenhum foco retornado; pulando transformações espaciais")
-        result_df = fires.copy()
+        result_df = _passthrough(fires)
     elif cfg.apply_transform and cfg.transformer is not None:
         if has_geometry:
             logger.info("Aplicando transformações espaciais")
@@ -143,44 +199,329 @@ def run_pipeline(config: PipelineConfig | Mapping[str, Any]) -> PipelineResult:
             logger.warning(
                 "Nenhuma geometria válida encontrada nos focos; pulando transformações espaciais"
             )
-            result_df = fires.copy()
+            result_df = _passthrough(fires)
     else:
-        result_df = fires.copy()
+        result_df = _passthrough(fires)
+
+    if notify:
+        _notify(cfg, result_df)
+
+    return fires, result_df
+
+
+def _notify(cfg: PipelineConfig, df: pd.DataFrame, pending: dict[str, list[dict[str, Any]]] | None = None) -> None:
+    """Notify ``notify_url`` and the subscribers of the fires in ``df``.
+
+    With ``pending`` (streaming mode) the subscriber alerts are added to it
+    instead of sent, so :func:`_send_pending_alerts` makes one request per
+    endpoint for the whole run.
+    """
 
     if cfg.notify_url and cfg.notifier is not None:
-        cfg.notifier(result_df, cfg.notify_url, cfg.notify_column, cfg.region_id)
+        cfg.notifier(df, cfg.notify_url, cfg.notify_column, cfg.region_id)
+    if cfg.subscriptions is None:
+        return
+    if pending is None:
+        from .subscriptions import notify_subscribers
+
+        notify_subscribers(df, cfg.subscriptions)
+        return
+    for endpoint, alerts in cfg.subscriptions.fan_out(df).items():
+        pending.setdefault(endpoint, []).extend(alerts)
+
+
+def _send_pending_alerts(cfg: PipelineConfig, pending: dict[str, list[dict[str, Any]]]) -> None:
+    if cfg.subscriptions is None:
+        return
+    if not pending:
+        logger.info("Nenhum foco dentro das áreas assinadas (%s assinaturas)", len(cfg.subscriptions))
+        return
+
+    from .subscriptions import send_alerts
+
+    send_alerts(pending)
+
+
+def _write_delta(cfg: PipelineConfig, result_df: pd.DataFrame, outputs: dict[str, str]) -> FrameDiff:
+    """Diff ``result_df`` against the previous run and save the delta file.
+
+    The state is not updated here: see :func:`_save_delta_state`.
+    """
+
+    from .transform.diff import diff_frames, load_state, state_path
+
+    assert cfg.delta_output is not None
+    delta = diff_frames(load_state(state_path(cfg.delta_output)), result_df)
+    logger.info("Diferenças em relação à execução anterior: %s", delta.counts())
+    before = output_signature(cfg.delta_output)
+    default_save_dataframe(delta.to_frame(), cfg.delta_output)
+    outputs["delta"] = output_status(cfg.delta_output, before)
+    return delta
+
+
+def _save_delta_state(cfg: PipelineConfig, result_df: pd.DataFrame) -> None:
+    """Store ``result_df`` as the previous run, once notifications and the loader succeeded.
+
+    A run failing before this point is diffed again from the same state,
+    so its new detections are not lost from the next delta.
+    """
+
+    from .transform.diff import save_state, state_path
+
+    assert cfg.delta_output is not None
+    path = state_path(cfg.delta_output)
+    try:
+        save_state(result_df, path)
+    except Exception as exc:
+        logger.warning("Não foi possível gravar o estado %s: %s", path, exc)
+
+
+def _update_rollups(cfg: PipelineConfig, df: pd.DataFrame) -> None:
+    """Add the rows of ``df`` not counted yet to the hourly/daily rollups."""
+
+    from .load.rollups import update_rollups
+
+    assert cfg.rollups_output is not None
+    update_rollups(df, cfg.rollups_output, region=cfg.region_id, inside_column=cfg.notify_column)
+
+
+def run_pipeline(config: PipelineConfig | Mapping[str, Any]) -> PipelineResult:
+    """Execute extraction, transformation and loading steps.
+
+    When ``chunk_size`` is set, or the fire fetcher returns an iterable of
+    DataFrame chunks, the run is delegated to the streaming mode.
+    """
+
+    import pandas as pd
+
+    cfg = _coerce_config(config)
+
+    if cfg.fetch_fire_data is None or cfg.get_reserve_geometry is None:
+        raise ValueError("fetch_fire_data and get_reserve_geometry callables must be provided")
+
+    logger.info("Iniciando execução do pipeline")
+
+    stale: list[str] = []
+    logger.info("Buscando focos de queimadas com os parâmetros: %s", cfg.fetch_fire_kwargs)
+    fires = _run_stage(cfg, "fires", stale)
+    if cfg.chunk_size is not None or not isinstance(fires, pd.DataFrame):
+        return _run_streaming(cfg, fires, stale)
+
+    logger.info("%s registros de focos obtidos", len(fires))
+    geometry = _run_stage(cfg, "geometry", stale)
+    logger.info("Geometria da reserva carregada com sucesso")
+
+    fires, result_df = _apply_stages(cfg, fires, geometry, notify=cfg.delta_output is None)
+
+    outputs: dict[str, str] = {}
+    delta: FrameDiff | None = None
+    loaded = result_df
+    if cfg.delta_output is not None:
+        delta = _write_delta(cfg, result_df, outputs)
+        if cfg.delta_only:
+            loaded = delta.current
+        _notify(cfg, loaded)
+
+    logger.info("Salvando focos em %s", cfg.dataframe_output)
+    before = output_signature(cfg.dataframe_output)
+    cfg.dataframe_loader(loaded, cfg.dataframe_output)
+    outputs["dataframe"] = output_status(cfg.dataframe_output, before)
+    if cfg.delta_output is not None:
+        _save_delta_state(cfg, result_df)
+
+    if cfg.rollups_output is not None:
+        before = output_signature(cfg.rollups_output)
+        _update_rollups(cfg, result_df)
+        outputs["rollups"] = output_status(cfg.rollups_output, before)
+
+    _save_geometry_output(cfg, geometry, outputs)
+
+    _log_completion(outputs, stale)
+    return PipelineResult(
+        fires=fires,
+        geometry=geometry,
+        result=result_df,
+        outputs=outputs,
+        rows=len(result_df),
+        stale=tuple(stale),
+        delta=delta,
+        latest_detections=latest_by_satellite(fires),
+    )
+
+
+def _run_stage(cfg: PipelineConfig, stage: str, stale: list[str]) -> Any:
+    """Run the fires or geometry stage, within its budget when one is configured."""
 
-    logger.info("Salvando CSV de focos em %s", cfg.dataframe_output)
-    cfg.dataframe_loader(result_df, cfg.dataframe_output)
+    if stage == "fires":
+        func, kwargs, budget = cfg.fetch_fire_data, cfg.fetch_fire_kwargs, cfg.fetch_budget
+    else:
+        func, kwargs, budget = cfg.get_reserve_geometry, cfg.reserve_kwargs, cfg.geometry_budget
+    assert func is not None
+    if budget is None and cfg.snapshot_dir is None:
+        return func(**kwargs)
+
+    from .snapshots import SnapshotStore, register_cancel_hook, run_stage
+
+    terrabrasilis = sys.modules.get(f"{__package__}.extract.terrabrasilis")
+    if stage == "fires" and terrabrasilis is not None:
+        # A Chrome session can only be running if the scraper was imported; let an
+        # abandoned fetch close it at exit (see etl.snapshots).
+        register_cancel_hook(terrabrasilis.cancel_fetch)
+    store = SnapshotStore(cfg.snapshot_dir) if cfg.snapshot_dir is not None else None
+    value, is_stale = run_stage(stage, func, kwargs, budget=budget, store=store)
+    if is_stale:
+        stale.append(stage)
+    return value
+
+
+def _log_completion(outputs: dict[str, str], stale: list[str]) -> None:
+    if stale:
+        logger.warning("Pipeline concluído com dados desatualizados de %s (saídas: %s)", ", ".join(stale), outputs)
+    else:
+        logger.info("Pipeline concluído com sucesso (saídas: %s)", outputs)
 
+
+def _save_geometry_output(cfg: PipelineConfig, geometry: BaseGeometry, outputs: dict[str, str]) -> None:
     if cfg.geometry_output is not None:
         logger.info("Salvando GeoJSON da reserva em %s", cfg.geometry_output)
+        before = output_signature(cfg.geometry_output)
         cfg.geometry_loader(geometry, cfg.geometry_output)
+        outputs["geometry"] = output_status(cfg.geometry_output, before)
+
+
+def _iter_chunks(fires: pd.DataFrame | Iterable[pd.DataFrame], chunk_size: int | None) -> Iterator[pd.DataFrame]:
+    import pandas as pd
+
+    frames = [fires] if isinstance(fires, pd.DataFrame) else fires
+    for frame in frames:
+        if chunk_size is None or len(frame) <= chunk_size:
+            yield frame
+            continue
+        for start in range(0, len(frame), chunk_size):
+            yield frame.iloc[start : start + chunk_size]
+
+
+class ChunkedLoaderWriter:
+    """Stream writer calling an *appending* loader (e.g. ``save_parquet``) once per chunk."""
+
+    def __init__(self, loader: DataFrameLoader, path: Path | str | PathLike[str]) -> None:
+        self.loader = loader
+        self.path = ensure_path(path)
+
+    def write(self, df: pd.DataFrame) -> None:
+        if not df.empty:
+            self.loader(df, self.path)
+
+    def close(self) -> None:
+        return None
+
+    def abort(self) -> None:
+        return None
+
+
+def _open_stream_writer(cfg: PipelineConfig) -> StreamWriter:
+    if cfg.stream_writer is not None:
+        return cfg.stream_writer(cfg.dataframe_output)
+    if cfg.dataframe_loader is default_save_dataframe:
+        from .load.csv import CSVStreamWriter
 
-    logger.info("Pipeline concluído com sucesso")
-    return PipelineResult(fires=fires, geometry=geometry, result=result_df)
+        return CSVStreamWriter(cfg.dataframe_output)
+    raise ValueError("streaming mode with a custom dataframe_loader requires a stream_writer")
 
 
-def _load_sample_dataframe(path: Path | str | PathLike[str]) -> pd.DataFrame:
-    sample_path = _ensure_path(path)
+def _run_streaming(
+    cfg: PipelineConfig,
+    fires: pd.DataFrame | Iterable[pd.DataFrame],
+    stale: list[str] | None = None,
+) -> PipelineResult:
+    """Process ``fires`` chunk by chunk, writing each result as soon as it is ready.
+
+    Only empty frames carrying the input/output schema are kept in the
+    returned :class:`PipelineResult`, so peak memory follows the chunk size.
+    """
+
+    import pandas as pd
+
+    stale = [] if stale is None else stale
+    if cfg.delta_output is not None:
+        logger.warning("Diferenças entre execuções não são calculadas em modo streaming")
+    geometry = _run_stage(cfg, "geometry", stale)
+    logger.info("Geometria da reserva carregada com sucesso")
+
+    outputs: dict[str, str] = {}
+    fires_schema = pd.DataFrame()
+    result_schema = pd.DataFrame()
+    latest: dict[str, pd.Timestamp] = {}
+    pending_alerts: dict[str, list[dict[str, Any]]] = {}
+    rows = chunks = 0
+
+    logger.info("Salvando focos em %s (modo streaming, chunk_size=%s)", cfg.dataframe_output, cfg.chunk_size)
+    before = output_signature(cfg.dataframe_output)
+    rollups_before = output_signature(cfg.rollups_output) if cfg.rollups_output is not None else None
+    writer = _open_stream_writer(cfg)
+    try:
+        for chunk in _iter_chunks(fires, cfg.chunk_size):
+            chunk_fires, chunk_result = _apply_stages(cfg, chunk, geometry, notify=False)
+            _notify(cfg, chunk_result, pending_alerts)
+            writer.write(chunk_result)
+            if cfg.rollups_output is not None:
+                _update_rollups(cfg, chunk_result)
+            for satellite, stamp in latest_by_satellite(chunk_fires).items():
+                if satellite not in latest or stamp > latest[satellite]:
+                    latest[satellite] = stamp
+            rows += len(chunk_result)
+            chunks += 1
+            fires_schema = chunk_fires.iloc[:0]
+            result_schema = chunk_result.iloc[:0]
+            logger.debug("Chunk %s processado (%s linhas)", chunks, len(chunk_result))
+        if chunks == 0:
+            writer.write(result_schema)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    outputs["dataframe"] = output_status(cfg.dataframe_output, before)
+    if cfg.rollups_output is not None:
+        outputs["rollups"] = output_status(cfg.rollups_output, rollups_before)
+    _send_pending_alerts(cfg, pending_alerts)
+    logger.info("%s registros de focos processados em %s chunks", rows, chunks)
+
+    _save_geometry_output(cfg, geometry, outputs)
+
+    _log_completion(outputs, stale)
+    return PipelineResult(
+        fires=fires_schema,
+        geometry=geometry,
+        result=result_schema,
+        outputs=outputs,
+        rows=rows,
+        stale=tuple(stale),
+        latest_detections=latest,
+    )
+
+
+def load_sample_dataframe(path: Path | str | PathLike[str]) -> pd.DataFrame:
+    import pandas as pd
+
+    sample_path = ensure_path(path)
     return pd.read_csv(sample_path)
 
 
-def _load_sample_geometry(path: Path | str | PathLike[str]) -> BaseGeometry:
-    sample_path = _ensure_path(path)
-    data = json.loads(sample_path.read_text(encoding="utf-8"))
-    if data.get("type") == "FeatureCollection":
-        features = data.get("features") or []
-        if not features:
-            raise ValueError("A geometria de exemplo não contém features")
-        geometry_data = features[0]["geometry"]
-    else:
-        geometry_data = data
+def load_sample_geometry(path: Path | str | PathLike[str]) -> BaseGeometry:
+    from .extract.prepared_geometry import EmptyGeometryFile, load_geometry_file
+
+    sample_path = ensure_path(path)
+    try:
+        return load_geometry_file(sample_path).geometry
+    except EmptyGeometryFile as exc:
+        raise ValueError("A geometria de exemplo não contém features") from exc
 
-    return shape(geometry_data)
 
+def ensure_geometry_column(df: pd.DataFrame, *, inplace: bool = False) -> pd.DataFrame:
+    import numpy as np
+    import pandas as pd
+    import shapely
 
-def _ensure_geometry_column(df: pd.DataFrame) -> pd.DataFrame:
     if "geometry" in df.columns:
         logger.info("Coluna geometry já presente com %s linhas", len(df))
         return df
@@ -193,59 +534,48 @@ def _ensure_geometry_column(df: pd.DataFrame) -> pd.DataFrame:
         logger.warning("Colunas de latitude/longitude não encontradas; não foi possível criar geometria")
         return df
 
-    lat_series = pd.to_numeric(df[lat_col], errors="coerce")
-    lon_series = pd.to_numeric(df[lon_col], errors="coerce")
-
-    geometries: list[Point] = []
-    valid_index: list[int] = []
-    out_of_range = 0
-
-    for idx, (lon, lat) in zip(df.index, zip(lon_series, lat_series)):
-        try:
-            lon_f = float(lon)
-            lat_f = float(lat)
-        except (TypeError, ValueError):
-            continue
-
-        if not np.isfinite(lon_f) or not np.isfinite(lat_f):
-            continue
-
-        if not (-180.0 <= lon_f <= 180.0 and -90.0 <= lat_f <= 90.0):
-            out_of_range += 1
-            continue
+    lon_values = pd.to_numeric(df[lon_col], errors="coerce").to_numpy(dtype=float)
+    lat_values = pd.to_numeric(df[lat_col], errors="coerce").to_numpy(dtype=float)
 
-        valid_index.append(idx)
-        geometries.append(Point(lon_f, lat_f))
+    finite = np.isfinite(lon_values) & np.isfinite(lat_values)
+    in_range = (np.abs(lon_values) <= 180.0) & (np.abs(lat_values) <= 90.0)
+    valid = finite & in_range
+    out_of_range = int((finite & ~in_range).sum())
+    valid_count = int(valid.sum())
 
-    if not geometries:
+    if valid_count == 0:
         logger.warning("Nenhuma coordenada válida encontrada para criar a coluna geometry")
         return df
 
-    result = df.copy()
-    result.loc[valid_index, "geometry"] = geometries
+    geometries = np.full(len(df), None, dtype=object)
+    geometries[valid] = shapely.points(lon_values[valid], lat_values[valid])
+
+    result = df if inplace else df.copy()
+    result["geometry"] = geometries
     logger.info(
         "Geometria criada para %s linhas (%s descartadas; %s fora de faixa lat/lon)",
-        len(geometries),
-        len(df) - len(geometries),
+        valid_count,
+        len(df) - valid_count,
         out_of_range,
     )
     logger.debug(
         "Faixa de coordenadas válidas: lon=[%.5f, %.5f], lat=[%.5f, %.5f]",
-        min(point.x for point in geometries),
-        max(point.x for point in geometries),
-        min(point.y for point in geometries),
-        max(point.y for point in geometries),
+        lon_values[valid].min(),
+        lon_values[valid].max(),
+        lat_values[valid].min(),
+        lat_values[valid].max(),
     )
     return result
 
 
-def _filter_by_city(df: pd.DataFrame, city_name: str | None) -> pd.DataFrame:
+def filter_by_city(df: pd.DataFrame, city_name: str | None) -> pd.DataFrame:
     """Return a DataFrame filtered by municipality when a city is provided."""
 
     if not city_name:
         return df
 
-    normalized_target = unidecode(city_name).lower().strip()
+    from .extract.names import NameIndex
+
     candidate_columns = [
         column
         for column in df.columns
@@ -259,13 +589,7 @@ def _filter_by_city(df: pd.DataFrame, city_name: str | None) -> pd.DataFrame:
         )
         return df
 
-    mask_any = False
-    for column in candidate_columns:
-        column_mask = df[column].astype(str).apply(
-            lambda value: normalized_target in unidecode(value).lower()
-        )
-        mask_any = column_mask if isinstance(mask_any, bool) else (mask_any | column_mask)
-
+    mask_any = NameIndex.from_frame(df, candidate_columns).match(city_name)
     filtered = df[mask_any]
 
     logger.info(
@@ -282,22 +606,7 @@ def _filter_by_city(df: pd.DataFrame, city_name: str | None) -> pd.DataFrame:
     return filtered
 
 
-def _pick_timestamp_column(df: pd.DataFrame) -> str | None:
-    """Return the timestamp column name based on TerraBrasilis headers."""
-
-    preferred = "Data / Hora"
-    if preferred in df.columns:
-        return preferred
-
-    # Fallback to case-insensitive match for similar names, if ever present
-    lower_map = {col.lower(): col for col in df.columns}
-    for key in ("data / hora", "data_hora", "data_hora_gmt"):
-        if key in lower_map:
-            return lower_map[key]
-    return None
-
-
-def _notify_intersections(
+def notify_intersections(
     df: pd.DataFrame,
     notify_url: str,
     notify_column: str,
@@ -305,6 +614,9 @@ def _notify_intersections(
 ) -> None:
     """Trigger a notification URL for each row marked inside the area."""
 
+    import urllib.parse
+    import urllib.request
+
     if notify_column not in df.columns:
         logger.warning("Coluna de interseção '%s' não encontrada; notificações não enviadas", notify_column)
         return
@@ -317,64 +629,24 @@ def _notify_intersections(
     if total == 0:
         logger.info("Nenhum foco marcado como dentro da área; nenhuma notificação enviada")
         return
-
-    ts_column = _pick_timestamp_column(df)
+    if "cluster_id" in df.columns:
+        # One alert per fire (see etl.transform.cluster): its representative
+        # when inside the area, otherwise the first member that is.
+        inside_mask = inside_mask & first_per_cluster(df, inside_mask)
+        logger.info("%s focos dentro da área agrupados em %s clusters", total, int(inside_mask.sum()))
+        total = int(inside_mask.sum())
+
+    ts_column = pick_timestamp_column(df)
     if ts_column is None:
         logger.warning("Nenhuma coluna de timestamp conhecida encontrada; enviando timestamp vazio")
 
-    def _format_brazil_timestamp(value: Any) -> str:
-        """Convert various timestamp values to Brazilian format dd/MM/yyyy HH:mm:ss."""
-        if value is None or (isinstance(value, float) and pd.isna(value)):
-            return ""
-        try:
-            ts = pd.to_datetime(value)
-        except Exception:
-            return str(value)
-
-        if pd.isna(ts):
-            return ""
-
-        # Preserve timezone if present; otherwise keep naive as-is.
-        try:
-            if getattr(ts, "tzinfo", None) is not None:
-                ts = ts.tz_convert("America/Sao_Paulo")
-        except Exception:
-            # If tz conversion fails, fall back to original ts
-            pass
-
-        return ts.strftime("%d/%m/%Y %H:%M:%S")
-
     logger.info("Enviando notificações para %s focos dentro da área (regionId=%s)", total, region_id)
 
-    for idx, row in df[inside_mask].iterrows():
-        geometry = row.get("geometry")
-        if geometry is None:
-            logger.warning("Registro %s sem geometria; notificação ignorada", idx)
-            continue
-
-        try:
-            lat = geometry.y
-            lng = geometry.x
-        except Exception:
-            logger.warning("Registro %s com geometria inválida; notificação ignorada", idx)
-            continue
-
-        ts_value = ""
-        if ts_column is not None:
-            value = row.get(ts_column)
-            if pd.notna(value):
-                ts_value = _format_brazil_timestamp(value)
-
-        base = urllib.parse.urlparse(notify_url)
-        query = dict(urllib.parse.parse_qsl(base.query, keep_blank_values=True))
-        query.update(
-            {
-                "regionId": region_id,
-                "timestamp": ts_value,
-                "lat": lat,
-                "lng": lng,
-            }
-        )
+    base = urllib.parse.urlparse(notify_url)
+    base_query = dict(urllib.parse.parse_qsl(base.query, keep_blank_values=True))
+    for idx, params in notification_params(df[inside_mask], region_id, ts_column):
+        query = {**base_query, **params}
+        lat, lng, ts_value = params["lat"], params["lng"], params["timestamp"]
         url = urllib.parse.urlunparse(base._replace(query=urllib.parse.urlencode(query)))
 
         try:
@@ -414,6 +686,105 @@ def build_parser() -> argparse.ArgumentParser:
         default=Path("data/focos_processados.csv"),
         help="Arquivo CSV onde os focos transformados serão salvos.",
     )
+    parser.add_argument(
+        "--fires-format",
+        choices=("csv", "parquet", "geojson", "ndjson", "sqlite"),
+        default="csv",
+        help=(
+            "Formato de saída dos focos. 'parquet' acrescenta arquivos GeoParquet particionados "
+            "por data e estado no diretório indicado em --fires-output (requer pyarrow); "
+            "'geojson' e 'ndjson' gravam os pontos como FeatureCollection ou GeoJSON por linha; "
+            "'sqlite' acumula o histórico em um banco SQLite com índices espacial e temporal."
+        ),
+    )
+    parser.add_argument(
+        "--archive-retention-days",
+        type=float,
+        default=None,
+        help="Com --fires-format sqlite, remove do histórico os focos mais antigos que este número de dias.",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help=(
+            "Processa e grava os focos em blocos deste número de linhas (modo streaming), "
+            "limitando o uso de memória. Disponível para as saídas csv, parquet e sqlite."
+        ),
+    )
+    parser.add_argument(
+        "--spatial-workers",
+        type=int,
+        default=1,
+        help=(
+            "Processos usados no teste ponto-em-polígono (0 = todos os núcleos). Abaixo de "
+            "500 mil pontos o teste continua em um único processo."
+        ),
+    )
+    parser.add_argument(
+        "--spatial-grid",
+        action="store_true",
+        help=(
+            "Classifica os focos com uma grade pré-calculada sobre a área (células dentro/fora/borda), "
+            "gravada em --reserve-cache-dir (ou cache/); só pontos em células de borda usam o teste exato."
+        ),
+    )
+    parser.add_argument(
+        "--distance-bands",
+        type=float,
+        nargs="+",
+        default=None,
+        metavar="KM",
+        help=(
+            "Limites (em km) das faixas de distância ao redor da área, ex.: 1 5 10. Adiciona as colunas "
+            "'zone' (inside, 0-1 km, 1-5 km, ...) e 'distance_to_boundary_m'; use --notify-column zone "
+            "para notificar focos dentro da área e em qualquer faixa."
+        ),
+    )
+    parser.add_argument(
+        "--fetch-budget-seconds",
+        type=float,
+        default=None,
+        help=(
+            "Tempo máximo da coleta no TerraBrasilis. Se exceder ou falhar, usa o último snapshot "
+            "bom dos focos (resultado marcado como desatualizado) e a coleta continua em segundo plano "
+            "(ao encerrar, aguarda até 120 s por ela antes de cancelá-la e fechar o Chrome)."
+        ),
+    )
+    parser.add_argument(
+        "--geometry-budget-seconds",
+        type=float,
+        default=None,
+        help="Tempo máximo para resolver a geometria da reserva; depois disso usa o último snapshot.",
+    )
+    parser.add_argument(
+        "--snapshot-dir",
+        type=Path,
+        default=None,
+        help="Diretório dos snapshots por etapa (padrão: cache/snapshots quando há orçamento).",
+    )
+    parser.add_argument(
+        "--zero-copy",
+        action="store_true",
+        help=(
+            "Evita cópias do DataFrame entre as etapas: colunas são adicionadas no próprio "
+            "DataFrame de focos e o resultado compartilha os mesmos buffers."
+        ),
+    )
+    parser.add_argument(
+        "--fires-precision",
+        type=int,
+        default=6,
+        help="Casas decimais das coordenadas nas saídas GeoJSON/NDJSON.",
+    )
+    parser.add_argument(
+        "--fires-append",
+        action="store_true",
+        help=(
+            "Acrescenta ao CSV apenas os focos ainda não gravados (chave: data/hora, satélite, "
+            "latitude e longitude) em vez de reescrever o arquivo."
+        ),
+    )
     parser.add_argument(
         "--geometry-output",
         type=Path,
@@ -426,6 +797,58 @@ def build_parser() -> argparse.ArgumentParser:
         default=None,
         help="Arquivo GeoJSON opcional utilizado como cache da geometria.",
     )
+    parser.add_argument(
+        "--reserve-cache-dir",
+        type=Path,
+        default=None,
+        help=(
+            "Diretório de cache de geometrias indexado por nome, lugares de busca e estratégia de tags. "
+            "Permite reutilizar o mesmo diretório para várias áreas sem misturar polígonos."
+        ),
+    )
+    parser.add_argument(
+        "--reserve-cache-ttl-hours",
+        type=float,
+        default=None,
+        help="Validade (em horas) das entradas de --reserve-cache-dir; por padrão nunca expiram.",
+    )
+    parser.add_argument(
+        "--reserve-cache-revalidate",
+        action="store_true",
+        help=(
+            "Usa a geometria expirada imediatamente e atualiza o cache em segundo plano "
+            "(aguardada por até 120 s ao encerrar)."
+        ),
+    )
+    parser.add_argument(
+        "--osm-cache-dir",
+        type=Path,
+        default=Path("cache"),
+        help="Diretório do cache de respostas HTTP do osmnx (Nominatim/Overpass).",
+    )
+    parser.add_argument(
+        "--osm-cache-compression",
+        choices=("auto", "zstd", "gzip", "none"),
+        default="auto",
+        help="Compressão das respostas em cache (auto usa zstd se disponível, senão gzip).",
+    )
+    parser.add_argument(
+        "--osm-cache-max-mb",
+        type=float,
+        default=None,
+        help="Tamanho máximo do cache de respostas; as menos usadas recentemente são removidas.",
+    )
+    parser.add_argument(
+        "--osm-cache-ttl-days",
+        type=float,
+        default=None,
+        help="Validade (em dias) das respostas em cache; respostas expiradas são buscadas novamente.",
+    )
+    parser.add_argument(
+        "--osm-offline",
+        action="store_true",
+        help="Resolve a geometria apenas com respostas do cache do osmnx, sem acessar a rede.",
+    )
     parser.add_argument(
         "--reserve-name",
         default="Estação Ecológica Estadual de Guaxindiba",
@@ -449,6 +872,26 @@ def build_parser() -> argparse.ArgumentParser:
             "Pode ser passada múltiplas vezes; se omitido, usa a busca ampla padrão."
         ),
     )
+    parser.add_argument(
+        "--reserve-osm-workers",
+        type=int,
+        default=1,
+        help=(
+            "Número de consultas ao OSM executadas em paralelo ao buscar a geometria. "
+            "A ordem de prioridade (lugar, tags) é mantida; 1 mantém a busca sequencial."
+        ),
+    )
+    parser.add_argument(
+        "--reserve-combined-query",
+        action="store_true",
+        help="Faz uma única consulta Overpass por lugar cobrindo todos os conjuntos de tags.",
+    )
+    parser.add_argument(
+        "--reserve-name-match",
+        choices=("substring", "token", "fuzzy"),
+        default="substring",
+        help="Modo de comparação entre o nome buscado e os nomes das feições do OSM.",
+    )
     parser.add_argument(
         "--city-name",
         default=None,
@@ -489,9 +932,84 @@ def build_parser() -> argparse.ArgumentParser:
         default="inside",
         help="Nome da coluna booleana que indica focos dentro da área (padrão: inside).",
     )
+    parser.add_argument(
+        "--cluster-radius-m",
+        type=float,
+        default=None,
+        help=(
+            "Agrupa focos do mesmo incêndio (ex.: satélites diferentes) a até esta distância em metros, "
+            "adicionando cluster_id, cluster_size e cluster_representative; a notificação passa a ser "
+            "enviada uma vez por cluster. Não disponível com --chunk-size."
+        ),
+    )
+    parser.add_argument(
+        "--cluster-window-minutes",
+        type=float,
+        default=30.0,
+        help="Intervalo máximo entre focos do mesmo cluster, em minutos (padrão: 30).",
+    )
+    parser.add_argument(
+        "--delta-output",
+        type=Path,
+        default=None,
+        help=(
+            "Arquivo CSV com as diferenças em relação à execução anterior (focos novos, removidos e "
+            "alterados, na coluna 'change'). O estado anterior fica em <arquivo>.state.parquet."
+        ),
+    )
+    parser.add_argument(
+        "--delta-only",
+        action="store_true",
+        help="Com --delta-output, notifica e grava em --fires-output apenas os focos novos ou alterados.",
+    )
+    parser.add_argument(
+        "--subscriptions",
+        type=Path,
+        default=None,
+        help=(
+            "Arquivo JSON com assinaturas de áreas (subscriber, endpoint, geometry_file ou geometry). "
+            "Cada endpoint recebe um único POST com os focos dentro das suas áreas."
+        ),
+    )
+    parser.add_argument(
+        "--rollups-output",
+        type=Path,
+        default=None,
+        help=(
+            "Banco SQLite com a contagem de focos por hora e por dia (região, satélite e bioma), "
+            "atualizado só com os focos ainda não contabilizados. Para reconstruir a partir do "
+            "histórico: python -m etl.load.rollups."
+        ),
+    )
+    parser.add_argument(
+        "--lock-file",
+        type=Path,
+        default=DEFAULT_LOCK_FILE,
+        help=(
+            "Arquivo de trava compartilhado com etl.daemon: uma execução não começa enquanto outra "
+            "(manual ou do daemon) o mantém."
+        ),
+    )
     return parser
 
 
+def validate_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Reject option combinations :func:`run_pipeline` does not support (exits through ``parser.error``).
+
+    Shared by :func:`main` and :func:`etl.daemon.main`.
+    """
+
+    if args.chunk_size is not None and args.fires_format in ("geojson", "ndjson"):
+        parser.error("--chunk-size só é suportado com --fires-format csv, parquet ou sqlite")
+    if args.chunk_size is not None and args.delta_output is not None:
+        parser.error("--delta-output não é suportado com --chunk-size")
+    if args.chunk_size is not None and args.cluster_radius_m is not None:
+        # Clusters are numbered per chunk and a fire split across chunks would be two clusters.
+        parser.error("--cluster-radius-m não é suportado com --chunk-size")
+    if args.delta_only and args.delta_output is None:
+        parser.error("--delta-only requer --delta-output")
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     """Entry-point used by the command line interface."""
 
@@ -499,9 +1017,35 @@ def main(argv: Sequence[str] | None = None) -> int:
 
     configure_logging()
 
-    args = build_parser().parse_args(argv)
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    validate_args(parser, args)
     logger.info("Parâmetros recebidos: %s", args)
 
+    try:
+        cfg, osm_cache = config_from_args(args)
+    except ValueError as exc:
+        parser.error(str(exc))
+    lock = RunLock(args.lock_file)
+    if not lock.acquire():
+        logger.error("Outra execução do pipeline está em andamento (%s); encerrando", lock.path)
+        return 1
+    try:
+        run_pipeline(cfg)
+    finally:
+        lock.release()
+    if osm_cache is not None:
+        osm_cache.log_stats()
+    return 0
+
+
+def config_from_args(args: argparse.Namespace) -> tuple[PipelineConfig, Any]:
+    """Build the :class:`PipelineConfig` described by parsed CLI ``args``.
+
+    Returns the configuration and the OSM response cache it uses (``None``
+    in offline mode), so callers can report its statistics.
+    """
+
     if args.city_name:
         logger.info("Filtro por município solicitado: %s", args.city_name)
 
@@ -510,8 +1054,115 @@ def main(argv: Sequence[str] | None = None) -> int:
         reserve_kwargs["geometry_file"] = args.reserve_geometry_file
     if args.reserve_cache is not None:
         reserve_kwargs["cache"] = args.reserve_cache
+    if args.reserve_cache_dir is not None:
+        reserve_kwargs["cache_dir"] = args.reserve_cache_dir
+        if args.reserve_cache_ttl_hours is not None:
+            reserve_kwargs["cache_ttl"] = args.reserve_cache_ttl_hours * 3600.0
+        if args.reserve_cache_revalidate:
+            reserve_kwargs["revalidate"] = True
     if args.reserve_search_place:
         reserve_kwargs["search_places"] = args.reserve_search_place
+    if args.reserve_osm_workers > 1:
+        reserve_kwargs["max_workers"] = args.reserve_osm_workers
+    if args.reserve_combined_query:
+        reserve_kwargs["combined_query"] = True
+    if args.reserve_name_match != "substring":
+        reserve_kwargs["name_match"] = args.reserve_name_match
+
+    osm_cache = None
+    if not args.offline_sample:
+        from .extract.osm_cache import OSMResponseCache
+
+        osm_cache = OSMResponseCache(
+            args.osm_cache_dir,
+            compression=args.osm_cache_compression,
+            max_bytes=int(args.osm_cache_max_mb * 1024 * 1024) if args.osm_cache_max_mb is not None else None,
+            ttl=args.osm_cache_ttl_days * 86400.0 if args.osm_cache_ttl_days is not None else None,
+            offline=args.osm_offline,
+        )
+        reserve_kwargs["osm_cache"] = osm_cache
+
+    fires_output: Path = args.fires_output
+    dataframe_loader: DataFrameLoader = default_save_dataframe
+    if args.fires_format == "parquet":
+        from .load.parquet import save_parquet
+
+        dataframe_loader = save_parquet
+    elif args.fires_format == "sqlite":
+        from .load.sqlite import save_sqlite
+
+        dataframe_loader = functools.partial(
+            save_sqlite, region=args.reserve_name, retention_days=args.archive_retention_days
+        )
+    elif args.fires_format in ("geojson", "ndjson"):
+        from .load.geojson import save_points_geojson
+
+        dataframe_loader = functools.partial(
+            save_points_geojson,
+            layout="collection" if args.fires_format == "geojson" else "lines",
+            precision=args.fires_precision,
+        )
+    elif args.fires_append:
+        dataframe_loader = functools.partial(default_save_dataframe, mode="append")
+    if args.fires_format != "csv" and fires_output.suffix == ".csv":
+        fires_output = fires_output.with_suffix(f".{args.fires_format}")
+
+    transformer_kwargs: dict[str, Any] = {}
+    if args.spatial_workers != 1:
+        transformer_kwargs["workers"] = args.spatial_workers
+    if args.spatial_grid:
+        transformer_kwargs["grid"] = args.reserve_cache_dir or Path("cache")
+
+    snapshot_dir = args.snapshot_dir
+    if snapshot_dir is None and (args.fetch_budget_seconds is not None or args.geometry_budget_seconds is not None):
+        snapshot_dir = Path("cache/snapshots")
+
+    # Extra steps run on the frame returned by mark_points_inside, in place.
+    extra_steps: list[Callable[[pd.DataFrame, BaseGeometry], pd.DataFrame]] = []
+    if args.distance_bands:
+        from .transform.zones import mark_distance_bands
+
+        bands_dir = args.reserve_cache_dir or Path("cache")
+        extra_steps.append(
+            lambda df, geometry: mark_distance_bands(
+                df, geometry, bands_km=args.distance_bands, directory=bands_dir, copy=False
+            )
+        )
+    if args.cluster_radius_m is not None:
+        from .transform.cluster import cluster_detections
+
+        extra_steps.append(
+            lambda df, geometry: cluster_detections(
+                df,
+                radius_m=args.cluster_radius_m,
+                window_minutes=args.cluster_window_minutes,
+                copy=False,
+            )
+        )
+
+    transformer: Transformer | None = None
+    if extra_steps:
+        from .transform.spatial import mark_points_inside
+
+        if args.zero_copy:
+            transformer_kwargs["copy"] = False
+
+        def transformer(df: pd.DataFrame, geometry: BaseGeometry, **kwargs: Any) -> pd.DataFrame:
+            result = mark_points_inside(df, geometry, **kwargs)
+            for step in extra_steps:
+                result = step(result, geometry)
+            return result
+
+    stream_writer: StreamWriterFactory | None = None
+    if args.chunk_size is not None and dataframe_loader is not default_save_dataframe:
+        # Parquet, SQLite and CSV append are appending loaders: calling them per chunk is equivalent.
+        stream_writer = functools.partial(ChunkedLoaderWriter, dataframe_loader)
+
+    subscriptions: SubscriptionRegistry | None = None
+    if args.subscriptions is not None:
+        from .subscriptions import SubscriptionRegistry
+
+        subscriptions = SubscriptionRegistry.from_file(args.subscriptions)
 
     geometry_output: Path | None
     if args.skip_geometry_output:
@@ -524,16 +1175,29 @@ def main(argv: Sequence[str] | None = None) -> int:
 
         logger.info("Executando pipeline em modo offline usando dados de amostra")
 
-        def _offline_fetch_fire_data(**_: Any) -> pd.DataFrame:
+        def _offline_fetch_fire_data(**_: Any) -> pd.DataFrame | Iterable[pd.DataFrame]:
             sample_file = repo_root / "focos_ficticios.csv"
-            return _load_sample_dataframe(sample_file)
+            if args.chunk_size is not None:
+                import pandas as pd
+
+                return pd.read_csv(sample_file, chunksize=args.chunk_size)
+            return load_sample_dataframe(sample_file)
 
         def _offline_get_geometry(**_: Any) -> BaseGeometry:
             sample_geometry = args.reserve_geometry_file or (repo_root / "EEEG_polygon.geojson")
-            return _load_sample_geometry(sample_geometry)
+            return load_sample_geometry(sample_geometry)
 
         cfg = PipelineConfig(
-            dataframe_output=args.fires_output,
+            dataframe_output=fires_output,
+            dataframe_loader=dataframe_loader,
+            chunk_size=args.chunk_size,
+            stream_writer=stream_writer,
+            zero_copy=args.zero_copy,
+            fetch_budget=args.fetch_budget_seconds,
+            geometry_budget=args.geometry_budget_seconds,
+            snapshot_dir=snapshot_dir,
+            transformer=transformer,
+            transformer_kwargs=transformer_kwargs,
             geometry_output=geometry_output,
             apply_transform=not args.no_mark_inside,
             fetch_fire_data=_offline_fetch_fire_data,
@@ -543,6 +1207,10 @@ def main(argv: Sequence[str] | None = None) -> int:
             notify_url=args.notify_url,
             notify_column=args.notify_column,
             region_id=args.reserve_name,
+            delta_output=args.delta_output,
+            delta_only=args.delta_only,
+            subscriptions=subscriptions,
+            rollups_output=args.rollups_output,
         )
     else:
         from .extract.terrabrasilis import TerraBrasilisConfig, TerraBrasilisFilters
@@ -559,7 +1227,16 @@ def main(argv: Sequence[str] | None = None) -> int:
         logger.info("Executando pipeline com coleta online do TerraBrasilis (headless=%s)", args.headless)
 
         cfg = PipelineConfig(
-            dataframe_output=args.fires_output,
+            dataframe_output=fires_output,
+            dataframe_loader=dataframe_loader,
+            chunk_size=args.chunk_size,
+            stream_writer=stream_writer,
+            zero_copy=args.zero_copy,
+            fetch_budget=args.fetch_budget_seconds,
+            geometry_budget=args.geometry_budget_seconds,
+            snapshot_dir=snapshot_dir,
+            transformer=transformer,
+            transformer_kwargs=transformer_kwargs,
             geometry_output=geometry_output,
             apply_transform=not args.no_mark_inside,
             fetch_fire_kwargs=fetch_kwargs,
@@ -568,10 +1245,13 @@ def main(argv: Sequence[str] | None = None) -> int:
             notify_url=args.notify_url,
             notify_column=args.notify_column,
             region_id=args.reserve_name,
+            delta_output=args.delta_output,
+            delta_only=args.delta_only,
+            subscriptions=subscriptions,
+            rollups_output=args.rollups_output,
         )
 
-    run_pipeline(cfg)
-    return 0
+    return cfg, osm_cache
 
 
 if __name__ == "__main__":  # pragma: no cover - CLI execution helper
@@ -579,9 +1259,19 @@ if __name__ == "__main__":  # pragma: no cover - CLI execution helper
 
 
 __all__ = [
+    "DEFAULT_LOCK_FILE",
+    "ChunkedLoaderWriter",
     "PipelineConfig",
     "PipelineResult",
     "build_parser",
+    "config_from_args",
+    "ensure_geometry_column",
+    "filter_by_city",
+    "load_sample_dataframe",
+    "load_sample_geometry",
     "main",
+    "notify_intersections",
+    "StreamWriter",
     "run_pipeline",
+    "validate_args",
 ]
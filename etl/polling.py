@@ -0,0 +1,193 @@
+"""Adaptive polling policy learning when TerraBrasilis gets new detections.
+
+After each run the newest ``Data / Hora`` per satellite is compared with
+the previous run. When it advances, the time of day the new rows showed up
+is recorded for that satellite. Polls are then dense (``min_interval``)
+inside a window around the learned update times and back off exponentially
+up to ``max_interval`` while nothing changes, but never past the start of
+the next expected window.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from os import PathLike
+from pathlib import Path
+from typing import Mapping, Protocol, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .pipeline import PipelineResult
+from .utils import latest_by_satellite, replace_file
+
+logger = logging.getLogger(__name__)
+
+DAY = 86_400.0
+DEFAULT_MIN_INTERVAL = 120.0
+DEFAULT_MAX_INTERVAL = 1_800.0
+DEFAULT_WINDOW = 900.0
+DEFAULT_HISTORY = 30
+BACKOFF_FACTOR = 2.0
+
+
+class PollingPolicy(Protocol):
+    """Decides how long the daemon waits after a run."""
+
+    def next_delay(self, result: PipelineResult | None, now: datetime) -> float: ...
+
+
+def _seconds_of_day(moment: datetime) -> float:
+    moment = moment.astimezone(timezone.utc)
+    return moment.hour * 3600.0 + moment.minute * 60.0 + moment.second + moment.microsecond / 1e6
+
+
+@dataclass(slots=True)
+class AdaptivePollingPolicy:
+    """Learn per-satellite update times and schedule polls around them.
+
+    Parameters
+    ----------
+    min_interval, max_interval:
+        Bounds, in seconds, of the delay between runs.
+    window:
+        Half-width, in seconds, of the dense-polling window around each
+        learned update time of day.
+    history:
+        Update observations kept per satellite (older ones are forgotten, so
+        the policy follows drifting pass times).
+    satellites:
+        Only learn from these satellites (e.g. the reference satellite);
+        ``None`` uses every satellite in the data.
+    state_path:
+        JSON file where the history survives restarts.
+    """
+
+    min_interval: float = DEFAULT_MIN_INTERVAL
+    max_interval: float = DEFAULT_MAX_INTERVAL
+    window: float = DEFAULT_WINDOW
+    history: int = DEFAULT_HISTORY
+    satellites: Sequence[str] | None = None
+    state_path: Path | str | PathLike[str] | None = None
+    latest: dict[str, str] = field(default_factory=dict)
+    updates: dict[str, deque[float]] = field(default_factory=dict)
+    backoff: float = 0.0
+    last_poll: datetime | None = None
+
+    def __post_init__(self) -> None:
+        if not 0 < self.min_interval <= self.max_interval:
+            raise ValueError("intervals must satisfy 0 < min_interval <= max_interval")
+        self.backoff = self.backoff or self.min_interval
+        if self.state_path is not None:
+            self.state_path = Path(self.state_path)
+            self._load()
+
+    def observe(self, latest: Mapping[str, pd.Timestamp] | None, now: datetime) -> list[str]:
+        """Record which satellites got new rows since the previous run; return them.
+
+        ``latest`` maps each satellite to its newest detection, as carried by
+        :attr:`etl.pipeline.PipelineResult.latest_detections`.
+        """
+
+        advanced: list[str] = []
+        for satellite, stamp in (latest or {}).items():
+            if self.satellites is not None and satellite not in self.satellites:
+                continue
+            previous = self.latest.get(satellite)
+            if previous is not None and stamp > pd.Timestamp(previous):
+                advanced.append(satellite)
+            if previous is None or stamp > pd.Timestamp(previous):
+                self.latest[satellite] = stamp.isoformat()
+
+        # The rows arrived somewhere between the previous poll and now.
+        arrived = now if self.last_poll is None else self.last_poll + (now - self.last_poll) / 2
+        for satellite in advanced:
+            times = self.updates.setdefault(satellite, deque(maxlen=self.history))
+            times.append(_seconds_of_day(arrived))
+        self.last_poll = now
+        return advanced
+
+    def _update_times(self) -> np.ndarray:
+        values = [value for times in self.updates.values() for value in times]
+        return np.asarray(values, dtype=float)
+
+    def seconds_to_window(self, now: datetime) -> float | None:
+        """Seconds until the next expected update window opens (0 inside one)."""
+
+        times = self._update_times()
+        if not len(times):
+            return None
+        offset = (times - _seconds_of_day(now)) % DAY
+        # Distance to each window center, both ways around the clock.
+        if (np.minimum(offset, DAY - offset) <= self.window).any():
+            return 0.0
+        return float(((offset - self.window) % DAY).min())
+
+    def next_delay(self, result: PipelineResult | None, now: datetime) -> float:
+        """Observe ``result`` and return the seconds to wait before the next run."""
+
+        latest = None
+        if result is not None:
+            # Streaming runs only keep an empty schema frame in ``fires``.
+            latest = result.latest_detections or latest_by_satellite(result.fires)
+        advanced = self.observe(latest, now)
+        until_window = self.seconds_to_window(now)
+
+        if advanced or until_window == 0.0:
+            self.backoff = self.min_interval
+        else:
+            self.backoff = min(self.backoff * BACKOFF_FACTOR, self.max_interval)
+        delay = self.backoff if until_window is None or until_window == 0.0 else min(self.backoff, until_window)
+        delay = float(min(max(delay, self.min_interval), self.max_interval))
+
+        if until_window is None:
+            window = "desconhecida"
+        else:
+            window = "agora" if until_window == 0.0 else f"{until_window:.0f} s"
+        logger.info(
+            "Próxima coleta em %.0f s (novos dados: %s; janela esperada em %s)",
+            delay,
+            ", ".join(advanced) or "nenhum",
+            window,
+        )
+        self._save()
+        return delay
+
+    def _load(self) -> None:
+        assert isinstance(self.state_path, Path)
+        if not self.state_path.exists():
+            return
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            logger.warning("Estado de polling inválido em %s: %s", self.state_path, exc)
+            return
+        self.latest = dict(state.get("latest", {}))
+        self.updates = {
+            satellite: deque((float(value) for value in values), maxlen=self.history)
+            for satellite, values in state.get("updates", {}).items()
+        }
+
+    def _save(self) -> None:
+        if self.state_path is None:
+            return
+        target = Path(self.state_path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"latest": self.latest, "updates": {key: list(value) for key, value in self.updates.items()}}
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(payload, fh, ensure_ascii=False, indent=2)
+            replace_file(tmp_name, target)
+        except OSError as exc:
+            Path(tmp_name).unlink(missing_ok=True)
+            logger.warning("Não foi possível gravar o estado de polling %s: %s", target, exc)
+
+
+__all__ = ["AdaptivePollingPolicy", "PollingPolicy", "latest_by_satellite"]
@@ -0,0 +1,384 @@
+"""Monitor several regions with a single fire extraction.
+
+Regions sharing the same :class:`~etl.extract.terrabrasilis.TerraBrasilisFilters`
+share one scrape; every region of a scrape is marked in one indexed pass
+(:func:`etl.transform.spatial.points_in_regions`) and then gets its own
+output file, GeoJSON and notifications, as :func:`etl.pipeline.run_pipeline`
+would produce for it alone.
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from os import PathLike
+from pathlib import Path
+from typing import Any, Hashable, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+from shapely.geometry.base import BaseGeometry
+
+from .extract.names import normalize_name
+from .pipeline import (
+    DataFrameLoader,
+    FireFetcher,
+    GeometryFetcher,
+    GeometryLoader,
+    Notifier,
+    default_save_dataframe,
+    default_save_geometry,
+    ensure_geometry_column,
+    filter_by_city,
+    load_sample_dataframe,
+    load_sample_geometry,
+    notify_intersections,
+)
+from .utils import ensure_path, output_signature, output_status
+
+logger = logging.getLogger(__name__)
+
+FILTER_FIELDS = ("continent", "country_values", "state_values", "satellite_value")
+RESERVE_FIELDS = ("search_places", "name_match", "combined_query", "max_workers")
+
+
+@dataclass(slots=True)
+class RegionSpec:
+    """One monitored area.
+
+    ``filters`` selects the TerraBrasilis table scraped for the region;
+    regions with equal filters share the scrape. Outputs default to
+    ``<output_dir>/<slug>.csv`` and ``<output_dir>/<slug>.geojson``.
+    """
+
+    name: str
+    region_id: str | None = None
+    geometry_file: Path | str | PathLike[str] | None = None
+    notify_url: str | None = None
+    filters: Any | None = None
+    reserve_kwargs: dict[str, Any] = field(default_factory=dict)
+    output: Path | str | PathLike[str] | None = None
+    geometry_output: Path | str | PathLike[str] | None = None
+
+    def __post_init__(self) -> None:
+        if self.region_id is None:
+            self.region_id = self.name
+        if self.geometry_file is not None:
+            self.geometry_file = ensure_path(self.geometry_file)
+
+    @property
+    def slug(self) -> str:
+        return re.sub(r"[^a-z0-9]+", "-", normalize_name(str(self.region_id))).strip("-") or "regiao"
+
+
+@dataclass(slots=True)
+class MultiRegionConfig:
+    """Configuration container used by :func:`run_regions`."""
+
+    regions: Sequence[RegionSpec]
+    output_dir: Path | str | PathLike[str] = Path("data/regioes")
+    fetch_fire_data: FireFetcher | None = None
+    fetch_fire_kwargs: dict[str, Any] = field(default_factory=dict)
+    get_reserve_geometry: GeometryFetcher | None = None
+    reserve_kwargs: dict[str, Any] = field(default_factory=dict)
+    dataframe_loader: DataFrameLoader = default_save_dataframe
+    geometry_loader: GeometryLoader = default_save_geometry
+    write_geometry: bool = True
+    city_filter: str | None = None
+    notify_column: str = "inside"
+    notifier: Notifier | None = None
+
+    def __post_init__(self) -> None:
+        self.output_dir = ensure_path(self.output_dir)
+        if not self.regions:
+            raise ValueError("at least one region is required")
+        slugs = [region.slug for region in self.regions]
+        duplicated = sorted({slug for slug in slugs if slugs.count(slug) > 1})
+        if duplicated:
+            raise ValueError(f"duplicated region ids: {', '.join(duplicated)}")
+
+        if self.fetch_fire_data is None:
+            from .extract.terrabrasilis import fetch_fire_data, TerraBrasilisConfig, TerraBrasilisFilters
+
+            self.fetch_fire_data = fetch_fire_data
+            self.fetch_fire_kwargs.setdefault(
+                "config",
+                TerraBrasilisConfig(headless=True, pause_after_apply=False, close_browser_on_finish=True),
+            )
+            for region in self.regions:
+                if region.filters is None:
+                    region.filters = TerraBrasilisFilters()
+
+        if self.get_reserve_geometry is None:
+            from .extract.reserve import get_reserve_geometry
+
+            self.get_reserve_geometry = get_reserve_geometry
+
+        if self.notifier is None:
+            self.notifier = notify_intersections
+
+
+@dataclass(slots=True)
+class RegionResult:
+    """Products generated for one region by :func:`run_regions`.
+
+    ``mask`` flags the fetched rows inside the region; the per-region frame
+    is only built while saving, so the fire table is not kept once per region.
+    """
+
+    region: RegionSpec
+    geometry: BaseGeometry
+    mask: np.ndarray
+    outputs: dict[str, str] = field(default_factory=dict)
+    inside: int = 0
+
+
+@dataclass(slots=True)
+class MultiRegionResult:
+    """Per-region results keyed by ``region_id`` plus the number of scrapes made."""
+
+    regions: dict[str, RegionResult]
+    fetches: int
+
+
+def _filters_key(filters: Any | None) -> Hashable:
+    if filters is None:
+        return None
+    if dataclasses.is_dataclass(filters):
+        return tuple(
+            tuple(value) if isinstance(value, list) else value for value in dataclasses.astuple(filters)
+        )
+    return repr(filters)
+
+
+def _group_by_filters(regions: Sequence[RegionSpec]) -> list[list[RegionSpec]]:
+    groups: dict[Hashable, list[RegionSpec]] = {}
+    for region in regions:
+        groups.setdefault(_filters_key(region.filters), []).append(region)
+    return list(groups.values())
+
+
+def _resolve_geometry(cfg: MultiRegionConfig, region: RegionSpec) -> BaseGeometry:
+    kwargs = {**cfg.reserve_kwargs, "name": region.name, **region.reserve_kwargs}
+    if region.geometry_file is not None:
+        kwargs["geometry_file"] = region.geometry_file
+    assert cfg.get_reserve_geometry is not None
+    return cfg.get_reserve_geometry(**kwargs)
+
+
+def _fetch(cfg: MultiRegionConfig, filters: Any | None) -> pd.DataFrame:
+    kwargs = dict(cfg.fetch_fire_kwargs)
+    if filters is not None:
+        kwargs["filters"] = filters
+    logger.info("Buscando focos de queimadas com os parâmetros: %s", kwargs)
+    assert cfg.fetch_fire_data is not None
+    fires = cfg.fetch_fire_data(**kwargs)
+    if not isinstance(fires, pd.DataFrame):
+        frames = list(fires)
+        fires = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return fires
+
+
+def run_regions(config: MultiRegionConfig | Mapping[str, Any]) -> MultiRegionResult:
+    """Run the pipeline for every region, scraping once per distinct filter set."""
+
+    cfg = config if isinstance(config, MultiRegionConfig) else MultiRegionConfig(**dict(config))
+    from .transform.spatial import points_in_regions
+
+    geometries = {region.region_id: _resolve_geometry(cfg, region) for region in cfg.regions}
+    logger.info("Geometrias carregadas para %s regiões", len(geometries))
+
+    results: dict[str, RegionResult] = {}
+    groups = _group_by_filters(cfg.regions)
+    for group in groups:
+        fires = _fetch(cfg, group[0].filters)
+        logger.info("%s registros de focos obtidos para %s regiões", len(fires), len(group))
+        fires = ensure_geometry_column(filter_by_city(fires, cfg.city_filter))
+
+        if "geometry" in fires.columns:
+            membership = points_in_regions(
+                np.asarray(fires["geometry"].to_numpy(dtype=object), dtype=object),
+                [geometries[region.region_id] for region in group],
+            )
+        else:
+            logger.warning("Nenhuma geometria nos focos; regiões marcadas sem focos dentro")
+            membership = np.zeros((len(fires), len(group)), dtype=bool)
+
+        for column, region in enumerate(group):
+            results[str(region.region_id)] = _save_region(
+                cfg, region, geometries[region.region_id], fires, membership[:, column]
+            )
+
+    logger.info("Execução multi-região concluída (%s regiões, %s coletas)", len(results), len(groups))
+    return MultiRegionResult(regions=results, fetches=len(groups))
+
+
+def _save_region(
+    cfg: MultiRegionConfig,
+    region: RegionSpec,
+    geometry: BaseGeometry,
+    fires: pd.DataFrame,
+    mask: np.ndarray,
+) -> RegionResult:
+    assert isinstance(cfg.output_dir, Path)
+    outputs: dict[str, str] = {}
+    inside = int(mask.sum())
+    # Shares the fire columns with every other region; only ``inside`` is new.
+    result = fires.copy(deep=False)
+    result["inside"] = mask
+    logger.info("Região %s: %s focos dentro da área", region.region_id, inside)
+
+    output = ensure_path(region.output) if region.output is not None else cfg.output_dir / f"{region.slug}.csv"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    before = output_signature(output)
+    cfg.dataframe_loader(result, output)
+    outputs["dataframe"] = output_status(output, before)
+
+    if cfg.write_geometry:
+        geometry_output = (
+            ensure_path(region.geometry_output)
+            if region.geometry_output is not None
+            else cfg.output_dir / f"{region.slug}.geojson"
+        )
+        before = output_signature(geometry_output)
+        cfg.geometry_loader(geometry, geometry_output)
+        outputs["geometry"] = output_status(geometry_output, before)
+
+    if region.notify_url and cfg.notifier is not None:
+        cfg.notifier(result, region.notify_url, cfg.notify_column, region.region_id)
+
+    return RegionResult(region=region, geometry=geometry, mask=mask, outputs=outputs, inside=inside)
+
+
+def load_region_specs(path: Path | str | PathLike[str], *, with_filters: bool = True) -> list[RegionSpec]:
+    """Read region specs from a JSON list of objects.
+
+    Each object needs ``name`` and accepts ``region_id``, ``geometry_file``,
+    ``notify_url``, ``output``, the TerraBrasilis filter fields
+    (``state_values``, ``satellite_value``, ...) and reserve lookup options
+    (``search_places``, ``name_match``, ...). Relative paths are resolved
+    against the JSON file's directory.
+    """
+
+    source = ensure_path(path)
+    entries = json.loads(source.read_text(encoding="utf-8"))
+    if not isinstance(entries, list):
+        raise ValueError("regions file must contain a JSON list")
+
+    specs = []
+    for entry in entries:
+        entry = dict(entry)
+        filter_values = {key: entry.pop(key) for key in FILTER_FIELDS if key in entry}
+        reserve_kwargs = {key: entry.pop(key) for key in RESERVE_FIELDS if key in entry}
+        for key in ("geometry_file", "output", "geometry_output"):
+            if entry.get(key) is not None:
+                entry[key] = source.parent / entry[key]
+        filters = None
+        if with_filters:
+            from .extract.terrabrasilis import TerraBrasilisFilters
+
+            filters = TerraBrasilisFilters(**filter_values)
+        specs.append(RegionSpec(filters=filters, reserve_kwargs=reserve_kwargs, **entry))
+    return specs
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the CLI argument parser used by :func:`main`."""
+
+    parser = argparse.ArgumentParser(description="Executa o pipeline ETL para várias regiões com uma única coleta.")
+    parser.add_argument(
+        "--regions-file",
+        type=Path,
+        required=True,
+        help="JSON com a lista de regiões (name, region_id, geometry_file, notify_url, state_values, ...).",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path("data/regioes"),
+        help="Diretório das saídas por região (<região>.csv e <região>.geojson).",
+    )
+    parser.add_argument(
+        "--reserve-cache-dir",
+        type=Path,
+        default=Path("cache/reservas"),
+        help="Diretório de cache das geometrias resolvidas no OpenStreetMap.",
+    )
+    parser.add_argument("--skip-geometry-output", action="store_true", help="Não grava o GeoJSON das regiões.")
+    parser.add_argument("--city-name", default=None, help="Filtra os focos por município antes da marcação.")
+    parser.add_argument("--headless", action="store_true", help="Executa o Chrome em modo headless.")
+    parser.add_argument(
+        "--offline-sample",
+        action="store_true",
+        help="Usa os focos de exemplo locais (focos_ficticios.csv) em vez do TerraBrasilis.",
+    )
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Entry-point used by the command line interface."""
+
+    from .config import configure_logging
+
+    configure_logging()
+
+    args = build_parser().parse_args(argv)
+    logger.info("Parâmetros recebidos: %s", args)
+
+    regions = load_region_specs(args.regions_file, with_filters=not args.offline_sample)
+    fetch_fire_kwargs: dict[str, Any] = {}
+    fetch_fire_data: FireFetcher | None = None
+    get_reserve_geometry: GeometryFetcher | None = None
+
+    if args.offline_sample:
+        repo_root = Path(__file__).resolve().parent.parent
+        logger.info("Executando multi-região em modo offline usando dados de amostra")
+
+        def fetch_fire_data(**_: Any) -> pd.DataFrame:
+            return load_sample_dataframe(repo_root / "focos_ficticios.csv")
+
+        def get_reserve_geometry(*, name: str, geometry_file: Path | None = None, **_: Any) -> BaseGeometry:
+            return load_sample_geometry(geometry_file or (repo_root / "EEEG_polygon.geojson"))
+
+    else:
+        from .extract.terrabrasilis import TerraBrasilisConfig
+
+        fetch_fire_kwargs["config"] = TerraBrasilisConfig(
+            headless=args.headless,
+            pause_after_apply=not args.headless,
+            close_browser_on_finish=True,
+        )
+
+    result = run_regions(
+        MultiRegionConfig(
+            regions=regions,
+            output_dir=args.output_dir,
+            fetch_fire_data=fetch_fire_data,
+            fetch_fire_kwargs=fetch_fire_kwargs,
+            get_reserve_geometry=get_reserve_geometry,
+            reserve_kwargs={"cache_dir": args.reserve_cache_dir},
+            write_geometry=not args.skip_geometry_output,
+            city_filter=args.city_name,
+        )
+    )
+    for region_id, region_result in result.regions.items():
+        logger.info("%s: %s focos dentro; saídas %s", region_id, region_result.inside, region_result.outputs)
+    return 0
+
+
+__all__ = [
+    "MultiRegionConfig",
+    "MultiRegionResult",
+    "RegionResult",
+    "RegionSpec",
+    "load_region_specs",
+    "run_regions",
+]
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
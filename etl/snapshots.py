@@ -0,0 +1,275 @@
+"""Last-good snapshots and time budgets for the pipeline's extraction stages.
+
+A stage (fires or geometry) runs in a daemon thread and is given ``budget``
+seconds. If it finishes in time its result is used and saved as the stage
+snapshot. If it fails or runs late, the last snapshot is served instead and
+the result is flagged stale; a late call keeps running in the background
+and refreshes the snapshot when it completes, so the next run (e.g. in the
+daemon) picks up fresh data. A stage already refreshing is joined instead
+of being started twice.
+
+At interpreter exit (e.g. a one-shot cron run) late calls get up to
+:data:`EXIT_STAGE_TIMEOUT` seconds to finish. Calls still running after
+that are abandoned: the cancel hooks (:func:`register_cancel_hook`) release
+what they hold, such as the Chrome session of a TerraBrasilis fetch, and the
+snapshot is only refreshed by a later run.
+"""
+
+from __future__ import annotations
+
+import atexit
+import dataclasses
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from os import PathLike
+from pathlib import Path
+from typing import Any, Callable, Mapping
+
+import pandas as pd
+import shapely
+
+logger = logging.getLogger(__name__)
+
+FIRES = "fires"
+GEOMETRY = "geometry"
+_SUFFIXES = {FIRES: ".parquet", GEOMETRY: ".wkb"}
+EXIT_STAGE_TIMEOUT = 120.0
+
+_inflight: dict[tuple[str, str], "_StageCall"] = {}
+_inflight_lock = threading.Lock()
+_cancel_hooks: list[Callable[[int], Any]] = []
+
+
+class StageUnavailable(RuntimeError):
+    """Raised when a stage fails or runs late and no snapshot exists."""
+
+
+def _stable(value: Any) -> Any:
+    """Return a representation of ``value`` that is stable across processes."""
+
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, PathLike):
+        return os.fspath(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_stable(item) for item in value)
+    if isinstance(value, Mapping):
+        return tuple(sorted((str(key), _stable(item)) for key, item in value.items()))
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return (type(value).__name__, _stable(dataclasses.asdict(value)))
+    # Caches, sessions and other live objects do not select different data.
+    return type(value).__name__
+
+
+def snapshot_key(kwargs: Mapping[str, Any]) -> str:
+    """Return a short hash identifying the data selected by ``kwargs``."""
+
+    return hashlib.sha1(repr(_stable(kwargs)).encode("utf-8")).hexdigest()[:16]
+
+
+class SnapshotStore:
+    """Directory of ``<stage>-<key>`` snapshots (Parquet for fires, WKB for geometry)."""
+
+    def __init__(self, directory: Path | str | PathLike[str]) -> None:
+        self.directory = Path(directory)
+
+    def path(self, stage: str, key: str) -> Path:
+        return self.directory / f"{stage}-{key}{_SUFFIXES[stage]}"
+
+    def save(self, stage: str, key: str, value: Any) -> Path | None:
+        """Persist ``value`` atomically; values that cannot be stored are skipped."""
+
+        if stage == FIRES and not isinstance(value, pd.DataFrame):
+            return None  # streamed chunks are not kept
+        target = self.path(stage, key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                if stage == FIRES:
+                    value.to_parquet(fh, index=False)
+                else:
+                    fh.write(shapely.to_wkb(value))
+            os.replace(tmp_name, target)
+        except Exception as exc:
+            Path(tmp_name).unlink(missing_ok=True)
+            logger.warning("Não foi possível gravar o snapshot %s: %s", target, exc)
+            return None
+        return target
+
+    def load(self, stage: str, key: str) -> tuple[Any, float] | None:
+        """Return ``(value, age in seconds)`` of the stored snapshot, if any."""
+
+        target = self.path(stage, key)
+        try:
+            age = time.time() - target.stat().st_mtime
+            if stage == FIRES:
+                value: Any = pd.read_parquet(target)
+            else:
+                value = shapely.from_wkb(target.read_bytes())
+        except FileNotFoundError:
+            return None
+        except Exception as exc:
+            logger.warning("Snapshot inválido em %s: %s", target, exc)
+            return None
+        return value, age
+
+
+class _StageCall(threading.Thread):
+    def __init__(self, name: str, func: Callable[[], Any], on_success: Callable[[Any], None]) -> None:
+        super().__init__(name=f"etl-{name}", daemon=True)
+        self._func = func
+        self._on_success = on_success
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+    def run(self) -> None:
+        try:
+            self.result = self._func()
+        except BaseException as exc:  # noqa: BLE001 - reported to the caller
+            self.error = exc
+            return
+        try:
+            self._on_success(self.result)
+        except Exception as exc:  # pragma: no cover - save() already logs
+            logger.warning("Falha ao atualizar snapshot: %s", exc)
+
+    def cancel(self) -> None:
+        """Ask the cancel hooks to release what this call holds."""
+
+        if self.ident is None:
+            return
+        for hook in list(_cancel_hooks):
+            try:
+                hook(self.ident)
+            except Exception as exc:  # pragma: no cover - best effort at exit
+                logger.debug("Falha ao cancelar a etapa %s: %s", self.name, exc)
+
+
+def register_cancel_hook(hook: Callable[[int], Any]) -> None:
+    """Register ``hook(thread_id)``, called for each stage call abandoned at exit.
+
+    Extractors holding external resources (e.g. a browser) register a hook
+    that releases the resources used by the given thread.
+    """
+
+    if hook not in _cancel_hooks:
+        _cancel_hooks.append(hook)
+
+
+def wait_for_stages(timeout: float | None = None) -> bool:
+    """Wait for the late stage calls still running; return ``True`` when all finished."""
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with _inflight_lock:
+        pending = list(_inflight.values())
+    for call in pending:
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+        call.join(remaining)
+    return not any(call.is_alive() for call in pending)
+
+
+def _wait_at_exit() -> None:
+    with _inflight_lock:
+        pending = [call for call in _inflight.values() if call.is_alive()]
+    if not pending:
+        return
+    logger.info("Aguardando %s etapas em atualização antes de encerrar", len(pending))
+    if wait_for_stages(EXIT_STAGE_TIMEOUT):
+        return
+    for call in pending:
+        if call.is_alive():
+            logger.warning(
+                "Etapa %s não concluída em %.0f s; cancelada (o snapshot será atualizado na próxima execução)",
+                call.name,
+                EXIT_STAGE_TIMEOUT,
+            )
+            call.cancel()
+
+
+# Stage threads are daemons so a hung call cannot block exit forever;
+# atexit handlers run before daemon threads are killed.
+atexit.register(_wait_at_exit)
+
+
+def run_stage(
+    stage: str,
+    func: Callable[..., Any],
+    kwargs: Mapping[str, Any],
+    *,
+    budget: float | None,
+    store: SnapshotStore | None,
+) -> tuple[Any, bool]:
+    """Run ``func(**kwargs)`` within ``budget`` seconds, falling back to a snapshot.
+
+    Returns ``(value, stale)``. Without a budget the call is synchronous;
+    without a store failures and timeouts propagate as usual.
+    """
+
+    key = snapshot_key(kwargs)
+
+    def _save(value: Any) -> None:
+        if store is not None:
+            store.save(stage, key, value)
+
+    if budget is None:
+        try:
+            value = func(**kwargs)
+        except Exception as exc:
+            return _fallback(stage, key, store, exc), True
+        _save(value)
+        return value, False
+
+    inflight_key = (stage, key)
+    with _inflight_lock:
+        call = _inflight.get(inflight_key)
+        if call is None or not call.is_alive():
+            call = _StageCall(stage, lambda: func(**kwargs), _save)
+            _inflight[inflight_key] = call
+            call.start()
+        else:
+            logger.info("Etapa '%s' ainda em atualização desde a execução anterior; aguardando", stage)
+
+    call.join(budget)
+    if call.is_alive():
+        logger.warning(
+            "Etapa '%s' excedeu o orçamento de %.1f s; a atualização continua em segundo plano", stage, budget
+        )
+        return _fallback(stage, key, store, TimeoutError(f"stage '{stage}' exceeded {budget} s")), True
+
+    with _inflight_lock:
+        if _inflight.get(inflight_key) is call:
+            del _inflight[inflight_key]
+    if call.error is not None:
+        if not isinstance(call.error, Exception):
+            raise call.error
+        return _fallback(stage, key, store, call.error), True
+    return call.result, False
+
+
+def _fallback(stage: str, key: str, store: SnapshotStore | None, error: Exception) -> Any:
+    snapshot = store.load(stage, key) if store is not None else None
+    if snapshot is None:
+        if isinstance(error, TimeoutError):
+            raise StageUnavailable(f"stage '{stage}' is unavailable and has no snapshot") from error
+        raise error
+    value, age = snapshot
+    logger.warning("Etapa '%s' indisponível (%s); usando snapshot de %.0f min atrás", stage, error, age / 60)
+    return value
+
+
+__all__ = [
+    "EXIT_STAGE_TIMEOUT",
+    "FIRES",
+    "GEOMETRY",
+    "SnapshotStore",
+    "StageUnavailable",
+    "register_cancel_hook",
+    "run_stage",
+    "snapshot_key",
+    "wait_for_stages",
+]
@@ -0,0 +1,192 @@
+"""Geofence subscriptions: partners watching their own areas through their own webhooks.
+
+A :class:`SubscriptionRegistry` holds every subscriber's area and endpoint.
+Fires are matched against all areas in one pass over an STRtree of their
+envelopes (:func:`etl.transform.spatial.region_matches`), so the 100th
+subscriber adds its candidate points, not another scan of the fires. The
+alerts are then grouped per endpoint and each endpoint receives a single
+JSON ``POST``::
+
+    {"alerts": [{"subscriber": "...", "regionId": "...", "timestamp": "...", "lat": ..., "lng": ...}, ...]}
+
+The registry is a JSON list (see :meth:`SubscriptionRegistry.from_file`).
+In streaming mode the pipeline gathers the alerts of every chunk and sends
+them once the last chunk was processed, so each endpoint still gets one
+``POST`` per run.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from os import PathLike
+from pathlib import Path
+from typing import Any, Callable, Iterator, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+from shapely.geometry.base import BaseGeometry
+
+from .alerts import notification_params
+from .transform.spatial import region_matches
+from .utils import ensure_path, pick_timestamp_column
+
+logger = logging.getLogger(__name__)
+
+Sender = Callable[[str, list[dict[str, Any]]], Any]
+
+
+@dataclass(frozen=True, slots=True)
+class Subscription:
+    """One subscriber's area (lon/lat) and the webhook its alerts go to."""
+
+    subscriber: str
+    endpoint: str
+    geometry: BaseGeometry
+    region_id: str | None = None
+
+    @property
+    def alert_region(self) -> str:
+        return self.region_id if self.region_id is not None else self.subscriber
+
+
+class SubscriptionRegistry:
+    """Every subscription, matched against fires in a single indexed pass."""
+
+    def __init__(self, subscriptions: Sequence[Subscription]) -> None:
+        self.subscriptions = list(subscriptions)
+        self._geometries = [subscription.geometry for subscription in self.subscriptions]
+
+    @classmethod
+    def from_file(cls, path: Path | str | PathLike[str]) -> "SubscriptionRegistry":
+        """Read subscriptions from a JSON list of objects.
+
+        Each object needs ``subscriber``, ``endpoint`` and either
+        ``geometry_file`` (GeoJSON, relative to the JSON file) or an inline
+        GeoJSON ``geometry``; ``region_id`` is optional and defaults to the
+        subscriber name.
+        """
+
+        from shapely.geometry import shape
+
+        from .extract.prepared_geometry import load_geometry_file
+
+        source = ensure_path(path)
+        entries = json.loads(source.read_text(encoding="utf-8"))
+        if not isinstance(entries, list):
+            raise ValueError("subscriptions file must contain a JSON list")
+
+        subscriptions = []
+        for entry in entries:
+            entry = dict(entry)
+            geometry_file = entry.pop("geometry_file", None)
+            geometry = entry.pop("geometry", None)
+            if geometry_file is not None:
+                entry["geometry"] = load_geometry_file(source.parent / geometry_file).repaired
+            elif geometry is not None:
+                entry["geometry"] = shape(geometry)
+            else:
+                raise ValueError(f"subscription {entry.get('subscriber')!r} needs geometry_file or geometry")
+            subscriptions.append(Subscription(**entry))
+        logger.info("%s assinaturas carregadas de %s", len(subscriptions), source)
+        return cls(subscriptions)
+
+    def __len__(self) -> int:
+        return len(self.subscriptions)
+
+    def __iter__(self) -> Iterator[Subscription]:
+        return iter(self.subscriptions)
+
+    def match(self, points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Return ``(point_index, subscription_index)`` of every point inside a subscribed area."""
+
+        return region_matches(points, self._geometries)
+
+    def fan_out(self, df: pd.DataFrame) -> dict[str, list[dict[str, Any]]]:
+        """Return the alerts for ``df`` grouped per endpoint.
+
+        With cluster columns (:mod:`etl.transform.cluster`) each subscriber
+        gets one alert per cluster, preferring its representative.
+        """
+
+        if df.empty or not self.subscriptions or "geometry" not in df.columns:
+            return {}
+        points = np.asarray(df["geometry"].to_numpy(dtype=object), dtype=object)
+        rows, subscribers = self.match(np.where(pd.isna(points), None, points))
+        if "cluster_id" in df.columns and len(rows):
+            rows, subscribers = _one_per_cluster(df, rows, subscribers)
+        if not len(rows):
+            return {}
+
+        # Payloads are built once per matched fire, then copied per subscriber.
+        unique_rows, inverse = np.unique(rows, return_inverse=True)
+        matched = df.iloc[unique_rows].reset_index(drop=True)
+        params = dict(notification_params(matched, "", pick_timestamp_column(matched)))
+
+        alerts: dict[str, list[dict[str, Any]]] = {}
+        for position, index in zip(inverse.tolist(), subscribers.tolist()):
+            payload = params.get(position)
+            if payload is None:
+                continue
+            subscription = self.subscriptions[index]
+            alert = {**payload, "subscriber": subscription.subscriber, "regionId": subscription.alert_region}
+            alerts.setdefault(subscription.endpoint, []).append(alert)
+        return alerts
+
+
+def _one_per_cluster(df: pd.DataFrame, rows: np.ndarray, subscribers: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    clusters = df["cluster_id"].to_numpy()[rows]
+    if "cluster_representative" in df.columns:
+        representative = df["cluster_representative"].fillna(False).to_numpy(dtype=bool)[rows]
+    else:
+        representative = np.zeros(len(rows), dtype=bool)
+    order = np.lexsort((rows, ~representative, clusters, subscribers))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (subscribers[order][1:] != subscribers[order][:-1]) | (clusters[order][1:] != clusters[order][:-1])
+    keep = np.sort(order[first])
+    return rows[keep], subscribers[keep]
+
+
+def post_alerts(endpoint: str, alerts: list[dict[str, Any]], *, timeout: float = 10.0) -> int:
+    """Send ``alerts`` to ``endpoint`` as one JSON ``POST``; return the HTTP status."""
+
+    import urllib.request
+
+    body = json.dumps({"alerts": alerts}, ensure_ascii=False).encode("utf-8")
+    request = urllib.request.Request(
+        endpoint, data=body, headers={"Content-Type": "application/json; charset=utf-8"}, method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.getcode()
+
+
+def notify_subscribers(
+    df: pd.DataFrame,
+    registry: SubscriptionRegistry,
+    *,
+    sender: Sender | None = None,
+) -> dict[str, int]:
+    """Send every subscriber the fires inside its area; return the alert count per endpoint."""
+
+    grouped = registry.fan_out(df)
+    if not grouped:
+        logger.info("Nenhum foco dentro das áreas assinadas (%s assinaturas)", len(registry))
+        return {}
+    return send_alerts(grouped, sender=sender)
+
+
+def send_alerts(grouped: Mapping[str, list[dict[str, Any]]], *, sender: Sender | None = None) -> dict[str, int]:
+    """Send each endpoint its alerts (as returned by :meth:`SubscriptionRegistry.fan_out`) in one request."""
+
+    send = sender or post_alerts
+    for endpoint, alerts in grouped.items():
+        try:
+            status = send(endpoint, alerts)
+            logger.info("%s alertas enviados para %s (status=%s)", len(alerts), endpoint, status)
+        except Exception as exc:  # pragma: no cover - network errors are logged
+            logger.warning("Falha ao notificar %s: %s", endpoint, exc)
+    return {endpoint: len(alerts) for endpoint, alerts in grouped.items()}
+
+
+__all__ = ["Subscription", "SubscriptionRegistry", "notify_subscribers", "post_alerts", "send_alerts"]
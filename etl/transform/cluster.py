@@ -0,0 +1,248 @@
+"""Clustering of duplicate detections of the same fire.
+
+One fire is often reported by several satellites (``NPP-375``,
+``AQUA_M-T``, GOES...) within minutes and a few hundred metres. Points are
+hashed into grid cells of at least ``radius_m`` by ``window`` (latitude,
+longitude and time), so candidate pairs only come from the same or
+neighbouring cells; candidates are then checked with the haversine
+distance and the time gap, and connected with a vectorized union-find.
+Clusters are single-linkage: detections chained within the radius and
+window end up together.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import math
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from ..utils import TIMESTAMP_COLUMNS, first_present
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RADIUS_M = 500.0
+DEFAULT_WINDOW_MINUTES = 30.0
+EARTH_RADIUS_M = 6_371_008.8
+FRP_COLUMNS = ("FRP", "frp")
+# The 13 neighbouring cells "after" a cell; with the cell itself they cover every adjacent pair once.
+_FORWARD_OFFSETS = [offset for offset in itertools.product((-1, 0, 1), repeat=3) if offset > (0, 0, 0)]
+
+
+def _haversine_m(lon1: np.ndarray, lat1: np.ndarray, lon2: np.ndarray, lat2: np.ndarray) -> np.ndarray:
+    lon1, lat1, lon2, lat2 = (np.radians(values) for values in (lon1, lat1, lon2, lat2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+
+def _cell_pairs(
+    order: np.ndarray,
+    start: np.ndarray,
+    counts: np.ndarray,
+    src: np.ndarray,
+    dst: np.ndarray,
+    same: bool,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return every pair of points between cells ``src[k]`` and ``dst[k]`` (positions into ``order``)."""
+
+    sizes = counts[src] * counts[dst]
+    total = int(sizes.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    group = np.repeat(np.arange(len(src)), sizes)
+    local = np.arange(total) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    width = counts[dst][group]
+    a_local, b_local = local // width, local % width
+    if same:
+        keep = a_local < b_local
+        group, a_local, b_local = group[keep], a_local[keep], b_local[keep]
+    return order[start[src][group] + a_local], order[start[dst][group] + b_local]
+
+
+def candidate_pairs(cells: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return the pairs of rows of ``cells`` (integer ``(n, 3)`` cell indices) in the same or adjacent cells."""
+
+    if len(cells) < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    shifted = cells - cells.min(axis=0) + 1
+    spans = [int(value) for value in shifted.max(axis=0) + 2]
+    if math.prod(spans) >= 2**62:
+        raise ValueError("cluster grid too large; increase radius_m or window")
+    keys = (shifted[:, 0] * spans[1] + shifted[:, 1]) * spans[2] + shifted[:, 2]
+
+    order = np.argsort(keys, kind="stable")
+    unique, start, counts = np.unique(keys[order], return_index=True, return_counts=True)
+    cell_ids = np.arange(len(unique))
+
+    parts = [_cell_pairs(order, start, counts, cell_ids, cell_ids, same=True)]
+    for dx, dy, dt in _FORWARD_OFFSETS:
+        target = unique + (dx * spans[1] + dy) * spans[2] + dt
+        position = np.minimum(np.searchsorted(unique, target), len(unique) - 1)
+        hit = unique[position] == target
+        parts.append(_cell_pairs(order, start, counts, cell_ids[hit], position[hit], same=False))
+    return np.concatenate([a for a, _ in parts]), np.concatenate([b for _, b in parts])
+
+
+def connected_components(n: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Label the connected components of the graph with edges ``a[k]-b[k]``.
+
+    Each node gets the smallest node index of its component (union by
+    minimum root with full path compression, all edges at once).
+    """
+
+    parent = np.arange(n)
+    while len(a):
+        root_a, root_b = parent[a], parent[b]
+        pending = root_a != root_b
+        if not pending.any():
+            break
+        a, b = a[pending], b[pending]
+        low = np.minimum(root_a[pending], root_b[pending])
+        high = np.maximum(root_a[pending], root_b[pending])
+        np.minimum.at(parent, high, low)
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+    return parent
+
+
+def cluster_labels(
+    lon: np.ndarray,
+    lat: np.ndarray,
+    seconds: np.ndarray | None = None,
+    *,
+    radius_m: float = DEFAULT_RADIUS_M,
+    window_s: float = DEFAULT_WINDOW_MINUTES * 60.0,
+) -> np.ndarray:
+    """Return a cluster id (``0..k-1`` in order of first row) for every point.
+
+    Points with missing coordinates or time form clusters of their own.
+    """
+
+    if radius_m <= 0:
+        raise ValueError("radius_m must be positive")
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    times = np.zeros(len(lon)) if seconds is None else np.asarray(seconds, dtype=float)
+    valid = np.flatnonzero(np.isfinite(lon) & np.isfinite(lat) & np.isfinite(times))
+
+    a = b = np.empty(0, dtype=np.int64)
+    if len(valid) > 1:
+        v_lon, v_lat, v_time = lon[valid], lat[valid], times[valid]
+        # Cells at least radius_m wide everywhere: longitude degrees shrink towards the poles.
+        cell_lat = math.degrees(radius_m / EARTH_RADIUS_M)
+        widest = min(float(np.abs(v_lat).max()) + cell_lat, 89.0)
+        cell_lon = cell_lat / math.cos(math.radians(widest))
+        cell_time = window_s if seconds is not None and window_s > 0 else math.inf
+        cells = np.column_stack(
+            [
+                np.floor(v_lon / cell_lon),
+                np.floor(v_lat / cell_lat),
+                np.zeros(len(valid)) if math.isinf(cell_time) else np.floor(v_time / cell_time),
+            ]
+        ).astype(np.int64)
+        a, b = candidate_pairs(cells)
+        close = _haversine_m(v_lon[a], v_lat[a], v_lon[b], v_lat[b]) <= radius_m
+        if seconds is not None:
+            close &= np.abs(v_time[a] - v_time[b]) <= window_s
+        a, b = valid[a[close]], valid[b[close]]
+
+    roots = connected_components(len(lon), a, b)
+    _, labels = np.unique(roots, return_inverse=True)
+    return labels.astype(np.int64)
+
+
+def cluster_detections(
+    df: pd.DataFrame,
+    *,
+    radius_m: float = DEFAULT_RADIUS_M,
+    window_minutes: float | None = DEFAULT_WINDOW_MINUTES,
+    timestamp_column: str | None = None,
+    priority_columns: Sequence[str] = FRP_COLUMNS,
+    cluster_column: str = "cluster_id",
+    size_column: str = "cluster_size",
+    representative_column: str = "cluster_representative",
+    copy: bool = True,
+) -> pd.DataFrame:
+    """Group detections of the same fire and pick one representative row per group.
+
+    Parameters
+    ----------
+    df:
+        Frame with a ``geometry`` column of lon/lat points.
+    radius_m:
+        Maximum distance, in metres, between linked detections.
+    window_minutes:
+        Maximum time gap between linked detections; ``None`` clusters in
+        space only. Ignored when there is no timestamp column.
+    timestamp_column:
+        Detection time; TerraBrasilis headers (``Data / Hora``) are detected
+        automatically.
+    priority_columns:
+        The representative is the row with the highest value in the first of
+        these columns present (FRP by default), then the earliest detection.
+    cluster_column, size_column, representative_column:
+        Names of the added columns.
+    copy:
+        When ``False`` the columns are added to ``df`` itself.
+    """
+
+    values = np.asarray(df["geometry"].to_numpy(dtype=object), dtype=object)
+    values = np.where(pd.isna(values), None, values)
+    lon, lat = shapely.get_x(values), shapely.get_y(values)
+
+    timestamp_column = timestamp_column or first_present(df, TIMESTAMP_COLUMNS)
+    seconds = None
+    if timestamp_column is not None and window_minutes is not None:
+        stamps = pd.to_datetime(df[timestamp_column], utc=True, errors="coerce")
+        seconds = ((stamps - pd.Timestamp(0, tz="UTC")) / pd.Timedelta(seconds=1)).to_numpy(
+            dtype=float, na_value=np.nan
+        )
+    labels = cluster_labels(
+        lon, lat, seconds, radius_m=radius_m, window_s=(window_minutes or 0.0) * 60.0
+    )
+
+    # Representative: highest priority value, then earliest detection, then first row.
+    priority_column = next((column for column in priority_columns if column in df.columns), None)
+    priority = np.zeros(len(df))
+    if priority_column is not None:
+        priority = pd.to_numeric(df[priority_column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        priority = np.nan_to_num(priority, nan=-np.inf)
+    when = np.zeros(len(df)) if seconds is None else np.nan_to_num(seconds, nan=np.inf)
+    order = np.lexsort((np.arange(len(df)), when, -priority, labels))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = labels[order][1:] != labels[order][:-1]
+    representative = np.zeros(len(df), dtype=bool)
+    representative[order[first]] = True
+
+    sizes = np.bincount(labels, minlength=labels.max() + 1 if len(labels) else 0)
+    if len(df):
+        logger.info(
+            "%s focos agrupados em %s clusters (raio %.0f m, janela %s min)",
+            len(df),
+            int(representative.sum()),
+            radius_m,
+            window_minutes if seconds is not None else "-",
+        )
+
+    result = df.copy() if copy else df
+    result[cluster_column] = labels
+    result[size_column] = sizes[labels] if len(labels) else np.empty(0, dtype=np.int64)
+    result[representative_column] = representative
+    return result
+
+
+__all__ = [
+    "DEFAULT_RADIUS_M",
+    "DEFAULT_WINDOW_MINUTES",
+    "candidate_pairs",
+    "cluster_detections",
+    "cluster_labels",
+    "connected_components",
+]
@@ -0,0 +1,280 @@
+"""Run-to-run diff of fire tables using hashed row keys.
+
+Every row gets a 64-bit hash of its key columns (which detection it is) and
+one of its remaining columns (what it says). Both tables are sorted once by
+key hash and matched with ``searchsorted``, so a diff costs
+``O(n log n)`` array work instead of any pairwise row comparison: keys only
+in the current run are new detections, keys only in the previous run have
+vanished and matched keys whose attribute hash differs have changed (e.g.
+FRP or fire risk).
+
+The previous run is kept as a Parquet state file written after each diff.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from os import PathLike
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from ..utils import ensure_path, replace_file, resolve_key_columns
+
+logger = logging.getLogger(__name__)
+
+ADDED = "added"
+CHANGED = "changed"
+REMOVED = "removed"
+CHANGE_COLUMN = "change"
+CHANGED_COLUMNS_COLUMN = "changed_columns"
+STATE_SUFFIX = ".state.parquet"
+_MIX = np.uint64(0x100000001B3)
+_NUMERIC_KINDS = {"boolean", "floating", "integer", "mixed-integer-float", "decimal"}
+
+
+def _column_hash(series: pd.Series) -> np.ndarray:
+    """Hash ``series`` by value so that equal data hashes equally across runs and dtypes."""
+
+    dtype = series.dtype
+    numeric = pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype)
+    if dtype == object:
+        numeric = pd.api.types.infer_dtype(series, skipna=True) in _NUMERIC_KINDS
+    if numeric:
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        # -0.0 and every NaN payload hash like 0.0 and NaN.
+        values = np.where(values == 0, 0.0, values)
+        return pd.util.hash_array(values)
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        stamps = series if getattr(dtype, "tz", None) is None else series.dt.tz_convert("UTC").dt.tz_localize(None)
+        return pd.util.hash_array(stamps.dt.as_unit("ns").to_numpy(dtype="int64", na_value=np.iinfo(np.int64).min))
+    values = series.to_numpy(dtype=object, na_value="")
+    try:
+        # Detections are mostly unique strings: skip hash_array's factorization.
+        return pd.util.hash_array(values, categorize=False)
+    except TypeError:  # mixed objects (e.g. numbers in an object column)
+        return pd.util.hash_array(series.astype("string").fillna("").to_numpy(dtype=object), categorize=False)
+
+
+def row_hashes(df: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    """Combine the value hashes of ``columns`` into one ``uint64`` per row."""
+
+    combined = np.zeros(len(df), dtype=np.uint64)
+    for column in columns:
+        combined ^= _column_hash(df[column])
+        combined *= _MIX
+    return combined
+
+
+def _last_per_key(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(sorted unique keys, row of the last occurrence of each)``."""
+
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = sorted_keys[1:] != sorted_keys[:-1]
+    return sorted_keys[last], order[last]
+
+
+def _lookup(sorted_keys: np.ndarray, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(found, position in sorted_keys)`` for every key."""
+
+    position = np.searchsorted(sorted_keys, keys)
+    clipped = np.minimum(position, max(len(sorted_keys) - 1, 0))
+    found = position < len(sorted_keys)
+    if len(sorted_keys):
+        found &= sorted_keys[clipped] == keys
+    return found, clipped
+
+
+@dataclass(slots=True)
+class FrameDiff:
+    """Rows added, removed and changed between two runs.
+
+    ``added`` and ``changed`` hold current values (``changed`` also lists the
+    columns that differ in ``changed_columns``); ``removed`` holds the last
+    values seen for vanished detections.
+    """
+
+    added: pd.DataFrame
+    changed: pd.DataFrame
+    removed: pd.DataFrame
+
+    @property
+    def current(self) -> pd.DataFrame:
+        """New and changed rows, i.e. what downstream consumers need to act on."""
+
+        return pd.concat([self.added, self.changed.drop(columns=[CHANGED_COLUMNS_COLUMN])], ignore_index=True)
+
+    def counts(self) -> dict[str, int]:
+        return {ADDED: len(self.added), CHANGED: len(self.changed), REMOVED: len(self.removed)}
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return one frame with a ``change`` column, suitable as the delta output."""
+
+        parts = [
+            self.added.assign(**{CHANGE_COLUMN: ADDED}),
+            self.changed.assign(**{CHANGE_COLUMN: CHANGED}),
+            self.removed.assign(**{CHANGE_COLUMN: REMOVED}),
+        ]
+        frame = pd.concat([part for part in parts if len(part)] or parts[:1], ignore_index=True)
+        leading = [CHANGE_COLUMN, CHANGED_COLUMNS_COLUMN]
+        if CHANGED_COLUMNS_COLUMN not in frame.columns:
+            frame[CHANGED_COLUMNS_COLUMN] = None
+        return frame[leading + [column for column in frame.columns if column not in leading]]
+
+
+def diff_frames(
+    previous: pd.DataFrame | None,
+    current: pd.DataFrame,
+    *,
+    key_columns: Sequence[str] | None = None,
+    compare_columns: Sequence[str] | None = None,
+) -> FrameDiff:
+    """Compare two runs of the fire table.
+
+    Parameters
+    ----------
+    previous:
+        Table of the previous run; ``None`` makes every current row new.
+    current:
+        Table of this run.
+    key_columns:
+        Columns identifying a detection; defaults to the CSV append keys
+        (``Data / Hora``, ``Satélite``, ``Latitude``, ``Longitude`` when present).
+    compare_columns:
+        Columns whose change marks a row as changed; defaults to every other
+        column present in both tables except ``geometry``.
+    """
+
+    columns = [str(column) for column in current.columns]
+    keys_used = resolve_key_columns(columns, key_columns)
+    if previous is None:
+        previous = current.iloc[:0]
+    missing = [column for column in keys_used if column not in previous.columns]
+    if missing:
+        raise KeyError(f"key columns missing from the previous run: {missing}")
+    if compare_columns is None:
+        compare_columns = [
+            column
+            for column in columns
+            if column not in keys_used and column != "geometry" and column in previous.columns
+        ]
+    compare_columns = list(compare_columns)
+
+    current_keys, current_rows = _last_per_key(row_hashes(current, keys_used))
+    previous_keys, previous_rows = _last_per_key(row_hashes(previous, keys_used))
+
+    found, position = _lookup(previous_keys, current_keys)
+    matched_current = current_rows[found]
+    matched_previous = previous_rows[position[found]]
+    current_values = row_hashes(current, compare_columns)
+    previous_values = row_hashes(previous, compare_columns)
+    differs = current_values[matched_current] != previous_values[matched_previous]
+
+    still_there, _ = _lookup(current_keys, previous_keys)
+
+    changed_current = matched_current[differs]
+    order = np.argsort(changed_current)
+
+    added = current.iloc[np.sort(current_rows[~found])].reset_index(drop=True)
+    removed = previous.iloc[np.sort(previous_rows[~still_there])].reset_index(drop=True)
+    changed = _changed_rows(
+        current.iloc[changed_current[order]].reset_index(drop=True),
+        previous.iloc[matched_previous[differs][order]].reset_index(drop=True),
+        compare_columns,
+    )
+    return FrameDiff(added=added, changed=changed, removed=removed)
+
+
+def _changed_rows(current: pd.DataFrame, previous: pd.DataFrame, columns: Sequence[str]) -> pd.DataFrame:
+    if current.empty:
+        return current.assign(**{CHANGED_COLUMNS_COLUMN: pd.Series(dtype=object)})
+    # Only the changed rows are compared column by column, to name what changed.
+    flags = np.column_stack([_column_hash(current[column]) != _column_hash(previous[column]) for column in columns])
+    names = np.asarray(columns, dtype=object)
+    labels = [";".join(names[row]) for row in flags]
+    return current.assign(**{CHANGED_COLUMNS_COLUMN: labels})
+
+
+def state_path(delta_output: Path | str | PathLike[str]) -> Path:
+    """Return the state file kept next to ``delta_output``."""
+
+    target = ensure_path(delta_output)
+    return target.with_name(target.name + STATE_SUFFIX)
+
+
+def save_state(df: pd.DataFrame, path: Path | str | PathLike[str]) -> Path:
+    """Persist ``df`` atomically as the previous run (geometries as WKB)."""
+
+    target = ensure_path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    frame = pd.DataFrame(df, copy=False)
+    if "geometry" in frame.columns:
+        values = np.asarray(frame["geometry"].to_numpy(dtype=object), dtype=object)
+        frame = frame.assign(geometry=shapely.to_wkb(np.where(pd.isna(values), None, values)))
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            frame.to_parquet(fh, index=False)
+        replace_file(tmp_name, target)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return target
+
+
+def load_state(path: Path | str | PathLike[str]) -> pd.DataFrame | None:
+    """Return the previous run saved by :func:`save_state`, or ``None``."""
+
+    target = ensure_path(path)
+    try:
+        frame = pd.read_parquet(target)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:
+        logger.warning("Estado anterior inválido em %s: %s", target, exc)
+        return None
+    if "geometry" in frame.columns:
+        frame["geometry"] = shapely.from_wkb(frame["geometry"].to_numpy(dtype=object))
+    return frame
+
+
+def diff_with_state(
+    current: pd.DataFrame,
+    path: Path | str | PathLike[str],
+    *,
+    key_columns: Sequence[str] | None = None,
+    compare_columns: Sequence[str] | None = None,
+) -> FrameDiff:
+    """Diff ``current`` against the run stored at ``path`` and store ``current`` there."""
+
+    previous = load_state(path)
+    diff = diff_frames(previous, current, key_columns=key_columns, compare_columns=compare_columns)
+    try:
+        save_state(current, path)
+    except Exception as exc:
+        logger.warning("Não foi possível gravar o estado %s: %s", path, exc)
+    return diff
+
+
+__all__ = [
+    "ADDED",
+    "CHANGED",
+    "CHANGE_COLUMN",
+    "CHANGED_COLUMNS_COLUMN",
+    "FrameDiff",
+    "REMOVED",
+    "diff_frames",
+    "diff_with_state",
+    "load_state",
+    "row_hashes",
+    "save_state",
+    "state_path",
+]
@@ -0,0 +1,228 @@
+"""Precomputed grid classification of points against a fixed polygon.
+
+The polygon bounds are split into square cells labelled fully inside, fully
+outside or boundary. Points falling in the first two kinds are answered with
+an array lookup; only points in boundary cells go through the exact prepared
+``intersects`` test, so results match :func:`mark_points_inside` exactly.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from os import PathLike
+from pathlib import Path
+
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+logger = logging.getLogger(__name__)
+
+OUTSIDE = np.uint8(0)
+INSIDE = np.uint8(1)
+BOUNDARY = np.uint8(2)
+
+DEFAULT_RESOLUTION = 256
+GRID_SUFFIX = ".grid.npz"
+# Cells are grown by this fraction of their size before being labelled, so a
+# point nudged into a neighbouring cell by rounding is still classified safely.
+_CELL_MARGIN = 1e-6
+MEMO_SIZE = 8
+
+_memo: OrderedDict[tuple[str, int], "ClassificationGrid"] = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def geometry_fingerprint(geometry: BaseGeometry) -> str:
+    """Return a stable hash of ``geometry`` used to name and validate grids."""
+
+    return hashlib.sha1(shapely.to_wkb(geometry, hex=False, byte_order=1)).hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
+class ClassificationGrid:
+    """Cell labels over the bounds of ``geometry``.
+
+    ``cells`` carries a one-cell :data:`OUTSIDE` border: ``cells[row + 1, col + 1]``
+    covers ``x`` from ``origin_x + col * cell_size`` and ``y`` from
+    ``origin_y + row * cell_size``, one cell wide. Points beyond the grid (or
+    with NaN coordinates) are clamped onto the border.
+    """
+
+    geometry: BaseGeometry
+    origin: tuple[float, float]
+    cell_size: float
+    cells: np.ndarray
+    fingerprint: str
+
+    @classmethod
+    def build(cls, geometry: BaseGeometry, *, resolution: int = DEFAULT_RESOLUTION) -> "ClassificationGrid":
+        """Label a grid of at most ``resolution`` cells along the longest side."""
+
+        minx, miny, maxx, maxy = geometry.bounds
+        cell_size = max(maxx - minx, maxy - miny) / resolution or 1.0
+        # One spare cell past the max edge keeps points on it (after rounding)
+        # off the outside border.
+        cols = int((maxx - minx) / cell_size) + 2
+        rows = int((maxy - miny) / cell_size) + 2
+
+        col_edges = minx + np.arange(cols + 1) * cell_size
+        row_edges = miny + np.arange(rows + 1) * cell_size
+        margin = cell_size * _CELL_MARGIN
+        x0, y0 = np.meshgrid(col_edges[:-1] - margin, row_edges[:-1] - margin)
+        x1, y1 = np.meshgrid(col_edges[1:] + margin, row_edges[1:] + margin)
+        boxes = shapely.box(x0, y0, x1, y1)
+
+        shapely.prepare(geometry)
+        labels = np.full((rows, cols), BOUNDARY, dtype=np.uint8)
+        labels[shapely.contains(geometry, boxes)] = INSIDE
+        labels[~shapely.intersects(geometry, boxes)] = OUTSIDE
+        cells = np.pad(labels, 1, constant_values=OUTSIDE)
+
+        return cls(
+            geometry=geometry,
+            origin=(float(minx), float(miny)),
+            cell_size=float(cell_size),
+            cells=cells,
+            fingerprint=geometry_fingerprint(geometry),
+        )
+
+    def classify(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Return whether each point intersects the geometry."""
+
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        rows, cols = self.cells.shape
+        scale = 1.0 / self.cell_size
+
+        # Offsets are shifted by one cell for the border and clamped onto it,
+        # so points beyond the grid or with NaN coordinates read OUTSIDE.
+        with np.errstate(invalid="ignore", over="ignore"):
+            fx = np.subtract(xs, self.origin[0])
+            fx *= scale
+            fx += 1.0
+            np.clip(fx, 0, cols - 1, out=fx)
+            fy = np.subtract(ys, self.origin[1])
+            fy *= scale
+            fy += 1.0
+            np.clip(fy, 0, rows - 1, out=fy)
+            np.floor(fy, out=fy)
+            fy *= cols
+            fy += fx
+            flat_index = fy.astype(np.intp)
+        labels = np.take(self.cells.ravel(), flat_index, mode="clip")
+
+        result = labels == INSIDE
+        boundary = labels == BOUNDARY
+        if boundary.any():
+            shapely.prepare(self.geometry)
+            result[boundary] = shapely.intersects_xy(self.geometry, xs[boundary], ys[boundary])
+        return result
+
+    def save(self, path: Path | str | PathLike[str]) -> Path:
+        """Persist the grid atomically as ``.npz``."""
+
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                np.savez_compressed(
+                    fh,
+                    cells=self.cells,
+                    origin=np.asarray(self.origin),
+                    cell_size=np.asarray(self.cell_size),
+                    fingerprint=np.asarray(self.fingerprint),
+                )
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        return target
+
+    @classmethod
+    def load(cls, path: Path | str | PathLike[str], geometry: BaseGeometry) -> "ClassificationGrid | None":
+        """Load a grid saved for ``geometry``; ``None`` if it was built for another one."""
+
+        with np.load(path) as data:
+            fingerprint = str(data["fingerprint"])
+            if fingerprint != geometry_fingerprint(geometry):
+                return None
+            return cls(
+                geometry=geometry,
+                origin=tuple(float(value) for value in data["origin"]),  # type: ignore[arg-type]
+                cell_size=float(data["cell_size"]),
+                cells=data["cells"],
+                fingerprint=fingerprint,
+            )
+
+
+def grid_for(
+    geometry: BaseGeometry,
+    directory: Path | str | PathLike[str] | None = None,
+    *,
+    resolution: int = DEFAULT_RESOLUTION,
+) -> ClassificationGrid:
+    """Return the grid of ``geometry``, building and persisting it on first use.
+
+    Grids are memoized per process and, when ``directory`` is given, stored
+    there as ``<geometry hash>.grid.npz`` (next to the cached geometries).
+    """
+
+    fingerprint = geometry_fingerprint(geometry)
+    memo_key = (fingerprint, resolution)
+    with _memo_lock:
+        grid = _memo.get(memo_key)
+        if grid is not None:
+            _memo.move_to_end(memo_key)
+            return grid
+
+    path = Path(directory) / f"{fingerprint}-{resolution}{GRID_SUFFIX}" if directory is not None else None
+    grid = None
+    if path is not None and path.exists():
+        try:
+            grid = ClassificationGrid.load(path, geometry)
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("Grade de classificação inválida em %s: %s", path, exc)
+    if grid is None:
+        grid = ClassificationGrid.build(geometry, resolution=resolution)
+        logger.info(
+            "Grade de classificação construída (%sx%s células, %.1f%% de borda)",
+            *grid.cells.shape,
+            100.0 * float((grid.cells == BOUNDARY).mean()),
+        )
+        if path is not None:
+            try:
+                grid.save(path)
+            except OSError as exc:
+                logger.warning("Não foi possível gravar a grade %s: %s", path, exc)
+
+    with _memo_lock:
+        _memo[memo_key] = grid
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    return grid
+
+
+def clear_memo() -> None:
+    """Drop every grid memoized in this process."""
+
+    with _memo_lock:
+        _memo.clear()
+
+
+__all__ = [
+    "BOUNDARY",
+    "ClassificationGrid",
+    "INSIDE",
+    "OUTSIDE",
+    "clear_memo",
+    "geometry_fingerprint",
+    "grid_for",
+]
@@ -0,0 +1,125 @@
+"""Process-parallel point-in-polygon tests for large coordinate arrays.
+
+The coordinates and the boolean result live in shared memory: workers get
+the geometry once (as WKB, prepared in the pool initializer) and then only
+receive ``(start, stop)`` shard bounds, so nothing is pickled per point.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+logger = logging.getLogger(__name__)
+
+# Below this many points the pool start-up costs more than it saves.
+PARALLEL_THRESHOLD = 500_000
+SHARDS_PER_WORKER = 4
+
+_worker_state: dict[str, object] = {}
+
+
+def _attach(name: str, length: int, dtype: type) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    try:
+        block = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13; workers share the parent's resource tracker
+        block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray((length,), dtype=dtype, buffer=block.buf)
+
+
+def _init_worker(wkb: bytes, names: tuple[str, str, str], length: int) -> None:
+    geometry = shapely.from_wkb(wkb)
+    shapely.prepare(geometry)
+    blocks = [_attach(name, length, dtype) for name, dtype in zip(names, (np.float64, np.float64, np.bool_))]
+    _worker_state.update(
+        geometry=geometry,
+        blocks=[block for block, _ in blocks],
+        arrays=[array for _, array in blocks],
+    )
+
+
+def _run_shard(bounds: tuple[int, int]) -> int:
+    start, stop = bounds
+    xs, ys, out = _worker_state["arrays"]  # type: ignore[misc]
+    out[start:stop] = shapely.intersects_xy(_worker_state["geometry"], xs[start:stop], ys[start:stop])
+    return stop - start
+
+
+def resolve_workers(workers: int | None) -> int:
+    """Return the process count for ``workers`` (``None`` or ``0`` means every CPU)."""
+
+    if workers is None or workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def intersects_xy(
+    geometry: BaseGeometry,
+    xs: np.ndarray,
+    ys: np.ndarray,
+    *,
+    workers: int | None = None,
+    threshold: int = PARALLEL_THRESHOLD,
+) -> np.ndarray:
+    """Return whether each ``(xs[i], ys[i])`` point intersects ``geometry``.
+
+    Parameters
+    ----------
+    geometry:
+        Polygon (or any geometry) tested against the points.
+    xs, ys:
+        Point coordinates. NaN coordinates yield ``False``.
+    workers:
+        Process count; ``None``/``0`` uses every CPU and ``1`` disables the pool.
+    threshold:
+        Minimum number of points before a process pool is used; above it
+        the pool has ``workers`` processes.
+    """
+
+    xs = np.ascontiguousarray(xs, dtype=np.float64)
+    ys = np.ascontiguousarray(ys, dtype=np.float64)
+    if xs.shape != ys.shape or xs.ndim != 1:
+        raise ValueError("xs and ys must be one-dimensional arrays of the same length")
+
+    length = len(xs)
+    processes = min(resolve_workers(workers), length)
+    if processes <= 1 or length < threshold:
+        shapely.prepare(geometry)
+        return shapely.intersects_xy(geometry, xs, ys)
+
+    blocks: list[shared_memory.SharedMemory] = []
+    try:
+        for source in (xs, ys):
+            block = shared_memory.SharedMemory(create=True, size=max(source.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(source.shape, dtype=np.float64, buffer=block.buf)[:] = source
+        out_block = shared_memory.SharedMemory(create=True, size=max(length, 1))
+        blocks.append(out_block)
+
+        shard = -(-length // (processes * SHARDS_PER_WORKER))
+        bounds = [(start, min(start + shard, length)) for start in range(0, length, shard)]
+        logger.info("Teste ponto-em-polígono em %s processos (%s pontos, %s blocos)", processes, length, len(bounds))
+
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(shapely.to_wkb(geometry), tuple(block.name for block in blocks), length),
+        ) as pool:
+            processed = sum(pool.map(_run_shard, bounds))
+        if processed != length:  # pragma: no cover - defensive
+            raise RuntimeError(f"parallel intersects processed {processed} of {length} points")
+
+        return np.ndarray((length,), dtype=np.bool_, buffer=out_block.buf).copy()
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+__all__ = ["PARALLEL_THRESHOLD", "intersects_xy", "resolve_workers"]
@@ -2,23 +2,32 @@
 
 from __future__ import annotations
 
-from collections.abc import Iterable, Mapping
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from os import PathLike
 from typing import Any
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+import shapely
 from shapely.geometry.base import BaseGeometry
 
 GeometryLike = Any
 
 
-def _to_geodataframe(df: pd.DataFrame | gpd.GeoDataFrame) -> gpd.GeoDataFrame:
-    """Return a GeoDataFrame copy ensuring the geometry column exists."""
+def _to_geodataframe(df: pd.DataFrame | gpd.GeoDataFrame, copy: bool = True) -> gpd.GeoDataFrame:
+    """Return a GeoDataFrame ensuring the geometry column exists.
+
+    With ``copy=False`` the result shares the column buffers of ``df``; new
+    columns are added to the returned frame only.
+    """
     if isinstance(df, gpd.GeoDataFrame):
-        return df.copy()
+        return df.copy() if copy else df.copy(deep=False)
     if "geometry" not in df.columns:
         raise ValueError("input DataFrame must contain a 'geometry' column")
-    return gpd.GeoDataFrame(df.copy(), geometry="geometry")
+    if copy:
+        return gpd.GeoDataFrame(df.copy(), geometry="geometry")
+    return gpd.GeoDataFrame(df, geometry="geometry", copy=False)
 
 
 def _geometries_from_input(
@@ -35,16 +44,17 @@ def _geometries_from_input(
         return None, {"inside": geom}
 
     if isinstance(geom, gpd.GeoSeries):
-        series = geom.copy()
-        index = getattr(series, "index", None)
+        index = getattr(geom, "index", None)
         if index is None:
             raise ValueError("GeoSeries used as geometry input must have a valid index")
+        # A shallow copy is enough: only the index is replaced.
+        series = geom.copy(deep=False)
         index_values = [str(value) for value in index]
         series.index = index_values
         return series, None
 
     if isinstance(geom, gpd.GeoDataFrame):
-        series = geom.geometry.copy()
+        series = geom.geometry.copy(deep=False)
         if "name" in geom.columns:
             names = [str(value) for value in geom["name"]]
             series.index = names
@@ -90,6 +100,10 @@ def _check_crs(gdf: gpd.GeoDataFrame, geom_series: gpd.GeoSeries | None) -> None
 def mark_points_inside(
     df: pd.DataFrame | gpd.GeoDataFrame,
     geom: GeometryLike,
+    *,
+    copy: bool = True,
+    workers: int | None = 1,
+    grid: bool | str | PathLike[str] | None = None,
 ) -> gpd.GeoDataFrame:
     """Return a GeoDataFrame with boolean columns marking points inside geometries.
 
@@ -101,21 +115,122 @@ def mark_points_inside(
         Single geometry, collection or mapping of geometries. When multiple geometries
         are provided, each will result in a boolean column indicating whether a point
         lies inside/intersects the respective geometry.
+    copy:
+        When ``False`` the returned GeoDataFrame shares the column buffers of
+        ``df`` instead of copying them; ``df`` itself is left unchanged.
+    workers:
+        Processes used to test point geometries (see
+        :func:`etl.transform.parallel.intersects_xy`). ``None`` or ``0`` uses
+        every CPU once the input is large enough; ``1`` stays single-process.
+    grid:
+        Classify point geometries through a precomputed
+        :class:`etl.transform.grid.ClassificationGrid`. ``True`` keeps the grid
+        in memory; a directory also persists it there. Results are identical.
     """
 
-    gdf = _to_geodataframe(df)
+    gdf = _to_geodataframe(df, copy=copy)
     geom_series, geom_mapping = _geometries_from_input(geom)
 
     if geom_series is not None:
         _check_crs(gdf, geom_series)
-        for name, geometry in geom_series.items():
-            gdf[name] = gdf.geometry.intersects(geometry)
+        items = list(geom_series.items())
+    else:
+        assert geom_mapping is not None
+        items = list(geom_mapping.items())
+
+    if len(items) > 1 and workers == 1 and not grid:
+        membership = points_in_regions(np.asarray(gdf.geometry.values), [geometry for _, geometry in items])
+        for column, (name, _) in enumerate(items):
+            gdf[name] = pd.Series(membership[:, column], index=gdf.index)
         return gdf
 
-    assert geom_mapping is not None
-    for name, geometry in geom_mapping.items():
-        gdf[name] = gdf.geometry.intersects(geometry)
+    intersects = _point_intersects(gdf, workers, grid)
+    for name, geometry in items:
+        gdf[name] = intersects(geometry)
     return gdf
 
 
-__all__ = ["mark_points_inside"]
+def region_matches(points: np.ndarray, regions: Sequence[BaseGeometry]) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(point_index, region_index)`` of every point intersecting a region.
+
+    The regions' envelopes go into an STRtree queried once with every point;
+    only the candidate pairs are tested exactly against the (prepared) region.
+    Adding a region therefore costs its candidates, not another full pass.
+    Pairs are ordered by region, then point.
+
+    Parameters
+    ----------
+    points:
+        Array of shapely geometries (usually points); missing values never match.
+    regions:
+        Geometries in the same CRS as ``points``.
+    """
+
+    points = np.asarray(points, dtype=object)
+    if not len(points) or not len(regions):
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    tree = shapely.STRtree(shapely.envelope(np.asarray(regions, dtype=object)))
+    point_index, region_index = tree.query(points)
+    order = np.lexsort((point_index, region_index))
+    point_index, region_index = point_index[order], region_index[order]
+    bounds = np.searchsorted(region_index, np.arange(len(regions) + 1))
+
+    keep = np.zeros(len(point_index), dtype=bool)
+    for column, region in enumerate(regions):
+        start, stop = bounds[column], bounds[column + 1]
+        if stop > start:
+            shapely.prepare(region)
+            keep[start:stop] = shapely.intersects(region, points[point_index[start:stop]])
+    return point_index[keep], region_index[keep]
+
+
+def points_in_regions(points: np.ndarray, regions: Sequence[BaseGeometry]) -> np.ndarray:
+    """Return a ``(len(points), len(regions))`` matrix of ``intersects`` results.
+
+    Dense form of :func:`region_matches`.
+    """
+
+    membership = np.zeros((len(points), len(regions)), dtype=bool)
+    point_index, region_index = region_matches(points, regions)
+    membership[point_index, region_index] = True
+    return membership
+
+
+def _point_intersects(
+    gdf: gpd.GeoDataFrame,
+    workers: int | None,
+    grid: bool | str | PathLike[str] | None,
+) -> Callable[[BaseGeometry], Any]:
+    """Return the predicate used by :func:`mark_points_inside` for ``gdf``."""
+
+    if workers == 1 and not grid:
+        return gdf.geometry.intersects
+
+    values = gdf.geometry.values
+    types = shapely.get_type_id(np.asarray(values))
+    if not np.isin(types, (-1, 0)).all():  # only missing geometries and points
+        return gdf.geometry.intersects
+
+    xs = shapely.get_x(np.asarray(values))
+    ys = shapely.get_y(np.asarray(values))
+
+    if grid:
+        from .grid import grid_for
+
+        directory = None if grid is True else grid
+
+        def _intersects(geometry: BaseGeometry) -> pd.Series:
+            return pd.Series(grid_for(geometry, directory).classify(xs, ys), index=gdf.index)
+
+        return _intersects
+
+    from .parallel import intersects_xy
+
+    def _intersects(geometry: BaseGeometry) -> pd.Series:
+        return pd.Series(intersects_xy(geometry, xs, ys, workers=workers), index=gdf.index)
+
+    return _intersects
+
+
+__all__ = ["mark_points_inside", "points_in_regions", "region_matches"]
@@ -0,0 +1,279 @@
+"""Metric distance bands (alert zones) around an area.
+
+Distances are measured in the local UTM zone of the area. The projected
+polygon and its outer buffer are built once per geometry/band set, memoized
+and optionally persisted, so classifying a batch of points costs one
+coordinate transform, one prepared ``intersects_xy`` pre-filter and a
+``shapely.distance`` call restricted to the points near the area.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from os import PathLike
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+from .grid import geometry_fingerprint
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BANDS_KM = (1.0, 5.0, 10.0)
+INSIDE_LABEL = "inside"
+ZONES_SUFFIX = ".zones.npz"
+# The buffer approximates arcs with chords, so the pre-filter is grown a bit
+# to never drop a point that lies within the last band.
+_BUFFER_SLACK = 1.01
+MEMO_SIZE = 8
+
+_memo: OrderedDict[tuple[str, tuple[float, ...]], "DistanceZones"] = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def utm_epsg(lon: float, lat: float) -> int:
+    """Return the EPSG code of the WGS 84 UTM zone containing ``(lon, lat)``."""
+
+    zone = min(int((lon + 180.0) // 6.0) + 1, 60)
+    return (32600 if lat >= 0 else 32700) + zone
+
+
+def band_labels(bands_m: Sequence[float]) -> list[str]:
+    """Return the label of every band, e.g. ``["0-1 km", "1-5 km"]``."""
+
+    edges = [0.0, *bands_m]
+    return [f"{_km(low)}-{_km(high)} km" for low, high in zip(edges[:-1], edges[1:])]
+
+
+def _km(meters: float) -> str:
+    return f"{meters / 1000:g}"
+
+
+@dataclass(frozen=True, slots=True)
+class DistanceZones:
+    """Projected area, its buffers and the band edges (in meters)."""
+
+    epsg: int
+    area: BaseGeometry
+    reach: BaseGeometry
+    bands_m: tuple[float, ...]
+    fingerprint: str
+
+    @classmethod
+    def build(cls, geometry: BaseGeometry, bands_km: Sequence[float] = DEFAULT_BANDS_KM) -> "DistanceZones":
+        """Project ``geometry`` (lon/lat) to its UTM zone and buffer it by the last band."""
+
+        bands_m = tuple(sorted(float(band) * 1000.0 for band in bands_km))
+        if not bands_m or bands_m[0] <= 0:
+            raise ValueError("bands_km must contain positive distances")
+
+        centroid = geometry.centroid
+        epsg = utm_epsg(centroid.x, centroid.y)
+        area = _project(geometry, epsg)
+        reach = area.buffer(bands_m[-1] * _BUFFER_SLACK)
+        shapely.prepare(area)
+        shapely.prepare(reach)
+        return cls(epsg=epsg, area=area, reach=reach, bands_m=bands_m, fingerprint=geometry_fingerprint(geometry))
+
+    def classify(self, lon: np.ndarray, lat: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Return ``(zone, distance_m)`` for every lon/lat point.
+
+        ``zone`` is ``"inside"``, one of :func:`band_labels` or ``None`` beyond
+        the last band (or for missing coordinates). ``distance_m`` is the
+        distance to the area boundary for points inside or within the bands
+        and NaN otherwise.
+        """
+
+        x, y = _transformer(self.epsg).transform(np.asarray(lon, dtype=float), np.asarray(lat, dtype=float))
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+
+        zone = np.full(x.shape, None, dtype=object)
+        distance = np.full(x.shape, np.nan)
+
+        near = shapely.intersects_xy(self.reach, x, y)
+        if not near.any():
+            return zone, distance
+
+        points = shapely.points(x[near], y[near])
+        inside = shapely.intersects(self.area, points)
+        near_distance = shapely.distance(self.area, points)
+        # Inside points are 0 m from the area; report how far they are from its edge.
+        if inside.any():
+            near_distance[inside] = shapely.distance(self.area.boundary, points[inside])
+
+        labels = np.array(band_labels(self.bands_m) + [None], dtype=object)
+        near_zone = labels[np.searchsorted(np.asarray(self.bands_m), near_distance, side="left")]
+        near_zone[inside] = INSIDE_LABEL
+        beyond = near_zone == None  # noqa: E711 - element-wise comparison
+        near_distance[beyond] = np.nan
+
+        zone[near] = near_zone
+        distance[near] = near_distance
+        return zone, distance
+
+    def save(self, path: Path | str | PathLike[str]) -> Path:
+        """Persist the projected geometries atomically as ``.npz``."""
+
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                np.savez(
+                    fh,
+                    epsg=np.asarray(self.epsg),
+                    area=np.frombuffer(shapely.to_wkb(self.area), dtype=np.uint8),
+                    reach=np.frombuffer(shapely.to_wkb(self.reach), dtype=np.uint8),
+                    bands_m=np.asarray(self.bands_m),
+                    fingerprint=np.asarray(self.fingerprint),
+                )
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        return target
+
+    @classmethod
+    def load(cls, path: Path | str | PathLike[str], geometry: BaseGeometry) -> "DistanceZones | None":
+        """Load zones saved for ``geometry``; ``None`` if they belong to another one."""
+
+        with np.load(path) as data:
+            fingerprint = str(data["fingerprint"])
+            if fingerprint != geometry_fingerprint(geometry):
+                return None
+            area = shapely.from_wkb(data["area"].tobytes())
+            reach = shapely.from_wkb(data["reach"].tobytes())
+            shapely.prepare(area)
+            shapely.prepare(reach)
+            return cls(
+                epsg=int(data["epsg"]),
+                area=area,
+                reach=reach,
+                bands_m=tuple(float(value) for value in data["bands_m"]),
+                fingerprint=fingerprint,
+            )
+
+
+def _transformer(epsg: int):
+    from pyproj import Transformer
+
+    return Transformer.from_crs(4326, epsg, always_xy=True)
+
+
+def _project(geometry: BaseGeometry, epsg: int) -> BaseGeometry:
+    transformer = _transformer(epsg)
+
+    def _apply(coords: np.ndarray) -> np.ndarray:
+        x, y = transformer.transform(coords[:, 0], coords[:, 1])
+        return np.column_stack([x, y])
+
+    return shapely.transform(geometry, _apply)
+
+
+def zones_for(
+    geometry: BaseGeometry,
+    bands_km: Sequence[float] = DEFAULT_BANDS_KM,
+    directory: Path | str | PathLike[str] | None = None,
+) -> DistanceZones:
+    """Return the zones of ``geometry``, building and persisting them on first use."""
+
+    fingerprint = geometry_fingerprint(geometry)
+    bands_key = tuple(sorted(float(band) for band in bands_km))
+    memo_key = (fingerprint, bands_key)
+    with _memo_lock:
+        zones = _memo.get(memo_key)
+        if zones is not None:
+            _memo.move_to_end(memo_key)
+            return zones
+
+    suffix = "_".join(f"{band:g}" for band in bands_key)
+    path = Path(directory) / f"{fingerprint}-{suffix}km{ZONES_SUFFIX}" if directory is not None else None
+    zones = None
+    if path is not None and path.exists():
+        try:
+            zones = DistanceZones.load(path, geometry)
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("Faixas de distância inválidas em %s: %s", path, exc)
+    if zones is None:
+        zones = DistanceZones.build(geometry, bands_key)
+        logger.info("Faixas de distância construídas em EPSG:%s (%s)", zones.epsg, band_labels(zones.bands_m))
+        if path is not None:
+            try:
+                zones.save(path)
+            except OSError as exc:
+                logger.warning("Não foi possível gravar as faixas de distância %s: %s", path, exc)
+
+    with _memo_lock:
+        _memo[memo_key] = zones
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    return zones
+
+
+def clear_memo() -> None:
+    """Drop every zone set memoized in this process."""
+
+    with _memo_lock:
+        _memo.clear()
+
+
+def mark_distance_bands(
+    df: pd.DataFrame,
+    geom: BaseGeometry,
+    *,
+    bands_km: Sequence[float] = DEFAULT_BANDS_KM,
+    directory: Path | str | PathLike[str] | None = None,
+    zone_column: str = "zone",
+    distance_column: str = "distance_to_boundary_m",
+    copy: bool = True,
+) -> pd.DataFrame:
+    """Add the alert zone and the distance to the area boundary of every point.
+
+    Parameters
+    ----------
+    df:
+        Frame with a ``geometry`` column of lon/lat points (EPSG:4326).
+    geom:
+        Area in lon/lat.
+    bands_km:
+        Upper edges of the distance bands, e.g. ``(1, 5, 10)`` for
+        ``0-1 km``, ``1-5 km`` and ``5-10 km``.
+    directory:
+        Where the projected geometries are persisted (e.g. the reserve cache dir).
+    zone_column, distance_column:
+        Names of the added columns.
+    copy:
+        When ``False`` the columns are added to ``df`` itself.
+    """
+
+    values = np.asarray(df["geometry"].to_numpy(dtype=object), dtype=object)
+    values = np.where(pd.isna(values), None, values)
+    zones = zones_for(geom, bands_km, directory)
+    zone, distance = zones.classify(shapely.get_x(values), shapely.get_y(values))
+
+    result = df.copy() if copy else df
+    result[zone_column] = zone
+    result[distance_column] = distance
+    return result
+
+
+__all__ = [
+    "DEFAULT_BANDS_KM",
+    "DistanceZones",
+    "INSIDE_LABEL",
+    "band_labels",
+    "clear_memo",
+    "mark_distance_bands",
+    "utm_epsg",
+    "zones_for",
+]
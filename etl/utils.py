@@ -0,0 +1,290 @@
+"""Small helpers shared by the extract, transform and load packages.
+
+Everything here is importable without pandas or numpy (they are imported
+inside the functions that need them), so :mod:`etl.pipeline` can use these
+helpers at import time without slowing down ``--help``.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import stat
+import tempfile
+from os import PathLike
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Sequence
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import numpy as np
+    import pandas as pd
+
+TIMESTAMP_COLUMNS = ("Data / Hora", "data / hora", "data_hora", "data_hora_gmt")
+SATELLITE_COLUMNS = ("Satélite", "satélite", "satelite", "satellite")
+DEFAULT_KEY_COLUMNS = ("Data / Hora", "Satélite", "Latitude", "Longitude")
+COORDINATE_COLUMNS = ("latitude", "longitude", "lat", "lon", "lng")
+# Six decimal places are ~0.1 m, well below the satellites' resolution.
+COORDINATE_PRECISION = 6
+
+_TIMESTAMP_NAMES = frozenset(column.lower() for column in TIMESTAMP_COLUMNS)
+
+try:  # pragma: no cover - platform dependent
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+
+def ensure_path(path: Path | str | PathLike[str]) -> Path:
+    """Return ``path`` as :class:`pathlib.Path` enforcing valid types."""
+
+    if isinstance(path, Path):
+        return path
+    if isinstance(path, (str, PathLike)):
+        return Path(path)
+    raise TypeError("path must be a string, Path or os.PathLike instance")
+
+
+def output_signature(path: Path | str | PathLike[str]) -> tuple[int, int, int] | None:
+    """Return ``(inode, mtime_ns, size)`` of ``path``, or ``None`` when it does not exist."""
+
+    try:
+        stat = ensure_path(path).stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def output_status(path: Path | str | PathLike[str], before: tuple[int, int, int] | None) -> str:
+    """Return ``"written"`` or ``"skipped"`` by comparing file signatures around a loader call."""
+
+    target = ensure_path(path)
+    if target.is_dir():
+        # Partitioned datasets are appended to below the root directory.
+        return "written"
+    after = output_signature(target)
+    return "skipped" if after is not None and after == before else "written"
+
+
+@functools.cache
+def _umask() -> int:
+    # The umask can only be read by setting it; do it once per process.
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+def atomic_target(target: Path | str | PathLike[str]) -> tuple[int, str]:
+    """Create a temporary file next to ``target``; return its descriptor and name.
+
+    Write to it, then move it over ``target`` with :func:`replace_file`.
+    """
+
+    path = ensure_path(target)
+    return tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+
+
+def replace_file(tmp_name: str | Path, target: Path | str | PathLike[str]) -> None:
+    """Move ``tmp_name`` over ``target`` atomically, keeping the permissions of ``target``.
+
+    :func:`tempfile.mkstemp` creates files readable only by their owner; the
+    temporary file gets the mode of the file it replaces, or the default mode
+    of a new file (``0o666`` minus the umask), before the rename.
+    """
+
+    try:
+        mode = stat.S_IMODE(os.stat(target).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_umask()
+    os.chmod(tmp_name, mode)
+    os.replace(tmp_name, target)
+
+
+class RunLock:
+    """Non-blocking exclusive lock on a file, shared by every process using it."""
+
+    def __init__(self, path: Path | str | PathLike[str]) -> None:
+        self.path = Path(path)
+        self._fd: int | None = None
+
+    def acquire(self) -> bool:
+        """Take the lock; ``False`` when another run holds it."""
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+def first_present(df: pd.DataFrame, candidates: Sequence[str]) -> str | None:
+    """Return the first of ``candidates`` that is a column of ``df``."""
+
+    return next((column for column in candidates if column in df.columns), None)
+
+
+def pick_timestamp_column(df: pd.DataFrame) -> str | None:
+    """Return the timestamp column name based on TerraBrasilis headers."""
+
+    preferred = "Data / Hora"
+    if preferred in df.columns:
+        return preferred
+
+    # Fallback to case-insensitive match for similar names, if ever present
+    lower_map = {col.lower(): col for col in df.columns}
+    for key in ("data / hora", "data_hora", "data_hora_gmt"):
+        if key in lower_map:
+            return lower_map[key]
+    return None
+
+
+def latest_by_satellite(fires: pd.DataFrame, satellites: Iterable[str] | None = None) -> dict[str, pd.Timestamp]:
+    """Return the newest detection timestamp (UTC) of each satellite in ``fires``."""
+
+    import pandas as pd
+
+    ts_column = pick_timestamp_column(fires)
+    sat_column = first_present(fires, SATELLITE_COLUMNS)
+    if ts_column is None or sat_column is None or fires.empty:
+        return {}
+
+    stamps = pd.to_datetime(fires[ts_column], utc=True, errors="coerce")
+    frame = pd.DataFrame({"satellite": fires[sat_column].astype("string"), "ts": stamps}).dropna()
+    if satellites is not None:
+        frame = frame[frame["satellite"].isin(list(satellites))]
+    latest = frame.groupby("satellite", sort=False)["ts"].max()
+    return {str(name): value for name, value in latest.items()}
+
+
+def resolve_key_columns(columns: Sequence[str], key_columns: Sequence[str] | None) -> list[str]:
+    """Return the columns identifying a detection among ``columns``.
+
+    Explicit ``key_columns`` must all be present; otherwise the
+    :data:`DEFAULT_KEY_COLUMNS` found in ``columns`` are used, or every
+    non-geometry column when none is.
+    """
+
+    if key_columns is not None:
+        missing = [column for column in key_columns if column not in columns]
+        if missing:
+            raise KeyError(f"key columns not found: {missing}")
+        return list(key_columns)
+    defaults = [column for column in DEFAULT_KEY_COLUMNS if column in columns]
+    return defaults or [column for column in columns if column != "geometry"]
+
+
+def row_keys(df: pd.DataFrame, key_columns: Sequence[str]) -> np.ndarray:
+    """Hash ``key_columns`` of every row as they appear once written to CSV."""
+
+    import numpy as np
+    import pandas as pd
+
+    if df.empty:
+        return np.empty(0, dtype=np.uint64)
+    as_text = df[list(key_columns)].astype("string").fillna("")
+    return pd.util.hash_pandas_object(as_text, index=False).to_numpy(dtype=np.uint64)
+
+
+def _text_hashes(series: pd.Series) -> np.ndarray:
+    import numpy as np
+    import pandas as pd
+
+    text = series.astype("string").fillna("").to_numpy(dtype=object)
+    return pd.util.hash_array(text).astype(np.uint64)
+
+
+def _normalized_hashes(series: pd.Series, kind: str, precision: int) -> np.ndarray:
+    """Hash one key column by value (epoch seconds or rounded coordinate) rather than by text."""
+
+    import numpy as np
+    import pandas as pd
+
+    if kind == "timestamp":
+        try:
+            parsed = pd.to_datetime(series, utc=True, errors="coerce")
+        except (TypeError, ValueError):
+            parsed = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns, UTC]")
+        retry = parsed.isna() & series.notna()
+        if retry.any():
+            # A mix of formats or offsets defeats the bulk parse; read those one by one.
+            parsed[retry] = pd.to_datetime(series[retry].astype(str), utc=True, errors="coerce", format="mixed")
+        values = parsed.dt.tz_convert(None).to_numpy(dtype="datetime64[s]").astype(np.int64)
+        failed = (parsed.isna() & series.notna()).to_numpy()
+        values[parsed.isna().to_numpy()] = np.iinfo(np.int64).min
+    else:
+        numeric = pd.to_numeric(series, errors="coerce")
+        # Adding 0.0 turns -0.0 into 0.0, so both hash alike.
+        values = np.round(numeric.to_numpy(dtype=float), precision) + 0.0
+        failed = (numeric.isna() & series.notna()).to_numpy()
+
+    hashes = pd.util.hash_array(values).astype(np.uint64)
+    if failed.any():
+        # Unparseable values keep their text, so they still identify the row.
+        hashes[failed] = _text_hashes(series[failed])
+    return hashes
+
+
+def detection_keys(
+    df: pd.DataFrame,
+    key_columns: Sequence[str],
+    *,
+    precision: int = COORDINATE_PRECISION,
+) -> np.ndarray:
+    """Hash ``key_columns`` of every row independently of how they were stored.
+
+    Unlike :func:`row_keys`, the same detection gets the same key whether it
+    was read from CSV text, Parquet datetimes/floats or SQLite: timestamp
+    columns are hashed as UTC epoch seconds (naive values read as UTC) and
+    coordinates rounded to ``precision`` decimal places.
+    """
+
+    import numpy as np
+
+    keys = np.zeros(len(df), dtype=np.uint64)
+    if df.empty:
+        return keys
+    for column in key_columns:
+        name = str(column).lower()
+        if name in _TIMESTAMP_NAMES:
+            hashes = _normalized_hashes(df[column], "timestamp", precision)
+        elif name in COORDINATE_COLUMNS:
+            hashes = _normalized_hashes(df[column], "coordinate", precision)
+        else:
+            hashes = _text_hashes(df[column])
+        # FNV-style combination; uint64 arithmetic wraps around.
+        keys = (keys * np.uint64(0x100000001B3)) ^ hashes
+    return keys
+
+
+__all__ = [
+    "COORDINATE_COLUMNS",
+    "COORDINATE_PRECISION",
+    "DEFAULT_KEY_COLUMNS",
+    "RunLock",
+    "SATELLITE_COLUMNS",
+    "TIMESTAMP_COLUMNS",
+    "atomic_target",
+    "detection_keys",
+    "ensure_path",
+    "first_present",
+    "latest_by_satellite",
+    "output_signature",
+    "output_status",
+    "pick_timestamp_column",
+    "replace_file",
+    "resolve_key_columns",
+    "row_keys",
+]
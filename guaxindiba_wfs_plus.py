@@ -4,7 +4,8 @@ import geopandas as gpd
 import pandas as pd
 from shapely.geometry import Point
 from shapely.prepared import prep
-from unidecode import unidecode
+
+from etl.extract.names import NameIndex
 
 RESERVE_NAME = "Estação Ecológica Estadual de Guaxindiba"
 SEARCH_PLACES = [
@@ -13,11 +14,7 @@ SEARCH_PLACES = [
     "Brazil",
 ]
 
-def _normalize(s: str) -> str:
-    return unidecode((s or "").lower().strip())
-
 def fetch_reserve_polygon(reserve_name=RESERVE_NAME):
-    name_norm = _normalize(reserve_name)
     tags_try = [
         {"boundary": "protected_area"},
         {"leisure": "nature_reserve"},
@@ -33,20 +30,14 @@ def fetch_reserve_polygon(reserve_name=RESERVE_NAME):
             if gdf is None or gdf.empty:
                 continue
 
-            cols_to_check = [c for c in gdf.columns if c.startswith("name")]
-            if not cols_to_check:
+            index = NameIndex.from_frame(gdf)
+            if not index.columns:
                 continue
 
-            mask = False
-            for c in cols_to_check:
-                mask = mask | gdf[c].apply(lambda v: name_norm in _normalize(str(v)))
-            candidates = gdf[mask]
+            candidates = gdf[index.match(reserve_name)]
 
             if candidates.empty:
-                mask2 = False
-                for c in cols_to_check:
-                    mask2 = mask2 | gdf[c].apply(lambda v: "guaxindiba" in _normalize(str(v)))
-                candidates = gdf[mask2]
+                candidates = gdf[index.match("guaxindiba")]
 
             if candidates.empty:
                 continue
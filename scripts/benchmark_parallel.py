@@ -0,0 +1,113 @@
+"""Measure how the point-in-polygon test scales with processes and with the cell grid."""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+
+def _ensure_project_root_on_path() -> None:
+    """Make the repository root importable when running as a script."""
+
+    repo_root = Path(__file__).resolve().parents[1]
+    if str(repo_root) not in sys.path:
+        sys.path.insert(0, str(repo_root))
+
+
+_ensure_project_root_on_path()
+
+import numpy as np  # noqa: E402  (import after path fix)
+import shapely  # noqa: E402
+
+from etl.extract.prepared_geometry import load_geometry_file  # noqa: E402
+from etl.transform.grid import INSIDE, ClassificationGrid  # noqa: E402
+from etl.transform.parallel import intersects_xy  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=5_000_000, help="Quantidade de pontos sintéticos.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+        help="Números de processos a medir.",
+    )
+    parser.add_argument(
+        "--geometry",
+        type=Path,
+        default=REPO_ROOT / "EEEG_polygon.geojson",
+        help="GeoJSON da área testada.",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições por configuração (vale a melhor).")
+    parser.add_argument(
+        "--grid",
+        action="store_true",
+        help="Compara também a classificação por grade pré-calculada (etl.transform.grid).",
+    )
+    return parser
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+    geometry = load_geometry_file(args.geometry).geometry
+    minx, miny, maxx, maxy = geometry.bounds
+    width, height = maxx - minx, maxy - miny
+
+    rng = np.random.default_rng(0)
+    xs = rng.uniform(minx - width, maxx + width, args.points)
+    ys = rng.uniform(miny - height, maxy + height, args.points)
+    vertices = shapely.get_num_coordinates(geometry)
+    print(f"{args.points} pontos, geometria com {vertices} vértices, {os.cpu_count()} CPUs")
+
+    reference = None
+    baseline = None
+    for workers in args.workers:
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            result = intersects_xy(geometry, xs, ys, workers=workers)
+            best = min(best, time.perf_counter() - started)
+        if reference is None:
+            reference, baseline = result, best
+        elif not np.array_equal(reference, result):
+            raise SystemExit(f"resultado divergente com {workers} processos")
+        print(f"{workers:>3} processos: {best:.2f} s (speedup {baseline / best:.2f}x)")
+
+    if args.grid:
+        grid = ClassificationGrid.build(geometry)
+        interior = grid.cells.ravel()[_cell_index(grid, xs, ys)] == INSIDE
+        for label, mask in (("todos os pontos", slice(None)), ("células internas", interior)):
+            px, py = xs[mask], ys[mask]
+            exact = _best_of(args.repeat, lambda: intersects_xy(geometry, px, py, workers=1))
+            gridded = _best_of(args.repeat, lambda: grid.classify(px, py))
+            if not np.array_equal(grid.classify(px, py), intersects_xy(geometry, px, py, workers=1)):
+                raise SystemExit("resultado divergente com a grade")
+            print(f"grade ({label}, {len(px)} pontos): {gridded:.3f} s contra {exact:.3f} s ({exact / gridded:.1f}x)")
+    return 0
+
+
+def _best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _cell_index(grid: ClassificationGrid, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    rows, cols = grid.cells.shape
+    col = np.clip(np.floor((xs - grid.origin[0]) / grid.cell_size) + 1, 0, cols - 1)
+    row = np.clip(np.floor((ys - grid.origin[1]) / grid.cell_size) + 1, 0, rows - 1)
+    return (row * cols + col).astype(np.intp)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
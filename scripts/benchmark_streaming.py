@@ -0,0 +1,146 @@
+"""Compare peak memory of the full and streaming pipeline modes on synthetic data."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+def _ensure_project_root_on_path() -> None:
+    """Make the repository root importable when running as a script."""
+
+    repo_root = Path(__file__).resolve().parents[1]
+    if str(repo_root) not in sys.path:
+        sys.path.insert(0, str(repo_root))
+
+
+_ensure_project_root_on_path()
+
+import numpy as np  # noqa: E402  (import after path fix)
+import pandas as pd  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# Bounding box of the Rio de Janeiro state, where the sample reserve lies.
+LON_RANGE = (-44.9, -40.9)
+LAT_RANGE = (-23.4, -20.7)
+
+
+def generate_input(path: Path, rows: int, *, block: int = 1_000_000, seed: int = 42) -> Path:
+    """Write ``rows`` synthetic TerraBrasilis-like detections to ``path`` in blocks."""
+
+    rng = np.random.default_rng(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    start = pd.Timestamp("2025-01-01T00:00:00Z")
+    satellites = np.array(["AQUA", "TERRA", "NPP-375", "NOAA-20", "GOES-16"])
+    with path.open("w", encoding="utf-8", newline="") as fh:
+        for offset in range(0, rows, block):
+            size = min(block, rows - offset)
+            frame = pd.DataFrame(
+                {
+                    "Data / Hora": (start + pd.to_timedelta(rng.integers(0, 365 * 86400, size), unit="s")).strftime(
+                        "%Y-%m-%dT%H:%M:%SZ"
+                    ),
+                    "Satélite": satellites[rng.integers(0, len(satellites), size)],
+                    "Latitude": rng.uniform(*LAT_RANGE, size).round(5),
+                    "Longitude": rng.uniform(*LON_RANGE, size).round(5),
+                    "FRP": rng.gamma(2.0, 10.0, size).round(1),
+                }
+            )
+            frame.to_csv(fh, index=False, header=offset == 0)
+    return path
+
+
+def run_once(mode: str, source: Path, output: Path, chunk_size: int) -> dict[str, float]:
+    """Run the pipeline once in this process and return timing/memory figures."""
+
+    from etl.extract.prepared_geometry import load_geometry_file
+    from etl.pipeline import PipelineConfig, run_pipeline
+
+    geometry = load_geometry_file(REPO_ROOT / "EEEG_polygon.geojson").geometry
+
+    def fetch(**_: object):
+        if mode == "stream":
+            return pd.read_csv(source, chunksize=chunk_size)
+        return pd.read_csv(source)
+
+    cfg = PipelineConfig(
+        dataframe_output=output,
+        geometry_output=None,
+        fetch_fire_data=fetch,
+        get_reserve_geometry=lambda **_: geometry,
+        chunk_size=chunk_size if mode == "stream" else None,
+    )
+    started = time.perf_counter()
+    result = run_pipeline(cfg)
+    elapsed = time.perf_counter() - started
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"rows": float(result.rows or 0), "seconds": elapsed, "peak_mib": peak_kib / 1024}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Linhas do arquivo sintético.")
+    parser.add_argument("--chunk-size", type=int, default=250_000, help="Linhas por bloco no modo streaming.")
+    parser.add_argument(
+        "--mode",
+        choices=("stream", "full", "both"),
+        default="both",
+        help="Modo(s) do pipeline a medir; cada um roda em um processo separado.",
+    )
+    parser.add_argument(
+        "--workdir",
+        type=Path,
+        default=Path("data/benchmark"),
+        help="Diretório para o arquivo sintético e as saídas.",
+    )
+    parser.add_argument("--run", choices=("stream", "full"), help=argparse.SUPPRESS)
+    return parser
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+    source = args.workdir / f"focos_sinteticos_{args.rows}.csv"
+
+    if args.run:
+        figures = run_once(args.run, source, args.workdir / f"saida_{args.run}.csv", args.chunk_size)
+        print(json.dumps(figures))
+        return 0
+
+    if not source.exists():
+        print(f"Gerando {args.rows} linhas sintéticas em {source} ...")
+        generate_input(source, args.rows)
+    print(f"Entrada: {source} ({source.stat().st_size / 2**20:.0f} MiB)")
+
+    modes = ("stream", "full") if args.mode == "both" else (args.mode,)
+    for mode in modes:
+        command = [
+            sys.executable,
+            __file__,
+            "--run",
+            mode,
+            "--rows",
+            str(args.rows),
+            "--chunk-size",
+            str(args.chunk_size),
+            "--workdir",
+            str(args.workdir),
+        ]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"{mode:>6}: falhou (código {completed.returncode}; possivelmente sem memória)")
+            continue
+        figures = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(
+            f"{mode:>6}: {figures['rows']:.0f} linhas em {figures['seconds']:.1f} s, "
+            f"pico de memória {figures['peak_mib']:.0f} MiB"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+from shapely.geometry import Point
+
+
+@pytest.fixture
+def fires() -> pd.DataFrame:
+    """Three TerraBrasilis detections, as read from the CSV export plus their points."""
+
+    df = pd.DataFrame(
+        {
+            "Data / Hora": ["2025-11-10 16:32:00", "2025-11-10 17:00:00", "2025-11-11 03:15:00"],
+            "Satélite": ["AQUA", "NPP-375", "AQUA"],
+            "Estado": ["RIO DE JANEIRO", "ESPÍRITO SANTO", "RIO DE JANEIRO"],
+            "Bioma": ["Mata Atlântica", "Mata Atlântica", "Cerrado"],
+            "Latitude": [-21.4, -20.3, -21.5],
+            "Longitude": [-41.1, -40.3, -41.0],
+            "FRP": [12.5, 3.0, None],
+        }
+    )
+    df["geometry"] = [Point(lon, lat) for lon, lat in zip(df["Longitude"], df["Latitude"])]
+    return df
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import textwrap
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from shapely.geometry import Polygon
+
+from etl.extract import geometry_cache, reserve
+from etl.extract.geometry_cache import GeometryCache, cache_key
+
+
+@pytest.fixture(autouse=True)
+def _clear_memo():
+    geometry_cache.clear_memo()
+    yield
+    geometry_cache.clear_memo()
+
+
+def _square(size: float) -> Polygon:
+    return Polygon([(0, 0), (size, 0), (size, size), (0, size)])
+
+
+def test_cache_key_depends_on_name_places_and_strategy():
+    base = cache_key("Guaxindiba", ["Rio de Janeiro, Brazil"])
+
+    assert base == cache_key("Guaxindiba", ("Rio de Janeiro, Brazil",))
+    assert base != cache_key("Desengano", ["Rio de Janeiro, Brazil"])
+    assert base != cache_key("Guaxindiba", ["Brazil"])
+    assert base != cache_key("Guaxindiba", ["Rio de Janeiro, Brazil"], strategy={"combined_query": True})
+
+
+def test_get_reserve_geometry_cache_dir_is_keyed_by_name(tmp_path, monkeypatch):
+    polygons = {"Area A": _square(1), "Area B": _square(2)}
+    calls: list[str] = []
+
+    def fake_fetch(name, **kwargs):
+        calls.append(name)
+        return polygons[name]
+
+    monkeypatch.setattr(reserve, "fetch_reserve_polygon", fake_fetch)
+
+    first_a = reserve.get_reserve_geometry("Area A", cache_dir=tmp_path)
+    first_b = reserve.get_reserve_geometry("Area B", cache_dir=tmp_path)
+    second_a = reserve.get_reserve_geometry("Area A", cache_dir=tmp_path)
+
+    assert calls == ["Area A", "Area B"]
+    assert first_a.equals(polygons["Area A"])
+    assert first_b.equals(polygons["Area B"])
+    assert second_a.equals(polygons["Area A"])
+    assert len(list(tmp_path.glob("*.geojson"))) == 2
+
+    stored = json.loads(next(tmp_path.glob("*.geojson")).read_text(encoding="utf-8"))
+    properties = stored["features"][0]["properties"]
+    assert properties["source"] == "osm"
+    assert "fetched_at" in properties
+    assert "osm_timestamp" in properties
+
+
+def test_geometry_cache_memoizes_loaded_entries(tmp_path, monkeypatch):
+    cache = GeometryCache(tmp_path)
+    cache.store("key", _square(1), source="osm")
+    geometry_cache.clear_memo()
+
+    first = cache.load("key")
+    monkeypatch.setattr(geometry_cache, "_read_entry", lambda *args: pytest.fail("entry re-read from disk"))
+    second = cache.load("key")
+
+    assert first is second
+
+
+def test_geometry_cache_refetches_expired_entries(tmp_path):
+    cache = GeometryCache(tmp_path, ttl=60)
+    entry = cache.store("key", _square(1), source="osm")
+    expired = datetime.now(timezone.utc) + timedelta(seconds=120)
+
+    assert cache.is_fresh(entry)
+    assert not cache.is_fresh(entry, now=expired)
+
+    path = cache.path_for("key")
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["features"][0]["properties"]["fetched_at"] = "2000-01-01T00:00:00+00:00"
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+    geometry = cache.get_or_fetch("key", lambda: _square(3))
+
+    assert geometry.equals(_square(3))
+    assert cache.load("key").geometry.equals(_square(3))
+
+
+def _expire(cache: GeometryCache, key: str) -> None:
+    path = cache.path_for(key)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["features"][0]["properties"]["fetched_at"] = "2000-01-01T00:00:00+00:00"
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_wait_for_refreshes_joins_background_refresh(tmp_path):
+    cache = GeometryCache(tmp_path, ttl=60)
+    cache.store("key", _square(1), source="osm")
+    _expire(cache, "key")
+    release = threading.Event()
+
+    def slow_fetch():
+        release.wait(5)
+        return _square(4)
+
+    cache.get_or_fetch("key", slow_fetch, revalidate=True)
+    assert not geometry_cache.wait_for_refreshes(0.05)
+    release.set()
+
+    assert geometry_cache.wait_for_refreshes(5)
+    assert cache.load("key").geometry.equals(_square(4))
+
+
+def test_background_refresh_completes_before_interpreter_exit(tmp_path):
+    cache = GeometryCache(tmp_path, ttl=60)
+    cache.store("key", _square(1), source="osm")
+    _expire(cache, "key")
+    script = textwrap.dedent(
+        f"""
+        import time
+        from shapely.geometry import box
+        from etl.extract.geometry_cache import GeometryCache
+
+        def slow_fetch():
+            time.sleep(0.5)
+            return box(0, 0, 4, 4)
+
+        GeometryCache({str(tmp_path)!r}, ttl=60).get_or_fetch("key", slow_fetch, revalidate=True)
+        """
+    )
+
+    subprocess.run([sys.executable, "-c", script], check=True, timeout=60)
+
+    geometry_cache.clear_memo()
+    assert cache.load("key").geometry.equals(_square(4))
+
+
+def test_geometry_cache_revalidates_in_background(tmp_path):
+    cache = GeometryCache(tmp_path, ttl=60)
+    cache.store("key", _square(1), source="osm")
+    path = cache.path_for("key")
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["features"][0]["properties"]["fetched_at"] = "2000-01-01T00:00:00+00:00"
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+    release = threading.Event()
+    refreshed = threading.Event()
+
+    def slow_fetch():
+        release.wait(5)
+        refreshed.set()
+        return _square(4)
+
+    geometry = cache.get_or_fetch("key", slow_fetch, revalidate=True)
+    assert geometry.equals(_square(1))
+
+    release.set()
+    assert refreshed.wait(5)
+    for _ in range(100):
+        entry = cache.load("key")
+        if entry is not None and entry.geometry.equals(_square(4)):
+            break
+        threading.Event().wait(0.01)
+    assert cache.load("key").geometry.equals(_square(4))
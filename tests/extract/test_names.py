@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from etl.extract import names
+from etl.extract.names import NameIndex, NameIndexCache
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "name": [
+                "Estação Ecológica Estadual de Guaxindiba",
+                "Parque Estadual do Desengano",
+                None,
+                "Estação Ecológica Estadual de Guaxindiba",
+            ],
+            "name:en": [None, "Desengano State Park", "Guaxindiba Ecological Station", None],
+            "boundary": ["protected_area"] * 4,
+        }
+    )
+
+
+def test_name_index_substring_matches_any_name_column():
+    index = NameIndex.from_frame(_frame())
+
+    assert index.columns == ("name", "name:en")
+    assert index.match("estacao ecologica estadual de guaxindiba").tolist() == [True, False, False, True]
+    assert index.match("GUAXINDIBA").tolist() == [True, False, True, True]
+
+
+def test_name_index_normalizes_each_unique_name_once(monkeypatch):
+    calls: list[str] = []
+
+    def counting_unidecode(value: str) -> str:
+        calls.append(value)
+        return value
+
+    names.normalize_name.cache_clear()
+    monkeypatch.setattr(names, "unidecode", counting_unidecode)
+    try:
+        NameIndex.from_frame(_frame())
+    finally:
+        names.normalize_name.cache_clear()
+
+    assert len(calls) == 4
+
+
+def test_name_index_token_and_fuzzy_modes():
+    index = NameIndex.from_frame(_frame())
+
+    assert index.match("guaxindiba estacao", mode="token").tolist() == [True, False, False, True]
+    assert index.match("Parque Estadual do Desenganno", mode="fuzzy", cutoff=0.9).tolist() == [
+        False,
+        True,
+        False,
+        False,
+    ]
+    ranking = index.rank("Desengano State Park", limit=1)
+    assert ranking[0][0] == 1
+    assert ranking[0][1] == 1.0
+
+
+def test_name_index_cache_reuses_index_for_same_response():
+    cache = NameIndexCache(maxsize=2)
+    frame = _frame()
+
+    first = cache.get("rj", frame)
+    assert cache.get("rj", frame.copy()) is first
+
+    changed = frame.copy()
+    changed.loc[1, "name"] = "Outro nome"
+    rebuilt = cache.get("rj", changed)
+    assert rebuilt is not first
+    assert np.array_equal(rebuilt.match("outro"), [False, True, False, False])
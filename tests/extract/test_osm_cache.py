@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from osmnx import _http
+
+from etl.extract.osm_cache import OSMResponseCache, OfflineCacheMiss, active_cache
+
+REPO_CACHE = Path(__file__).resolve().parents[2] / "cache"
+OVERPASS_URL = "https://overpass-api.de/api/interpreter?data=example"
+
+
+def test_put_and_get_roundtrip_compressed(tmp_path):
+    cache = OSMResponseCache(tmp_path, compression="gzip")
+    response = {"osm3s": {"timestamp_osm_base": "2025-11-04T22:43:55Z"}, "elements": [{"id": 1}]}
+
+    path = cache.put(OVERPASS_URL, response)
+
+    assert path is not None and path.name.endswith(".json.gz")
+    assert cache.get(OVERPASS_URL) == response
+    assert cache.get(OVERPASS_URL + "&other") is None
+    assert cache.stats.as_dict() == {"hits": 1, "misses": 1, "stores": 1, "expired": 0, "evictions": 0}
+    assert cache.latest_osm_timestamp == "2025-11-04T22:43:55Z"
+
+
+def test_put_skips_failed_responses(tmp_path):
+    cache = OSMResponseCache(tmp_path, compression="gzip")
+
+    assert cache.put(OVERPASS_URL, {"elements": []}, ok=False) is None
+    assert cache.put(OVERPASS_URL, {"remark": "runtime error"}) is None
+    assert cache.entries() == []
+
+
+def test_offline_mode_raises_on_miss(tmp_path):
+    cache = OSMResponseCache(tmp_path, compression="gzip", offline=True, ttl=1)
+    cache.put(OVERPASS_URL, {"elements": []})
+    stored = cache.entries()[0]
+    os.utime(stored, (0, 0))
+
+    assert cache.get(OVERPASS_URL) == {"elements": []}
+    with pytest.raises(OfflineCacheMiss):
+        cache.get(OVERPASS_URL + "&missing")
+
+
+def test_expired_responses_are_misses_and_pruned(tmp_path):
+    cache = OSMResponseCache(tmp_path, compression="gzip", ttl=60)
+    cache.put(OVERPASS_URL, {"elements": []})
+    os.utime(cache.entries()[0], (0, 0))
+
+    assert cache.get(OVERPASS_URL) is None
+    assert cache.stats.expired == 1
+    assert cache.prune() == 1
+    assert cache.entries() == []
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    cache = OSMResponseCache(tmp_path, compression="none")
+    payload = {"elements": ["x" * 1000]}
+    for index in range(3):
+        cache.put(f"{OVERPASS_URL}&n={index}", payload)
+    for atime, path in enumerate(sorted(cache.entries(), key=lambda item: item.stat().st_mtime_ns)):
+        os.utime(path, ns=(atime * 1_000_000_000, path.stat().st_mtime_ns))
+    cache.get(f"{OVERPASS_URL}&n=0")
+
+    cache.max_bytes = cache.size() - 1
+    assert cache.prune() == 1
+
+    assert cache.get(f"{OVERPASS_URL}&n=0") == payload
+    assert cache.get(f"{OVERPASS_URL}&n=1") is None
+
+
+def test_compress_existing_reads_legacy_osmnx_files(tmp_path):
+    legacy = REPO_CACHE / "872c5410b96805dfabd9f4edd31d85833f381392.json"
+    shutil.copy(legacy, tmp_path / legacy.name)
+    cache = OSMResponseCache(tmp_path, compression="gzip")
+
+    assert cache.compress_existing() == 1
+    assert [path.name for path in cache.entries()] == [legacy.stem + ".json.gz"]
+    assert cache._find(legacy.stem) is not None
+
+
+def test_install_routes_osmnx_hooks(tmp_path):
+    original = (_http._retrieve_from_cache, _http._save_to_cache)
+    cache = OSMResponseCache(tmp_path, compression="gzip")
+
+    with cache.activated():
+        assert active_cache() is cache
+        _http._save_to_cache(OVERPASS_URL, {"elements": [1]}, True)
+        assert _http._retrieve_from_cache(OVERPASS_URL) == {"elements": [1]}
+
+    assert (_http._retrieve_from_cache, _http._save_to_cache) == original
+    assert active_cache() is None
+
+
+def test_offline_reserve_lookup_uses_only_cached_responses(tmp_path):
+    from etl.extract.reserve import get_reserve_geometry
+
+    for path in REPO_CACHE.glob("*.json"):
+        shutil.copy(path, tmp_path / path.name)
+    cache = OSMResponseCache(tmp_path, offline=True)
+
+    geometry = get_reserve_geometry(
+        search_places=["São Francisco de Itabapoana, Rio de Janeiro, Brazil"],
+        osm_cache=cache,
+    )
+
+    assert geometry.geom_type in {"Polygon", "MultiPolygon"}
+    assert cache.stats.hits >= 2
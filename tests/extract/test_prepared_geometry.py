@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+import math
+
+import pytest
+import shapely
+from shapely.geometry import Point, Polygon, mapping
+
+from etl.extract import prepared_geometry
+from etl.extract.prepared_geometry import load_geometry_file, read_prepared, sidecar_path, write_prepared
+
+
+def _circle(points: int = 2000) -> Polygon:
+    return Polygon(
+        [(math.cos(2 * math.pi * i / points), math.sin(2 * math.pi * i / points)) for i in range(points)]
+    )
+
+
+def _write_geojson(path, geometry, properties=None):
+    path.write_text(
+        json.dumps(
+            {
+                "type": "FeatureCollection",
+                "features": [{"type": "Feature", "properties": properties or {}, "geometry": mapping(geometry)}],
+            }
+        ),
+        encoding="utf-8",
+    )
+
+
+def test_write_and_read_prepared_roundtrip(tmp_path):
+    circle = _circle()
+    target = write_prepared(circle, tmp_path / "circle.wkb", metadata={"source": "osm"})
+
+    loaded = read_prepared(target)
+
+    assert loaded.geometry.equals(circle)
+    assert loaded.bounds == circle.bounds
+    assert loaded.metadata == {"source": "osm"}
+    assert shapely.is_prepared(loaded.geometry)
+    assert loaded.inner is not None and loaded.outer is not None
+    assert circle.contains(loaded.inner)
+    assert loaded.outer.contains(circle)
+
+
+def test_write_prepared_stores_repaired_geometry(tmp_path):
+    bowtie = Polygon([(0, 0), (1, 1), (1, 0), (0, 1)])
+    assert not bowtie.is_valid
+
+    loaded = read_prepared(write_prepared(bowtie, tmp_path / "bowtie.wkb"))
+
+    assert loaded.geometry.equals_exact(bowtie, 0)
+    assert loaded.repaired.is_valid
+    assert loaded.repaired.intersects(Point(0.2, 0.5))
+
+
+def test_load_geometry_file_keeps_stored_geometry(tmp_path):
+    bowtie = Polygon([(0, 0), (1, 1), (1, 0), (0, 1)])
+    source = tmp_path / "bowtie.geojson"
+    _write_geojson(source, bowtie)
+
+    for _ in range(2):  # parsed, then from the sidecar
+        loaded = load_geometry_file(source)
+        assert loaded.geometry.equals_exact(bowtie, 0)
+        assert loaded.repaired.is_valid
+
+
+def test_load_geometry_file_rejects_empty_collection(tmp_path):
+    source = tmp_path / "empty.geojson"
+    source.write_text(json.dumps({"type": "FeatureCollection", "features": []}), encoding="utf-8")
+
+    with pytest.raises(prepared_geometry.EmptyGeometryFile):
+        load_geometry_file(source)
+
+
+def test_load_geometry_file_reuses_sidecar(tmp_path, monkeypatch):
+    source = tmp_path / "area.geojson"
+    _write_geojson(source, _circle(), {"name": "Área"})
+
+    first = load_geometry_file(source)
+    assert sidecar_path(source).exists()
+    assert first.metadata == {"name": "Área"}
+
+    def fail(*args, **kwargs):
+        raise AssertionError("GeoJSON should not be parsed again")
+
+    monkeypatch.setattr(prepared_geometry, "geometry_from_geojson", fail)
+    second = load_geometry_file(source)
+
+    assert second.geometry.equals(first.geometry)
+
+
+def test_load_geometry_file_rebuilds_outdated_sidecar(tmp_path):
+    source = tmp_path / "area.geojson"
+    _write_geojson(source, _circle())
+    load_geometry_file(source)
+
+    square = Polygon([(0, 0), (3, 0), (3, 3), (0, 3)])
+    _write_geojson(source, square, {"version": 2})
+
+    loaded = load_geometry_file(source)
+
+    assert loaded.geometry.equals(square)
+    assert loaded.metadata == {"version": 2}
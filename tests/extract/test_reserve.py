@@ -2,9 +2,11 @@ from __future__ import annotations
 
 import sys
 import types
-from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Iterator, Sequence
+from typing import Iterable, Sequence
+
+import pandas as pd
+import pytest
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 if str(PROJECT_ROOT) not in sys.path:
@@ -87,59 +89,57 @@ reserve = importlib.util.module_from_spec(_RESERVE_SPEC)
 _RESERVE_SPEC.loader.exec_module(reserve)
 
 
-@dataclass
-class FakeSeries:
-    data: Sequence[object]
-
-    def apply(self, func):
-        return FakeSeries([func(value) for value in self.data])
-
-    def __iter__(self) -> Iterator[object]:
-        return iter(self.data)
-
-    def __or__(self, other):
-        other_data = _coerce_to_sequence(other, len(self.data))
-        return FakeSeries([a or b for a, b in zip(_as_bools(self.data), other_data)])
-
-    def __ror__(self, other):
-        other_data = _coerce_to_sequence(other, len(self.data))
-        return FakeSeries([a or b for a, b in zip(other_data, _as_bools(self.data))])
-
-
 def _as_bools(values: Iterable[object]) -> list[bool]:
     return [bool(value) for value in values]
 
 
 def _coerce_to_sequence(value, size: int) -> list[bool]:
-    if isinstance(value, FakeSeries):
-        return _as_bools(value.data)
-    if isinstance(value, Sequence) and not isinstance(value, (str, bytes, bytearray)):
+    if isinstance(value, Iterable) and not isinstance(value, (str, bytes, bytearray)):
         return _as_bools(value)
     return [bool(value)] * size
 
 
 class FakeGeoDataFrame:
-    def __init__(self, names: Sequence[str], geometry: Sequence[FakeGeometry]):
+    def __init__(
+        self,
+        names: Sequence[str],
+        geometry: Sequence[FakeGeometry],
+        tags: dict[str, Sequence[object]] | None = None,
+    ):
         self._names = list(names)
         self._geometry = list(geometry)
+        self._tags = {key: list(values) for key, values in (tags or {}).items()}
 
     @property
     def columns(self) -> list[str]:
-        return ["name"]
+        return ["name", *self._tags]
 
     @property
     def empty(self) -> bool:
         return not self._names
 
+    @property
+    def index(self) -> pd.RangeIndex:
+        return pd.RangeIndex(len(self._names))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
     def __getitem__(self, key):
         if isinstance(key, str):
             if key == "name":
-                return FakeSeries(self._names)
+                return pd.Series(self._names, dtype=object)
+            if key in self._tags:
+                return pd.Series(self._tags[key], dtype=object)
             raise KeyError(key)
         mask = _coerce_to_sequence(key, len(self._names))
         names = [name for name, keep in zip(self._names, mask) if keep]
         geometries = [geom for geom, keep in zip(self._geometry, mask) if keep]
-        return FakeGeoDataFrame(names, geometries)
+        tags = {
+            column: [value for value, keep in zip(values, mask) if keep]
+            for column, values in self._tags.items()
+        }
+        return FakeGeoDataFrame(names, geometries, tags)
 
     def to_crs(self, _):
         return self
@@ -195,3 +195,77 @@ def test_get_reserve_geometry_uses_cache(tmp_path: Path, monkeypatch):
     second_geometry = reserve.get_reserve_geometry(cache=cache_path)
 
     assert second_geometry.equals(first_geometry)
+
+
+def test_fetch_reserve_polygon_parallel_keeps_priority(monkeypatch):
+    import threading
+    import time
+
+    slow_polygon = _make_polygon((0, 0), (1, 0), (1, 1), (0, 1))
+    fast_polygon = _make_polygon((5, 5), (6, 5), (6, 6), (5, 6))
+    slow_started = threading.Event()
+
+    def fake_features(place: str, *, tags: dict[str, str]):
+        if place == "first" and tags == {"boundary": "protected_area"}:
+            slow_started.set()
+            time.sleep(0.05)
+            return FakeGeoDataFrame([reserve.RESERVE_NAME], [slow_polygon])
+        if place == "second":
+            return FakeGeoDataFrame([reserve.RESERVE_NAME], [fast_polygon])
+        return FakeGeoDataFrame([], [])
+
+    monkeypatch.setattr(reserve.ox, "features_from_place", fake_features)
+
+    geometry = reserve.fetch_reserve_polygon(search_places=["first", "second"], max_workers=8)
+
+    assert slow_started.is_set()
+    assert geometry.equals(slow_polygon)
+
+
+def test_fetch_reserve_polygon_combined_query(monkeypatch):
+    park = _make_polygon((0, 0), (1, 0), (1, 1), (0, 1))
+    city = _make_polygon((0, 0), (9, 0), (9, 9), (0, 9))
+    calls: list[tuple[str, dict[str, object]]] = []
+
+    def fake_features(place: str, *, tags: dict[str, object]):
+        calls.append((place, tags))
+        return FakeGeoDataFrame(
+            [reserve.RESERVE_NAME, reserve.RESERVE_NAME],
+            [city, park],
+            {"place": ["city", None], "leisure": [None, "nature_reserve"]},
+        )
+
+    monkeypatch.setattr(reserve.ox, "features_from_place", fake_features)
+
+    geometry = reserve.fetch_reserve_polygon(search_places=["somewhere"], combined_query=True)
+
+    assert geometry.equals(park)
+    assert len(calls) == 1
+    assert calls[0][1]["boundary"] == ["protected_area", "national_park", "administrative"]
+    assert calls[0][1]["place"] == "city"
+
+
+@pytest.mark.parametrize("combined_query", [False, True])
+def test_fetch_reserve_polygon_fails_fast_on_offline_cache_miss(monkeypatch, combined_query):
+    calls: list[str] = []
+
+    def missing(place: str, *, tags):
+        calls.append(place)
+        raise reserve.OfflineCacheMiss(f"response not cached (offline mode): {place}")
+
+    monkeypatch.setattr(reserve.ox, "features_from_place", missing)
+
+    with pytest.raises(reserve.OfflineCacheMiss):
+        reserve.fetch_reserve_polygon(search_places=["a", "b"], combined_query=combined_query)
+    assert calls == ["a"]
+
+
+def test_fetch_reserve_polygon_geocode_fallback_fails_fast_offline(monkeypatch):
+    def missing(query: str):
+        raise reserve.OfflineCacheMiss(f"response not cached (offline mode): {query}")
+
+    monkeypatch.setattr(reserve.ox, "features_from_place", lambda place, *, tags: FakeGeoDataFrame([], []))
+    monkeypatch.setattr(reserve.ox, "geocode_to_gdf", missing, raising=False)
+
+    with pytest.raises(reserve.OfflineCacheMiss):
+        reserve.fetch_reserve_polygon(search_places=["a"])
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from selenium.common.exceptions import WebDriverException
+
+from etl.extract import terrabrasilis
+from etl.extract.terrabrasilis import TerraBrasilisConfig, TerraBrasilisFilters, cancel_fetch, fetch_fire_data
+
+
+class _HangingDriver:
+    """Stands in for Chrome: the page load hangs until the browser is quit."""
+
+    def __init__(self) -> None:
+        self.loading = threading.Event()
+        self.closed = threading.Event()
+        self.quits = 0
+
+    def get(self, url: str) -> None:
+        self.loading.set()
+        self.closed.wait(10)
+        raise WebDriverException("invalid session id")
+
+    def quit(self) -> None:
+        self.quits += 1
+        self.closed.set()
+
+
+def test_cancel_fetch_quits_the_browser_of_a_running_fetch(monkeypatch):
+    driver = _HangingDriver()
+    monkeypatch.setattr(terrabrasilis, "create_driver", lambda config: driver)
+    errors: list[BaseException] = []
+
+    def _fetch() -> None:
+        try:
+            fetch_fire_data(TerraBrasilisFilters(), config=TerraBrasilisConfig(headless=True, step_delay=0))
+        except WebDriverException as exc:
+            errors.append(exc)
+
+    thread = threading.Thread(target=_fetch)
+    thread.start()
+    assert driver.loading.wait(5)
+
+    assert cancel_fetch(thread.ident)
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert driver.quits == 1  # not quit again by the fetch itself
+    assert len(errors) == 1
+    assert not cancel_fetch(thread.ident)
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import json
+import os
+import stat
 
 import pandas as pd
+import pytest
 from shapely.geometry import Polygon
 
-from etl.load.csv import save_dataframe, save_geometry
+from etl.load.csv import compact_csv, key_index_path, save_dataframe, save_geometry
 
 
 def test_save_dataframe_creates_parent_dirs(tmp_path):
@@ -38,3 +41,142 @@ def test_save_geometry_from_shapely(tmp_path):
     feature = data["features"][0]
     assert feature["type"] == "Feature"
     assert feature["geometry"]["type"] == "Polygon"
+
+
+def test_save_geometry_keeps_file_permissions(tmp_path):
+    output = tmp_path / "area.geojson"
+    save_geometry(Polygon([(0, 0), (1, 0), (1, 1)]), output)
+    output.chmod(0o644)
+
+    save_geometry(Polygon([(0, 0), (2, 0), (2, 2)]), output)
+
+    assert stat.S_IMODE(output.stat().st_mode) == 0o644
+
+
+def _detections(*rows: tuple[str, str, float, float]) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=["Data / Hora", "Satélite", "Latitude", "Longitude"])
+
+
+def test_save_dataframe_append_writes_only_unseen_rows(tmp_path):
+    output = tmp_path / "focos.csv"
+    first = _detections(("2025-11-10 16:32", "AQUA", -21.4, -41.1), ("2025-11-10 17:00", "NPP", -21.5, -41.0))
+    second = _detections(("2025-11-10 17:00", "NPP", -21.5, -41.0), ("2025-11-10 18:00", "AQUA", -21.6, -41.2))
+
+    save_dataframe(first, output, mode="append")
+    save_dataframe(second, output, mode="append")
+    save_dataframe(second, output, mode="append")
+
+    stored = pd.read_csv(output)
+    assert list(stored["Data / Hora"]) == ["2025-11-10 16:32", "2025-11-10 17:00", "2025-11-10 18:00"]
+    assert key_index_path(output).exists()
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_save_dataframe_append_rebuilds_stale_key_index(tmp_path):
+    output = tmp_path / "focos.csv"
+    save_dataframe(_detections(("2025-11-10 16:32", "AQUA", -21.4, -41.1)), output, mode="append")
+    output.write_text(
+        "Data / Hora,Satélite,Latitude,Longitude\n"
+        "2025-11-10 16:32,AQUA,-21.4,-41.1\n"
+        "2025-11-11 09:00,NPP,-21.0,-41.0\n",
+        encoding="utf-8",
+    )
+
+    save_dataframe(_detections(("2025-11-11 09:00", "NPP", -21.0, -41.0)), output, mode="append")
+
+    assert len(pd.read_csv(output)) == 2
+
+
+def test_save_dataframe_append_extends_file_in_place(tmp_path):
+    output = tmp_path / "focos.csv"
+    save_dataframe(_detections(("2025-11-10 16:32", "AQUA", -21.4, -41.1)), output, mode="append")
+    inode = output.stat().st_ino
+
+    save_dataframe(_detections(("2025-11-10 18:00", "AQUA", -21.6, -41.2)), output, mode="append")
+
+    assert output.stat().st_ino == inode
+    assert len(pd.read_csv(output)) == 2
+
+
+def test_save_dataframe_append_truncates_failed_append(tmp_path, monkeypatch):
+    output = tmp_path / "focos.csv"
+    save_dataframe(_detections(("2025-11-10 16:32", "AQUA", -21.4, -41.1)), output, mode="append")
+    before = output.read_bytes()
+    writes = []
+
+    def _failing_write(fd, data):
+        if writes:
+            raise OSError("disco cheio")
+        writes.append(os.write(fd, data))
+
+    monkeypatch.setattr("etl.load.csv._write_all", _failing_write)
+    more = _detections(("2025-11-10 18:00", "AQUA", -21.6, -41.2), ("2025-11-10 19:00", "NPP", -21.7, -41.3))
+    with pytest.raises(OSError, match="disco cheio"):
+        save_dataframe(more, output, mode="append", chunk_size=1)
+
+    assert output.read_bytes() == before
+    monkeypatch.undo()
+    save_dataframe(more, output, mode="append")
+    assert len(pd.read_csv(output)) == 3
+
+
+@pytest.mark.parametrize("mode", ["overwrite", "append"])
+def test_save_dataframe_keeps_file_permissions(tmp_path, mode):
+    output = tmp_path / "focos.csv"
+    umask = os.umask(0o022)
+    os.umask(umask)
+
+    save_dataframe(_detections(("2025-11-10 16:32", "AQUA", -21.4, -41.1)), output, mode=mode)
+    assert stat.S_IMODE(output.stat().st_mode) == 0o666 & ~umask
+    if mode == "append":
+        assert stat.S_IMODE(key_index_path(output).stat().st_mode) == 0o666 & ~umask
+
+    output.chmod(0o640)
+    save_dataframe(_detections(("2025-11-10 18:00", "AQUA", -21.6, -41.2)), output, mode=mode)
+    assert stat.S_IMODE(output.stat().st_mode) == 0o640
+
+
+def test_compact_csv_drops_duplicated_keys(tmp_path):
+    output = tmp_path / "focos.csv"
+    duplicated = _detections(("2025-11-10 16:32", "AQUA", -21.4, -41.1), ("2025-11-10 16:32", "AQUA", -21.4, -41.1))
+    save_dataframe(duplicated, output)
+
+    compact_csv(output)
+
+    assert len(pd.read_csv(output)) == 1
+    save_dataframe(duplicated, output, mode="append")
+    assert len(pd.read_csv(output)) == 1
+
+
+def test_save_dataframe_fallback_quotes_values(tmp_path):
+    class ColumnsOnly:
+        columns = ["name", "value"]
+
+        def __getitem__(self, column):
+            return {"name": ["a,b", "c"], "value": [1, 2]}[column]
+
+    output = tmp_path / "fallback.csv"
+    save_dataframe(ColumnsOnly(), output)
+
+    assert output.read_text(encoding="utf-8").splitlines() == ["name,value", '"a,b",1', "c,2"]
+
+
+def test_save_geometry_and_dataframe_skip_unchanged_content(tmp_path):
+    polygon = Polygon([(0, 0), (1, 0), (1, 1), (0, 1)])
+    geometry_output = tmp_path / "reserve.geojson"
+    csv_output = tmp_path / "data.csv"
+    df = pd.DataFrame({"a": [1, 2]})
+
+    save_geometry(polygon, geometry_output)
+    save_dataframe(df, csv_output)
+    before = (geometry_output.stat(), csv_output.stat())
+
+    save_geometry(polygon, geometry_output)
+    save_dataframe(df, csv_output)
+
+    for old, new in zip(before, (geometry_output.stat(), csv_output.stat())):
+        assert (old.st_ino, old.st_mtime_ns) == (new.st_ino, new.st_mtime_ns)
+
+    save_dataframe(df.assign(a=[1, 3]), csv_output)
+    assert csv_output.read_text(encoding="utf-8").splitlines() == ["a", "1", "3"]
+    assert not list(tmp_path.glob(".*.tmp"))
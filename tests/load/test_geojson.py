@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+from shapely.geometry import Point
+
+from etl.load.geojson import save_points_geojson, save_points_ndjson
+
+
+def test_save_points_geojson_writes_compact_feature_collection(tmp_path):
+    df = pd.DataFrame(
+        {"geometry": [Point(-41.123456789, -21.4), None], "Satélite": ["AQUA", "NPP"], "inside": [True, False]}
+    )
+    output = tmp_path / "focos.geojson"
+
+    returned = save_points_geojson(df, output, precision=3)
+
+    assert returned == output
+    text = output.read_text(encoding="utf-8")
+    assert ", " not in text and ": " not in text
+    data = json.loads(text)
+    assert data["type"] == "FeatureCollection"
+    first, second = data["features"]
+    assert first["geometry"] == {"type": "Point", "coordinates": [-41.123, -21.4]}
+    assert first["properties"] == {"Satélite": "AQUA", "inside": True}
+    assert second["geometry"] is None
+
+
+def test_save_points_ndjson_streams_in_chunks_from_lat_lon(tmp_path):
+    df = pd.DataFrame({"Latitude": [-21.0, -22.0, -23.0], "Longitude": [-41.0, -42.0, -43.0], "id": [1, 2, 3]})
+    output = tmp_path / "focos.ndjson"
+
+    save_points_ndjson(df, output, chunk_size=2, properties=["id"])
+
+    features = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [feature["properties"]["id"] for feature in features] == [1, 2, 3]
+    assert features[2]["geometry"]["coordinates"] == [-43.0, -23.0]
+
+
+def test_non_finite_coordinates_get_a_null_geometry(tmp_path):
+    df = pd.DataFrame({"Latitude": [-21.0, np.inf, np.nan], "Longitude": [-41.0, -41.0, -np.inf]})
+    output = tmp_path / "focos.geojson"
+
+    save_points_geojson(df, output)
+
+    features = json.loads(output.read_text(encoding="utf-8"))["features"]
+    assert [feature["geometry"] is None for feature in features] == [False, True, True]
+
+
+def test_save_points_geojson_handles_empty_frames(tmp_path):
+    output = tmp_path / "empty.geojson"
+
+    save_points_geojson(pd.DataFrame({"geometry": []}), output)
+
+    assert json.loads(output.read_text(encoding="utf-8")) == {"type": "FeatureCollection", "features": []}
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+from shapely.geometry import Point
+
+pytest.importorskip("pyarrow")
+
+from etl.load.parquet import KEY_INDEX_NAME, save_parquet
+
+
+@pytest.fixture
+def fires(fires: pd.DataFrame) -> pd.DataFrame:
+    # Timestamps in UTC, measures still as CSV text and one detection without a point.
+    return fires.assign(
+        **{"Data / Hora": ["2025-11-10T16:32:00Z", "2025-11-10T17:00:00Z", "2025-11-11T03:15:00Z"]},
+        FRP=["12.5", "3.0", None],
+        geometry=[*fires["geometry"].iloc[:2], None],
+    )
+
+
+def test_save_parquet_partitions_by_date_and_state(tmp_path, fires):
+    root = tmp_path / "focos.parquet"
+
+    returned = save_parquet(fires, root)
+
+    assert returned == root
+    partitions = sorted(p.relative_to(root).parent.as_posix() for p in root.rglob("*.parquet"))
+    assert partitions == [
+        "date=2025-11-10/state=ESP%C3%8DRITO%20SANTO",
+        "date=2025-11-10/state=RIO%20DE%20JANEIRO",
+        "date=2025-11-11/state=RIO%20DE%20JANEIRO",
+    ]
+    assert not list(root.rglob(".*.tmp"))
+
+
+def test_save_parquet_round_trips_geometry_and_dtypes(tmp_path, fires):
+    root = tmp_path / "focos.parquet"
+    save_parquet(fires, root)
+
+    loaded = gpd.read_parquet(root).sort_values("Data / Hora").reset_index(drop=True)
+
+    assert loaded.crs.to_epsg() == 4326
+    assert loaded.geometry.iloc[0].equals(Point(-41.1, -21.4))
+    assert loaded.geometry.iloc[2] is None
+    assert pd.api.types.is_datetime64_any_dtype(loaded["Data / Hora"])
+    assert pd.api.types.is_float_dtype(loaded["FRP"])
+    assert loaded["FRP"].iloc[0] == 12.5
+    assert list(loaded["Satélite"]) == ["AQUA", "NPP-375", "AQUA"]
+
+
+def test_save_parquet_appends_and_prunes_partitions(tmp_path, fires):
+    root = tmp_path / "focos.parquet"
+    save_parquet(fires, root)
+    later = fires.iloc[:1].assign(**{"Data / Hora": "2025-11-10T18:00:00Z"})
+    save_parquet(later, root)
+
+    day = pd.read_parquet(root, columns=["Satélite"], filters=[("date", "=", "2025-11-10")])
+
+    assert len(pd.read_parquet(root)) == 4
+    assert len(day) == 3
+
+
+def test_save_parquet_skips_detections_already_stored(tmp_path, fires):
+    root = tmp_path / "focos.parquet"
+    save_parquet(fires, root)
+    files = sorted(root.rglob("*.parquet"))
+
+    # Same detections, with the timestamp written as the naive CSV text.
+    again = fires.assign(**{"Data / Hora": ["2025-11-10 16:32:00", "2025-11-10 17:00:00", "2025-11-11 03:15:00"]})
+    save_parquet(pd.concat([again, again]), root)
+
+    assert sorted(root.rglob("*.parquet")) == files
+    assert len(pd.read_parquet(root)) == 3
+
+
+def test_save_parquet_reads_only_parts_missing_from_the_key_index(tmp_path, fires, monkeypatch):
+    import pyarrow.parquet as pq
+
+    root = tmp_path / "focos.parquet"
+    save_parquet(fires, root, partition_by=())
+    save_parquet(fires.iloc[:1].assign(**{"Data / Hora": "2025-11-10T18:00:00Z"}), root, partition_by=())
+    assert (root / KEY_INDEX_NAME).exists()
+
+    def fail(*args, **kwargs):  # pragma: no cover - must not be reached
+        raise AssertionError("stored part re-read")
+
+    monkeypatch.setattr(pq, "ParquetFile", fail)
+    save_parquet(fires, root, partition_by=())
+    monkeypatch.undo()
+
+    assert len(pd.read_parquet(root)) == 4
+    # Part names carry a random suffix, so pick the first part by its contents.
+    first = next(part for part in root.glob("part-*.parquet") if pq.read_metadata(part).num_rows == len(fires))
+    first.unlink()
+    save_parquet(fires, root, partition_by=())
+    assert len(pd.read_parquet(root)) == 4
+
+
+def test_save_parquet_only_converts_known_numeric_columns(tmp_path, fires):
+    root = tmp_path / "focos.parquet"
+    save_parquet(fires.assign(Codigo=["0330100", "0320500", "0330100"]), root, partition_by=())
+
+    loaded = pd.read_parquet(root).sort_values("Data / Hora")
+
+    assert loaded["Codigo"].tolist() == ["0330100", "0320500", "0330100"]
+    assert pd.api.types.is_float_dtype(loaded["FRP"])
+
+
+def test_save_parquet_without_partitions_or_geometry(tmp_path):
+    df = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+
+    save_parquet(df, tmp_path / "plain", partition_by=())
+
+    files = list((tmp_path / "plain").glob("part-*.parquet"))
+    assert len(files) == 1
+    pd.testing.assert_frame_equal(pd.read_parquet(files[0]), df, check_dtype=False)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+from shapely.geometry import box
+
+from etl.load.parquet import save_parquet
+from etl.load.rollups import RollupStore, main, read_history
+from etl.load.sqlite import FireArchive
+from etl.pipeline import PipelineConfig, run_pipeline
+
+
+@pytest.fixture
+def fires(fires: pd.DataFrame) -> pd.DataFrame:
+    undated = fires.iloc[:1].assign(**{"Data / Hora": None, "Latitude": -21.6})
+    return pd.concat([fires, undated], ignore_index=True).drop(columns=["geometry"]).assign(
+        inside=[True, False, True, True]
+    )
+
+
+def test_update_counts_only_new_rows(tmp_path, fires):
+    store = RollupStore(tmp_path / "rollups.sqlite")
+
+    assert store.update(fires, region="EEEG") == 3
+    assert store.update(fires, region="EEEG") == 0
+    more = fires.assign(Latitude=lambda df: df["Latitude"] + 1)
+    assert store.update(pd.concat([more, more]), region="EEEG") == 3
+
+    daily = store.query("day", by=())
+    assert daily.to_dict("records") == [
+        {"bucket": "2025-11-10 00:00", "fires": 4, "inside": 2},
+        {"bucket": "2025-11-11 00:00", "fires": 2, "inside": 2},
+    ]
+
+
+def test_query_filters_and_groups(tmp_path, fires):
+    store = RollupStore(tmp_path / "rollups.sqlite")
+    store.update(fires, region="EEEG")
+    store.update(fires, region="PED")
+
+    hourly = store.query("hour", region="EEEG", start="2025-11-10 16:00", end="2025-11-11")
+    assert hourly[["bucket", "satellite", "biome", "fires"]].to_dict("records") == [
+        {"bucket": "2025-11-10 16:00", "satellite": "AQUA", "biome": "Mata Atlântica", "fires": 1},
+        {"bucket": "2025-11-10 17:00", "satellite": "NPP-375", "biome": "Mata Atlântica", "fires": 1},
+    ]
+    per_region = store.query("day", by=("region",), start="2025-11-11")
+    assert per_region[["region", "fires"]].to_dict("records") == [
+        {"region": "EEEG", "fires": 1},
+        {"region": "PED", "fires": 1},
+    ]
+    with pytest.raises(ValueError, match="dimensions"):
+        store.query("day", by=("municipio",))
+
+
+def test_timezone_aware_timestamps_use_brazil_time(tmp_path):
+    store = RollupStore(tmp_path / "rollups.sqlite", granularities=("hour",))
+    df = pd.DataFrame({"Data / Hora": ["2025-11-11T02:10:00Z", "2025-11-10 16:00:00"], "Satélite": ["AQUA", "AQUA"]})
+
+    store.update(df, region="EEEG")
+
+    assert store.query("hour", by=())["bucket"].tolist() == ["2025-11-10 16:00", "2025-11-10 23:00"]
+    assert store.query("day").empty
+
+
+def test_rebuild_replaces_counters(tmp_path, fires):
+    store = RollupStore(tmp_path / "rollups.sqlite")
+    store.update(fires, region="EEEG")
+
+    assert store.rebuild([fires.iloc[:1], fires.iloc[:2]], region="EEEG") == 2
+    assert store.query("day", by=())["fires"].tolist() == [2]
+
+
+def test_rebuild_command_reads_csv_and_archive(tmp_path, fires):
+    csv_path = tmp_path / "focos.csv"
+    fires.to_csv(csv_path, index=False)
+    rollups = tmp_path / "rollups.sqlite"
+
+    assert main(["--rollups", str(rollups), "--source", str(csv_path), "--region", "EEEG", "--chunk-size", "2"]) == 0
+    assert RollupStore(rollups).query("day", by=())["inside"].tolist() == [1, 1]
+
+    archive = FireArchive(tmp_path / "focos.sqlite")
+    archive.upsert(fires, region="EEEG")
+    archive.upsert(fires, region="PED")
+    store = RollupStore(rollups)
+    store.rebuild(read_history(archive.path))
+    assert store.query("day", by=("region",))["region"].tolist() == ["EEEG", "PED", "EEEG", "PED"]
+
+
+@pytest.mark.parametrize("suffix", ["csv", "parquet", "sqlite"])
+def test_update_after_rebuild_counts_nothing_again(tmp_path, fires, suffix):
+    # Stored coordinates may carry float noise the fresh rows do not have.
+    stored = fires.assign(Latitude=fires["Latitude"] + 1e-9)
+    source = tmp_path / f"focos.{suffix}"
+    if suffix == "csv":
+        stored.to_csv(source, index=False)
+    elif suffix == "parquet":
+        save_parquet(stored, source)
+    else:
+        FireArchive(source).upsert(stored, region="EEEG")
+    store = RollupStore(tmp_path / "rollups.sqlite")
+
+    assert store.rebuild(read_history(source), region="EEEG") == 3
+    counts = store.query("hour")
+    assert store.update(fires, region="EEEG") == 0
+    pd.testing.assert_frame_equal(store.query("hour"), counts)
+
+
+def test_keys_are_kept_for_the_retention_window(tmp_path, fires):
+    store = RollupStore(tmp_path / "rollups.sqlite", key_retention_days=1)
+    store.update(fires.iloc[:2], region="EEEG")
+
+    assert store.update(fires, region="EEEG") == 1
+    assert store.update(fires, region="EEEG") == 0
+    with store.connect() as connection:
+        assert connection.execute("SELECT COUNT(*) FROM rollup_keys").fetchone()[0] == 1
+    assert store.query("day", by=())["fires"].tolist() == [2, 1]
+    with pytest.raises(ValueError, match="retention"):
+        RollupStore(tmp_path / "other.sqlite", key_retention_days=0)
+
+
+def test_pipeline_updates_rollups(tmp_path, fires):
+    config = PipelineConfig(
+        dataframe_output=tmp_path / "fires.csv",
+        fetch_fire_data=lambda **_: fires.drop(columns=["inside"]),
+        get_reserve_geometry=lambda **_: box(-41.2, -21.45, -41.05, -21.35),
+        region_id="EEEG",
+        rollups_output=tmp_path / "rollups.sqlite",
+    )
+
+    first = run_pipeline(config)
+    run_pipeline(config)
+
+    assert first.outputs["rollups"] == "written"
+    totals = RollupStore(tmp_path / "rollups.sqlite").query("day", region="EEEG", by=())
+    assert totals[["fires", "inside"]].to_dict("records") == [{"fires": 2, "inside": 1}, {"fires": 1, "inside": 0}]
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+from shapely.geometry import Point, box
+
+from etl.load.sqlite import FireArchive, save_sqlite
+
+NOW = datetime(2025, 11, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def fires(fires: pd.DataFrame) -> pd.DataFrame:
+    # The last detection is older than the retention tests' window.
+    return fires.assign(**{"Data / Hora": ["2025-11-10 16:32:00", "2025-11-10 17:00:00", "2025-09-01 00:00:00"]})
+
+
+def test_upsert_drops_detections_already_archived(tmp_path, fires):
+    archive = FireArchive(tmp_path / "focos.sqlite")
+
+    assert archive.upsert(fires, region="eeeg") == 3
+    assert archive.upsert(fires, region="eeeg") == 0
+    assert archive.upsert(pd.concat([fires, fires]), region="outra") == 3
+    assert len(archive) == 6
+    assert list(archive.regions()) == ["eeeg", "outra"]
+
+
+def test_upsert_matches_detections_stored_with_another_dtype(tmp_path, fires):
+    archive = FireArchive(tmp_path / "focos.sqlite")
+    archive.upsert(fires.iloc[:1], region="eeeg")
+
+    as_text = fires.iloc[:1].assign(Latitude="-21.40", Longitude="-41.10")
+
+    assert archive.upsert(as_text, region="eeeg") == 0
+    assert len(archive) == 1
+
+
+def test_upsert_adds_new_columns(tmp_path, fires):
+    archive = FireArchive(tmp_path / "focos.sqlite")
+    archive.upsert(fires.drop(columns=["FRP"]))
+    archive.upsert(fires.iloc[:1].assign(**{"Data / Hora": "2025-11-11 10:00:00"}))
+
+    result = archive.query()
+
+    assert len(result) == 4
+    assert result["FRP"].isna().sum() == 3
+
+
+def test_query_filters_by_bbox_time_and_region(tmp_path, fires):
+    archive = FireArchive(tmp_path / "focos.sqlite")
+    archive.upsert(fires, region="eeeg")
+    archive.upsert(fires.iloc[1:2], region="outra")
+
+    in_box = archive.query(bbox=(-41.2, -21.6, -40.9, -21.3), region="eeeg")
+    recent = archive.query(start="2025-11-10 17:00", end=datetime(2025, 11, 12))
+
+    assert list(in_box["Data / Hora"]) == ["2025-09-01 00:00:00", "2025-11-10 16:32:00"]
+    assert in_box["geometry"].iloc[1].equals(Point(-41.1, -21.4))
+    assert in_box["FRP"].isna().tolist() == [True, False]
+    assert in_box["FRP"].iloc[1] == 12.5
+    assert list(recent["region_id"]) == ["eeeg", "outra"]
+
+
+def test_query_within_distance_of_geometry(tmp_path, fires):
+    archive = FireArchive(tmp_path / "focos.sqlite")
+    archive.upsert(fires)
+    # ~5.5 km east of the first point and ~10 km north of the third one.
+    area = box(-41.05, -21.45, -41.04, -21.35)
+
+    inside = archive.query(geometry=area)
+    near = archive.query(geometry=area, within_km=6)
+
+    assert inside.empty
+    assert [point.coords[0] for point in near["geometry"]] == [(-41.1, -21.4)]
+    with pytest.raises(ValueError):
+        archive.query(within_km=5)
+
+
+def test_retention_skips_and_removes_old_detections(tmp_path, fires):
+    archive = FireArchive(tmp_path / "focos.sqlite", retention_days=30)
+
+    assert archive.upsert(fires, now=NOW) == 2
+    assert archive.upsert(fires, now=datetime(2025, 12, 10, 16, 45, tzinfo=timezone.utc)) == 0
+    assert list(archive.query()["Data / Hora"]) == ["2025-11-10 17:00:00"]
+    assert archive.query(bbox=(-41.2, -21.6, -40.9, -21.3)).empty
+
+    archive.compact(now=datetime(2026, 1, 1, tzinfo=timezone.utc))
+    assert len(archive) == 0
+
+
+def test_save_sqlite_is_a_dataframe_loader(tmp_path, fires):
+    target = tmp_path / "nested" / "focos.sqlite"
+
+    assert save_sqlite(fires, target, region="eeeg") == target
+    assert save_sqlite(fires, target, region="eeeg") == target
+    assert len(FireArchive(target)) == 3
+
+
+def test_reserved_columns_are_rejected(tmp_path, fires):
+    with pytest.raises(ValueError):
+        FireArchive(tmp_path / "focos.sqlite").upsert(fires.assign(fid=1))
+
+
+def test_query_missing_archive_returns_empty_frame(tmp_path):
+    archive = FireArchive(tmp_path / "missing.sqlite")
+
+    assert archive.query().empty
+    assert len(archive) == 0
+    assert not (tmp_path / "missing.sqlite").exists()
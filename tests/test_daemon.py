@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import random
+
+import pandas as pd
+import pytest
+from shapely.geometry import Polygon
+
+from etl.daemon import DaemonConfig, PipelineDaemon, RunLock
+from etl.pipeline import PipelineConfig, PipelineResult
+
+
+def _pipeline(tmp_path, geometry_calls: list[int]) -> PipelineConfig:
+    def _geometry(**_):
+        geometry_calls.append(1)
+        return Polygon([(0, 0), (1, 0), (1, 1), (0, 1)])
+
+    return PipelineConfig(
+        dataframe_output=tmp_path / "focos.csv",
+        fetch_fire_data=lambda **_: pd.DataFrame({"lat": [0.5], "lon": [0.5]}),
+        get_reserve_geometry=_geometry,
+    )
+
+
+def test_daemon_keeps_geometry_and_survives_failures(tmp_path):
+    geometry_calls: list[int] = []
+    outcomes = iter([None, RuntimeError("scrape failed"), None])
+    seen: list[bool] = []
+
+    def _runner(cfg: PipelineConfig) -> PipelineResult:
+        cfg.get_reserve_geometry(name="EEEG")
+        outcome = next(outcomes)
+        if outcome is not None:
+            raise outcome
+        seen.append(True)
+        return None  # type: ignore[return-value]
+
+    daemon = PipelineDaemon(
+        DaemonConfig(
+            pipeline=_pipeline(tmp_path, geometry_calls),
+            interval=0.01,
+            jitter=0.0,
+            lock_file=tmp_path / "run.lock",
+            max_runs=3,
+        ),
+        runner=_runner,
+    )
+
+    assert daemon.serve() == 3
+    assert daemon.failures == 1
+    assert len(seen) == 2
+    assert len(geometry_calls) == 1
+
+
+def test_run_once_skips_when_another_run_holds_the_lock(tmp_path):
+    calls: list[int] = []
+    daemon = PipelineDaemon(
+        DaemonConfig(pipeline=_pipeline(tmp_path, []), lock_file=tmp_path / "run.lock"),
+        runner=lambda cfg: calls.append(1),
+    )
+    other = RunLock(tmp_path / "run.lock")
+    assert other.acquire()
+    try:
+        assert daemon.run_once() is None
+        assert calls == []
+    finally:
+        other.release()
+    daemon.run_once()
+    assert calls == [1]
+
+
+def test_next_start_stays_on_grid_and_skips_missed_slots(tmp_path):
+    daemon = PipelineDaemon(
+        DaemonConfig(pipeline=_pipeline(tmp_path, []), interval=600, jitter=30, lock_file=None),
+        rng=random.Random(1),
+    )
+
+    slot, start = daemon.next_start(0.0, now=5.0)
+    assert slot == 600 and abs(start - 600) <= 30
+
+    slot, start = daemon.next_start(slot, now=2_000.0)
+    assert slot == 2_400 and abs(start - 2_400) <= 30
+
+
+def test_stop_ends_serve_after_current_run(tmp_path):
+    daemon = PipelineDaemon(
+        DaemonConfig(pipeline=_pipeline(tmp_path, []), interval=3600, jitter=0, lock_file=None),
+        runner=lambda cfg: daemon.stop(),
+    )
+
+    assert daemon.serve() == 1
+
+
+def test_jitter_must_fit_in_interval(tmp_path):
+    with pytest.raises(ValueError):
+        DaemonConfig(pipeline=_pipeline(tmp_path, []), interval=60, jitter=30)
+
+
+def test_serve_waits_for_the_policy_delay(tmp_path):
+    class _Policy:
+        def __init__(self):
+            self.seen = []
+
+        def next_delay(self, result, now):
+            self.seen.append(result)
+            daemon.stop()
+            return 5.0
+
+    policy = _Policy()
+    daemon = PipelineDaemon(
+        DaemonConfig(pipeline=_pipeline(tmp_path, []), interval=3600, jitter=0, lock_file=None, policy=policy),
+        runner=lambda cfg: "result",
+    )
+
+    assert daemon.serve() == 1
+    assert policy.seen == ["result"]
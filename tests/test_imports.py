@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+HEAVY = {"numpy", "pandas", "shapely", "geopandas", "osmnx", "selenium", "webdriver_manager", "unidecode"}
+
+
+def _importtime(*args: str) -> dict[str, int]:
+    """Run Python with ``-X importtime`` and return the cumulative time per imported module."""
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules: dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, _self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        modules[name] = int(cumulative_us)
+    return modules
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ("-c", "import etl, etl.config, etl.extract, etl.load, etl.pipeline"),
+        ("-m", "etl.pipeline", "--help"),
+    ],
+)
+def test_cli_startup_does_not_import_heavy_dependencies(args):
+    modules = _importtime(*args)
+
+    assert not HEAVY & {name.split(".")[0] for name in modules}
+
+
+def test_offline_run_skips_scraping_and_osm_dependencies(tmp_path):
+    modules = _importtime(
+        "-m",
+        "etl.pipeline",
+        "--offline-sample",
+        "--fires-output",
+        str(tmp_path / "focos.csv"),
+        "--skip-geometry-output",
+    )
+
+    assert "pandas" in modules
+    assert not {"osmnx", "selenium", "webdriver_manager"} & {name.split(".")[0] for name in modules}
+
+
+def test_importing_config_has_no_side_effects():
+    code = (
+        "import logging, etl.config as c; "
+        "assert not logging.getLogger().handlers; "
+        "assert 'ENV_VARS' not in vars(c); "
+        "assert isinstance(c.ENV_VARS, dict)"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True)
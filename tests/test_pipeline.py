@@ -1,6 +1,11 @@
 from __future__ import annotations
 
+import tracemalloc
+
+import numpy as np
 import pandas as pd
+import pytest
+import shapely
 from shapely.geometry import Point, Polygon
 
 from etl.pipeline import PipelineConfig, run_pipeline
@@ -127,3 +132,365 @@ def test_run_pipeline_ignores_non_numeric_lat_lon(tmp_path):
     assert pd.isna(result.result.loc[0, "geometry"])
     assert isinstance(result.result.loc[1, "geometry"], Point)
     assert result.result["inside"].tolist() == [False, True]
+
+
+def test_run_pipeline_reports_skipped_outputs(tmp_path):
+    base_df = pd.DataFrame({"lat": [0.5], "lon": [0.5]})
+    reserve_geometry = Polygon([(0, 0), (2, 0), (2, 2), (0, 2)])
+
+    def make_config(value: int) -> PipelineConfig:
+        return PipelineConfig(
+            dataframe_output=tmp_path / "fires.csv",
+            geometry_output=tmp_path / "reserve.geojson",
+            fetch_fire_data=lambda **_: base_df.assign(value=value),
+            get_reserve_geometry=lambda **_: reserve_geometry,
+        )
+
+    first = run_pipeline(make_config(1))
+    second = run_pipeline(make_config(1))
+    third = run_pipeline(make_config(2))
+
+    assert first.outputs == {"dataframe": "written", "geometry": "written"}
+    assert second.outputs == {"dataframe": "skipped", "geometry": "skipped"}
+    assert third.outputs == {"dataframe": "written", "geometry": "skipped"}
+
+
+def test_run_pipeline_streams_chunks_from_iterator(tmp_path):
+    reserve_geometry = Polygon([(0, 0), (2, 0), (2, 2), (0, 2)])
+    chunks = [
+        pd.DataFrame({"lat": [0.5, 5.0], "lon": [0.5, 5.0]}),
+        pd.DataFrame({"lat": [1.5], "lon": [1.5]}),
+    ]
+    notified: list[int] = []
+
+    cfg = PipelineConfig(
+        dataframe_output=tmp_path / "fires.csv",
+        geometry_output=None,
+        fetch_fire_data=lambda **_: iter(chunks),
+        get_reserve_geometry=lambda **_: reserve_geometry,
+        notify_url="http://example.invalid",
+        notifier=lambda df, *_: notified.append(len(df)),
+    )
+
+    result = run_pipeline(cfg)
+
+    assert notified == [2, 1]
+    assert result.rows == 3
+    assert result.result.empty
+    assert "inside" in result.result.columns
+    stored = pd.read_csv(tmp_path / "fires.csv")
+    assert stored["inside"].tolist() == [True, False, True]
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_run_pipeline_chunk_size_splits_frames_and_matches_full_run(tmp_path):
+    base_df = pd.DataFrame({"lat": [0.5, 1.0, 3.0, 1.5, 0.1], "lon": [0.5, 1.0, 3.0, 1.5, 0.1]})
+    reserve_geometry = Polygon([(0, 0), (2, 0), (2, 2), (0, 2)])
+    sizes: list[int] = []
+
+    def recording_transformer(df, geom):
+        sizes.append(len(df))
+        from etl.transform.spatial import mark_points_inside
+
+        return mark_points_inside(df, geom)
+
+    def make_config(name: str, chunk_size: int | None) -> PipelineConfig:
+        return PipelineConfig(
+            dataframe_output=tmp_path / name,
+            geometry_output=None,
+            fetch_fire_data=lambda **_: base_df,
+            get_reserve_geometry=lambda **_: reserve_geometry,
+            transformer=recording_transformer,
+            chunk_size=chunk_size,
+        )
+
+    run_pipeline(make_config("full.csv", None))
+    run_pipeline(make_config("chunked.csv", 2))
+
+    assert sizes == [5, 2, 2, 1]
+    assert (tmp_path / "full.csv").read_text() == (tmp_path / "chunked.csv").read_text()
+
+
+def test_run_pipeline_streaming_aborts_without_touching_output(tmp_path):
+    output = tmp_path / "fires.csv"
+    output.write_text("previous\n", encoding="utf-8")
+
+    def failing_chunks():
+        yield pd.DataFrame({"lat": [0.5], "lon": [0.5]})
+        raise RuntimeError("fetch interrupted")
+
+    cfg = PipelineConfig(
+        dataframe_output=output,
+        geometry_output=None,
+        fetch_fire_data=lambda **_: failing_chunks(),
+        get_reserve_geometry=lambda **_: Polygon([(0, 0), (2, 0), (2, 2), (0, 2)]),
+    )
+
+    with pytest.raises(RuntimeError, match="fetch interrupted"):
+        run_pipeline(cfg)
+
+    assert output.read_text(encoding="utf-8") == "previous\n"
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_run_pipeline_zero_copy_keeps_peak_memory_near_input_size(tmp_path):
+    rng = np.random.default_rng(0)
+    rows = 100_000
+    lon = rng.uniform(0, 2, rows)
+    lat = rng.uniform(0, 2, rows)
+    base_df = pd.DataFrame({"lat": lat, "lon": lon, "geometry": shapely.points(lon, lat)})
+    input_size = base_df.memory_usage(deep=True).sum()
+
+    cfg = PipelineConfig(
+        dataframe_output=tmp_path / "fires.csv",
+        geometry_output=None,
+        fetch_fire_data=lambda **_: base_df,
+        get_reserve_geometry=lambda **_: Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]),
+        dataframe_loader=lambda df, path: None,
+        zero_copy=True,
+    )
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = run_pipeline(cfg)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+    assert input_size + peak < 1.5 * input_size
+    assert result.fires is base_df
+    assert np.shares_memory(result.fires["lat"].to_numpy(), result.result["lat"].to_numpy())
+    assert "inside" not in base_df.columns
+    assert result.result["inside"].sum() == ((lon <= 1) & (lat <= 1)).sum()
+
+
+def _capture_notifications(monkeypatch) -> list[dict[str, str]]:
+    import urllib.parse
+    import urllib.request
+
+    calls: list[dict[str, str]] = []
+
+    class _Response:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def getcode(self):
+            return 200
+
+        def read(self):
+            return b"ok"
+
+    def _urlopen(url, timeout):
+        calls.append(dict(urllib.parse.parse_qsl(urllib.parse.urlparse(url).query)))
+        return _Response()
+
+    monkeypatch.setattr(urllib.request, "urlopen", _urlopen)
+    return calls
+
+
+def test_notifier_sends_distance_band_with_alert(monkeypatch):
+    from etl.pipeline import notify_intersections
+
+    calls = _capture_notifications(monkeypatch)
+    df = pd.DataFrame(
+        {
+            "geometry": [Point(-41.1, -21.4), Point(-41.0, -21.4), Point(-40.0, -21.4)],
+            "zone": ["inside", "1-5 km", None],
+            "distance_to_boundary_m": [250.4, 3100.0, np.nan],
+        }
+    )
+
+    notify_intersections(df, "http://example.invalid/hook?key=1", "zone", "EEEG")
+
+    assert [(call["zone"], call["distanceM"]) for call in calls] == [("inside", "250"), ("1-5 km", "3100")]
+    assert all(call["key"] == "1" and call["regionId"] == "EEEG" for call in calls)
+
+
+def test_brazil_timestamps_are_formatted_column_wise():
+    from etl.alerts import format_brazil_timestamps
+
+    values = pd.Series(
+        ["2025-11-10T16:32:00Z", "2025/11/10 16:32:00", None, "garbage", "2025-11-10 10:00:00-03:00", np.nan]
+    )
+    aware = pd.Series(pd.to_datetime(["2025-11-10 16:32:05.7", None]).tz_localize("UTC"))
+
+    assert format_brazil_timestamps(values) == [
+        "10/11/2025 13:32:00",
+        "10/11/2025 16:32:00",
+        "",
+        "garbage",
+        "10/11/2025 10:00:00",
+        "",
+    ]
+    assert format_brazil_timestamps(aware) == ["10/11/2025 13:32:05", ""]
+    assert format_brazil_timestamps(pd.Series([], dtype=object)) == []
+
+
+def test_notification_params_skip_rows_without_point(caplog):
+    from shapely.geometry import LineString
+
+    from etl.alerts import notification_params
+
+    df = pd.DataFrame(
+        {
+            "Data / Hora": ["2025-11-10 16:32:00"] * 4,
+            "geometry": [Point(-41.1, -21.4), None, LineString([(0, 0), (1, 1)]), Point(-41.0, -21.5)],
+            "zone": ["inside", None, "inside", "0-1 km"],
+            "distance_to_boundary_m": [10.4, 1.0, 2.0, np.nan],
+        },
+        index=[5, 6, 7, 8],
+    )
+
+    params = notification_params(df, "EEEG", "Data / Hora")
+
+    common = {"regionId": "EEEG", "timestamp": "10/11/2025 16:32:00"}
+    assert params == [
+        (5, {**common, "lat": -21.4, "lng": -41.1, "zone": "inside", "distanceM": 10}),
+        (8, {**common, "lat": -21.5, "lng": -41.0, "zone": "0-1 km"}),
+    ]
+    assert "Registro 6 sem geometria" in caplog.text
+    assert "Registro 7 com geometria inválida" in caplog.text
+
+
+def test_notifier_sends_one_alert_per_cluster(monkeypatch):
+    from etl.pipeline import notify_intersections
+    from etl.transform.cluster import cluster_detections
+
+    calls = _capture_notifications(monkeypatch)
+    df = pd.DataFrame(
+        {
+            "Data / Hora": ["2025-11-10 16:32:00", "2025-11-10 16:40:00", "2025-11-10 16:41:00"],
+            "FRP": [5.0, 12.0, 1.0],
+            "inside": [True, False, True],
+            "geometry": [Point(-41.1, -21.4), Point(-41.102, -21.401), Point(-41.0, -21.4)],
+        }
+    )
+
+    notify_intersections(cluster_detections(df), "http://example.invalid/hook", "inside", "EEEG")
+
+    # The representative (highest FRP) lies outside, so the inside member is sent for its cluster.
+    assert [(call["lng"], call["clusterSize"]) for call in calls] == [("-41.1", "2"), ("-41.0", "1")]
+
+
+def test_run_pipeline_writes_delta_and_notifies_only_changes(tmp_path):
+    runs = [
+        pd.DataFrame({"Latitude": [0.5, 2.0], "Longitude": [0.5, 2.0], "FRP": [1.0, 2.0]}),
+        pd.DataFrame({"Latitude": [0.5, 2.0, 0.25], "Longitude": [0.5, 2.0, 0.25], "FRP": [1.0, 5.0, 3.0]}),
+    ]
+    notified: list[list[float]] = []
+    loaded: list[int] = []
+
+    def _run(fires: pd.DataFrame):
+        cfg = PipelineConfig(
+            dataframe_output=tmp_path / "fires.csv",
+            fetch_fire_data=lambda **_: fires,
+            get_reserve_geometry=lambda **_: Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]),
+            dataframe_loader=lambda df, path: loaded.append(len(df)),
+            notify_url="http://example.invalid",
+            notifier=lambda df, *args: notified.append(sorted(df.loc[df["inside"], "FRP"])),
+            delta_output=tmp_path / "delta.csv",
+            delta_only=True,
+        )
+        return run_pipeline(cfg)
+
+    first = _run(runs[0])
+    second = _run(runs[1])
+
+    assert first.delta.counts() == {"added": 2, "changed": 0, "removed": 0}
+    assert second.delta.counts() == {"added": 1, "changed": 1, "removed": 0}
+    assert notified == [[1.0], [3.0]]
+    assert loaded == [2, 2]
+    delta = pd.read_csv(tmp_path / "delta.csv")
+    assert list(delta["change"]) == ["added", "changed"]
+    assert delta["changed_columns"].iloc[1] == "FRP"
+    assert second.outputs["delta"] == "written"
+
+
+def test_failed_load_keeps_previous_delta_state(tmp_path):
+    fires = pd.DataFrame({"Latitude": [0.5, 2.0], "Longitude": [0.5, 2.0], "FRP": [1.0, 2.0]})
+    attempts: list[int] = []
+
+    def _loader(df, path):
+        attempts.append(len(df))
+        if len(attempts) == 1:
+            raise OSError("disco cheio")
+
+    cfg = PipelineConfig(
+        dataframe_output=tmp_path / "fires.csv",
+        fetch_fire_data=lambda **_: fires,
+        get_reserve_geometry=lambda **_: Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]),
+        dataframe_loader=_loader,
+        delta_output=tmp_path / "delta.csv",
+        delta_only=True,
+    )
+
+    with pytest.raises(OSError, match="disco cheio"):
+        run_pipeline(cfg)
+    retry = run_pipeline(cfg)
+
+    assert retry.delta.counts() == {"added": 2, "changed": 0, "removed": 0}
+    assert attempts == [2, 2]
+    assert run_pipeline(cfg).delta.counts() == {"added": 0, "changed": 0, "removed": 0}
+
+
+@pytest.mark.parametrize("module", ["etl.pipeline", "etl.daemon"])
+@pytest.mark.parametrize(
+    ("options", "message"),
+    [
+        (["--chunk-size", "10", "--cluster-radius-m", "500"], "--cluster-radius-m não é suportado com --chunk-size"),
+        (["--chunk-size", "10", "--delta-output", "x.csv"], "--delta-output não é suportado com --chunk-size"),
+        (["--chunk-size", "10", "--fires-format", "geojson"], "csv, parquet ou sqlite"),
+        (["--delta-only"], "--delta-only requer --delta-output"),
+    ],
+)
+def test_cli_rejects_unsupported_combinations(module, options, message, capsys):
+    from importlib import import_module
+
+    main = import_module(module).main
+    with pytest.raises(SystemExit):
+        main(["--offline-sample", *options])
+
+    assert message in capsys.readouterr().err
+
+
+def test_delta_options_are_validated(tmp_path):
+    base = {
+        "dataframe_output": tmp_path / "fires.csv",
+        "fetch_fire_data": lambda **_: None,
+        "get_reserve_geometry": lambda **_: None,
+    }
+
+    with pytest.raises(ValueError):
+        PipelineConfig(**base, delta_only=True)
+    with pytest.raises(ValueError):
+        PipelineConfig(**base, delta_output=tmp_path / "delta.csv", chunk_size=10)
+
+
+def test_load_sample_geometry_reports_empty_collection(tmp_path):
+    from etl.pipeline import load_sample_geometry
+
+    path = tmp_path / "vazia.geojson"
+    path.write_text('{"type": "FeatureCollection", "features": []}', encoding="utf-8")
+
+    with pytest.raises(ValueError, match="não contém features"):
+        load_sample_geometry(path)
+
+
+def test_cli_does_not_overlap_a_run_holding_the_lock(tmp_path):
+    from etl.pipeline import main
+    from etl.utils import RunLock
+
+    lock_file = tmp_path / "pipeline.lock"
+    output = tmp_path / "fires.csv"
+    holder = RunLock(lock_file)
+    assert holder.acquire()
+    try:
+        assert main(["--offline-sample", "--fires-output", str(output), "--lock-file", str(lock_file)]) == 1
+    finally:
+        holder.release()
+
+    assert not output.exists()
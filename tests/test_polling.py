@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+from shapely.geometry import Polygon
+
+from etl.pipeline import PipelineResult
+from etl.polling import AdaptivePollingPolicy, latest_by_satellite
+
+START = datetime(2025, 11, 3, 12, 0, tzinfo=timezone.utc)
+
+
+def _result(rows: list[tuple[str, str]]) -> PipelineResult:
+    fires = pd.DataFrame(rows, columns=["Satélite", "Data / Hora"])
+    return PipelineResult(fires=fires, geometry=Polygon(), result=fires)
+
+
+def test_latest_by_satellite_ignores_unparseable_rows():
+    fires = pd.DataFrame(
+        {
+            "Satélite": ["AQUA", "AQUA", "NOAA-20", "NOAA-20"],
+            "Data / Hora": ["2025/11/03 04:10:00", "2025/11/03 16:40:00", "2025/11/03 05:00:00", "?"],
+        }
+    )
+
+    latest = latest_by_satellite(fires)
+
+    assert latest == {
+        "AQUA": pd.Timestamp("2025-11-03 16:40:00", tz="UTC"),
+        "NOAA-20": pd.Timestamp("2025-11-03 05:00:00", tz="UTC"),
+    }
+    assert list(latest_by_satellite(fires, ["NOAA-20"])) == ["NOAA-20"]
+
+
+def test_policy_backs_off_then_polls_densely_around_learned_update(tmp_path):
+    policy = AdaptivePollingPolicy(min_interval=120, max_interval=1800, window=600, state_path=tmp_path / "s.json")
+    rows = [("AQUA", "2025/11/03 10:00:00")]
+
+    assert policy.next_delay(_result(rows), START) == 240  # nothing learned yet: back off
+    delays = [policy.next_delay(_result(rows), START + timedelta(minutes=minute)) for minute in (4, 8, 16)]
+    assert delays == [480, 960, 1800]
+
+    # New AQUA rows show up; the arrival time of day is learned.
+    rows.append(("AQUA", "2025/11/03 12:20:00"))
+    assert policy.next_delay(_result(rows), START + timedelta(minutes=46)) == 120
+
+    # Learned arrival: midway between the polls at 12:16 and 12:46, i.e. 12:31.
+    # A day later the policy backs off, but never past the window opening at 12:21.
+    next_day = START + timedelta(days=1)
+    assert policy.next_delay(_result(rows), next_day - timedelta(hours=3)) == 240
+    assert policy.next_delay(_result(rows), next_day + timedelta(minutes=5)) == 480
+    assert policy.next_delay(_result(rows), next_day + timedelta(minutes=13)) == 480
+    assert policy.next_delay(_result(rows), next_day + timedelta(minutes=25)) == 120
+
+    reloaded = AdaptivePollingPolicy(window=600, state_path=tmp_path / "s.json")
+    assert reloaded.seconds_to_window(next_day + timedelta(minutes=30)) == 0.0
+    assert reloaded.latest == policy.latest
+
+
+def test_policy_rejects_inverted_bounds():
+    with pytest.raises(ValueError):
+        AdaptivePollingPolicy(min_interval=600, max_interval=60)
+
+
+def test_streaming_results_carry_latest_detection_per_satellite(tmp_path):
+    from etl.pipeline import PipelineConfig, run_pipeline
+
+    fires = pd.DataFrame(
+        {
+            "Satélite": ["AQUA", "NOAA-20", "AQUA"],
+            "Data / Hora": ["2025/11/03 10:00:00", "2025/11/03 11:00:00", "2025/11/03 12:20:00"],
+            "Latitude": [0.5, 0.5, 5.0],
+            "Longitude": [0.5, 0.5, 5.0],
+        }
+    )
+    config = PipelineConfig(
+        dataframe_output=tmp_path / "fires.csv",
+        fetch_fire_data=lambda **_: fires,
+        get_reserve_geometry=lambda **_: Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]),
+        chunk_size=1,
+    )
+    policy = AdaptivePollingPolicy(min_interval=120, max_interval=1800)
+
+    result = run_pipeline(config)
+    policy.next_delay(result, START)
+
+    assert result.fires.empty
+    assert result.latest_detections == {
+        "AQUA": pd.Timestamp("2025-11-03 12:20:00", tz="UTC"),
+        "NOAA-20": pd.Timestamp("2025-11-03 11:00:00", tz="UTC"),
+    }
+    assert policy.latest == {"AQUA": "2025-11-03T12:20:00+00:00", "NOAA-20": "2025-11-03T11:00:00+00:00"}
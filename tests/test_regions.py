@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+from shapely.geometry import Point, box
+
+from etl.regions import MultiRegionConfig, RegionSpec, load_region_specs, run_regions
+from etl.transform.spatial import mark_points_inside, points_in_regions
+
+
+@dataclass
+class _Filters:
+    state_values: tuple[str, ...]
+
+
+def test_run_regions_fetches_once_per_filter_set(tmp_path):
+    fetches: list[object] = []
+    notified: list[tuple[str, str, int]] = []
+    areas = {"A": box(0, 0, 1, 1), "B": box(0, 0, 3, 1), "C": box(5, 5, 6, 6)}
+
+    def fetch(**kwargs):
+        fetches.append(kwargs["filters"])
+        return pd.DataFrame({"Latitude": [0.5, 0.5, 5.5, 9.0], "Longitude": [0.5, 2.5, 5.5, 9.0]})
+
+    def notifier(df, url, column, region_id):
+        notified.append((region_id, url, int(df[column].sum())))
+
+    regions = [
+        RegionSpec("Área A", region_id="A", filters=_Filters(("33",)), notify_url="http://a.invalid"),
+        RegionSpec("Área B", region_id="B", filters=_Filters(("33",))),
+        RegionSpec("Área C", region_id="C", filters=_Filters(("35",)), notify_url="http://c.invalid"),
+    ]
+    result = run_regions(
+        MultiRegionConfig(
+            regions=regions,
+            output_dir=tmp_path,
+            fetch_fire_data=fetch,
+            get_reserve_geometry=lambda name, **_: areas[name[-1]],
+            notifier=notifier,
+        )
+    )
+
+    assert result.fetches == 2
+    assert fetches == [_Filters(("33",)), _Filters(("35",))]
+    assert {key: value.inside for key, value in result.regions.items()} == {"A": 1, "B": 2, "C": 1}
+    assert result.regions["B"].mask.tolist() == [True, True, False, False]
+    assert notified == [("A", "http://a.invalid", 1), ("C", "http://c.invalid", 1)]
+    saved = pd.read_csv(tmp_path / "b.csv")
+    assert saved["inside"].tolist() == [True, True, False, False]
+    assert (tmp_path / "c.geojson").exists()
+
+
+def test_region_ids_must_be_unique(tmp_path):
+    with pytest.raises(ValueError):
+        MultiRegionConfig(
+            regions=[RegionSpec("x", region_id="Área 1"), RegionSpec("y", region_id="area 1")],
+            output_dir=tmp_path,
+            fetch_fire_data=lambda **_: pd.DataFrame(),
+            get_reserve_geometry=lambda **_: box(0, 0, 1, 1),
+        )
+
+
+def test_load_region_specs_splits_filters_and_reserve_options(tmp_path):
+    (tmp_path / "regions.json").write_text(
+        '[{"name": "Guaxindiba", "region_id": "EEEG", "geometry_file": "eeeg.geojson",'
+        ' "state_values": ["03333"], "search_places": ["Rio de Janeiro, Brazil"]}]',
+        encoding="utf-8",
+    )
+
+    (spec,) = load_region_specs(tmp_path / "regions.json")
+
+    assert spec.geometry_file == tmp_path / "eeeg.geojson"
+    assert spec.filters.state_values == ("03333",)
+    assert spec.reserve_kwargs == {"search_places": ["Rio de Janeiro, Brazil"]}
+
+
+def test_points_in_regions_matches_per_region_intersects():
+    rng = np.random.default_rng(11)
+    points = np.array(list(shapely.points(rng.uniform(-1, 11, 5_000), rng.uniform(-1, 11, 5_000))) + [None])
+    regions = [box(0, 0, 2, 2), Point(5, 5).buffer(3), box(1, 1, 9, 1.5), box(20, 20, 21, 21)]
+
+    membership = points_in_regions(points, regions)
+
+    for column, region in enumerate(regions):
+        np.testing.assert_array_equal(membership[:, column], shapely.intersects(region, points))
+    df = pd.DataFrame({"geometry": points})
+    marked = mark_points_inside(df, {"a": regions[0], "b": regions[1]})
+    assert marked["b"].tolist() == membership[:, 1].tolist()
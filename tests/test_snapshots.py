@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import threading
+
+import pandas as pd
+import pytest
+from shapely.geometry import Polygon
+
+from etl.pipeline import PipelineConfig, run_pipeline
+from etl import snapshots
+from etl.snapshots import StageUnavailable, snapshot_key, wait_for_stages
+
+SQUARE = Polygon([(0, 0), (1, 0), (1, 1), (0, 1)])
+
+
+def _points(lon: float) -> pd.DataFrame:
+    return pd.DataFrame({"lat": [0.5, 2.0], "lon": [lon, 0.5]})
+
+
+def _config(tmp_path, fetch, geometry=lambda **_: SQUARE, **kwargs) -> PipelineConfig:
+    return PipelineConfig(
+        dataframe_output=tmp_path / "focos.csv",
+        fetch_fire_data=fetch,
+        get_reserve_geometry=geometry,
+        snapshot_dir=tmp_path / "snapshots",
+        **kwargs,
+    )
+
+
+def test_slow_fetch_serves_snapshot_and_refreshes_in_background(tmp_path):
+    release = threading.Event()
+    calls: list[str] = []
+
+    def fetch(**kwargs):
+        calls.append(kwargs["run"])
+        if kwargs["run"] == "slow":
+            release.wait(10)
+            return _points(0.75)
+        return _points(0.25)
+
+    fresh = run_pipeline(_config(tmp_path, fetch, fetch_fire_kwargs={"run": "fast"}, fetch_budget=5))
+    assert fresh.stale == ()
+
+    # Same data selection key as the next runs so they share the snapshot.
+    (tmp_path / "snapshots" / f"fires-{snapshot_key({'run': 'fast'})}.parquet").rename(
+        tmp_path / "snapshots" / f"fires-{snapshot_key({'run': 'slow'})}.parquet"
+    )
+    cfg = _config(tmp_path, fetch, fetch_fire_kwargs={"run": "slow"}, fetch_budget=0.2)
+    for _ in range(2):
+        stale = run_pipeline(cfg)
+        assert stale.stale == ("fires",)
+        assert stale.result["lon"].tolist() == [0.25, 0.5]
+    assert calls == ["fast", "slow"]  # the late call is joined, not repeated
+
+    release.set()
+    refreshed = run_pipeline(cfg)
+    assert refreshed.stale == ()
+    assert refreshed.result["lon"].tolist() == [0.75, 0.5]
+
+
+def test_failing_geometry_uses_last_good_snapshot(tmp_path):
+    outcomes = iter([SQUARE, OSError("overpass down")])
+
+    def geometry(**_):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    cfg = _config(tmp_path, lambda **_: _points(0.5), geometry, geometry_budget=5)
+    assert run_pipeline(cfg).stale == ()
+    result = run_pipeline(cfg)
+
+    assert result.stale == ("geometry",)
+    assert result.geometry.equals(SQUARE)
+    assert result.result["inside"].tolist() == [True, False]
+
+
+def test_stage_without_snapshot_still_fails(tmp_path):
+    release = threading.Event()
+
+    def fetch(**_):
+        release.wait(10)
+        return _points(0.5)
+
+    try:
+        with pytest.raises(StageUnavailable):
+            run_pipeline(_config(tmp_path, fetch, fetch_fire_kwargs={"run": "never"}, fetch_budget=0.1))
+    finally:
+        release.set()
+
+    def broken(**_):
+        raise OSError("offline")
+
+    with pytest.raises(OSError):
+        run_pipeline(_config(tmp_path, broken, fetch_fire_kwargs={"run": "broken"}))
+
+
+def test_wait_for_stages_lets_late_refresh_store_snapshot(tmp_path):
+    release = threading.Event()
+
+    def fetch(**_):
+        release.wait(10)
+        return _points(0.5)
+
+    with pytest.raises(StageUnavailable):
+        run_pipeline(_config(tmp_path, fetch, fetch_fire_kwargs={"run": "late"}, fetch_budget=0.05))
+    assert not wait_for_stages(0.05)
+
+    release.set()
+
+    assert wait_for_stages(5)
+    assert (tmp_path / "snapshots" / f"fires-{snapshot_key({'run': 'late'})}.parquet").exists()
+
+
+def test_exit_cancels_stage_still_running_after_timeout(tmp_path, monkeypatch):
+    release = threading.Event()
+    cancelled: list[int] = []
+
+    def fetch(**_):
+        release.wait(10)
+        return _points(0.5)
+
+    def hook(thread_id: int) -> None:
+        cancelled.append(thread_id)
+        release.set()
+
+    monkeypatch.setattr(snapshots, "_cancel_hooks", [hook])
+    monkeypatch.setattr(snapshots, "EXIT_STAGE_TIMEOUT", 0.1)
+    with pytest.raises(StageUnavailable):
+        run_pipeline(_config(tmp_path, fetch, fetch_fire_kwargs={"run": "hung"}, fetch_budget=0.05))
+    [call] = [call for call in snapshots._inflight.values() if call.is_alive()]
+
+    snapshots._wait_at_exit()
+
+    assert cancelled == [call.ident]
+    call.join(5)
+    assert not call.is_alive()
+
+
+def test_snapshot_key_ignores_live_objects():
+    class Session:
+        pass
+
+    first = snapshot_key({"name": "EEEG", "osm_cache": Session()})
+    assert first == snapshot_key({"name": "EEEG", "osm_cache": Session()})
+    assert snapshot_key({"name": "EEEG"}) != snapshot_key({"name": "PED"})
+
+
+def test_pipeline_registers_the_scraper_cancel_hook(tmp_path, monkeypatch):
+    terrabrasilis = pytest.importorskip("etl.extract.terrabrasilis")
+    monkeypatch.setattr(snapshots, "_cancel_hooks", [])
+
+    run_pipeline(_config(tmp_path, lambda **_: _points(0.5), fetch_fire_kwargs={"run": "hook"}, fetch_budget=5))
+
+    assert snapshots._cancel_hooks == [terrabrasilis.cancel_fetch]
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import Point, box, mapping
+
+from etl.pipeline import PipelineConfig, run_pipeline
+from etl.subscriptions import Subscription, SubscriptionRegistry, notify_subscribers
+from etl.transform.spatial import region_matches
+
+
+@pytest.fixture
+def area_fires() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Data / Hora": ["2024-09-01 15:00:00", "2024-09-01 15:05:00", "2024-09-01 16:00:00", None],
+            "geometry": [Point(0.5, 0.5), Point(0.6, 0.5), Point(2.5, 0.5), None],
+        }
+    )
+
+
+def _registry() -> SubscriptionRegistry:
+    return SubscriptionRegistry(
+        [
+            Subscription("ong-a", "http://a.invalid/hook", box(0, 0, 1, 1)),
+            Subscription("ong-b", "http://b.invalid/hook", box(0, 0, 3, 1), region_id="B"),
+            Subscription("ong-c", "http://a.invalid/hook", box(2, 0, 3, 1)),
+            Subscription("ong-d", "http://d.invalid/hook", box(50, 50, 51, 51)),
+        ]
+    )
+
+
+def test_region_matches_returns_sparse_pairs():
+    points = np.array([Point(0.5, 0.5), Point(2.5, 0.5), None], dtype=object)
+    point_index, region_index = region_matches(points, [box(0, 0, 3, 1), box(2, 0, 3, 1), box(9, 9, 10, 10)])
+
+    assert list(zip(point_index.tolist(), region_index.tolist())) == [(0, 0), (1, 0), (1, 1)]
+
+
+def test_fan_out_groups_alerts_per_endpoint(area_fires):
+    alerts = _registry().fan_out(area_fires)
+
+    assert set(alerts) == {"http://a.invalid/hook", "http://b.invalid/hook"}
+    assert [(a["subscriber"], a["lng"]) for a in alerts["http://a.invalid/hook"]] == [
+        ("ong-a", 0.5),
+        ("ong-a", 0.6),
+        ("ong-c", 2.5),
+    ]
+    b_alerts = alerts["http://b.invalid/hook"]
+    assert [a["lng"] for a in b_alerts] == [0.5, 0.6, 2.5]
+    assert {a["regionId"] for a in b_alerts} == {"B"}
+    assert alerts["http://a.invalid/hook"][0]["regionId"] == "ong-a"
+    assert b_alerts[0]["timestamp"] == "01/09/2024 15:00:00"
+
+
+def test_fan_out_sends_one_alert_per_cluster(area_fires):
+    df = area_fires.assign(
+        cluster_id=[0, 0, 1, 2],
+        cluster_size=[2, 2, 1, 1],
+        cluster_representative=[False, True, True, True],
+    )
+
+    alerts = _registry().fan_out(df)
+
+    assert [(a["subscriber"], a["lng"], a["clusterSize"]) for a in alerts["http://a.invalid/hook"]] == [
+        ("ong-a", 0.6, 2),
+        ("ong-c", 2.5, 1),
+    ]
+    assert [a["lng"] for a in alerts["http://b.invalid/hook"]] == [0.6, 2.5]
+
+
+def test_notify_subscribers_posts_once_per_endpoint(area_fires):
+    sent: list[tuple[str, int]] = []
+
+    def sender(endpoint, alerts):
+        sent.append((endpoint, len(alerts)))
+
+    counts = notify_subscribers(area_fires, _registry(), sender=sender)
+
+    assert sorted(sent) == [("http://a.invalid/hook", 3), ("http://b.invalid/hook", 3)]
+    assert counts == {"http://a.invalid/hook": 3, "http://b.invalid/hook": 3}
+
+
+def test_from_file_reads_inline_and_file_geometries(tmp_path):
+    (tmp_path / "area.geojson").write_text(json.dumps(mapping(box(2, 0, 3, 1))), encoding="utf-8")
+    path = tmp_path / "subscriptions.json"
+    path.write_text(
+        json.dumps(
+            [
+                {"subscriber": "ong-a", "endpoint": "http://a.invalid", "geometry": mapping(box(0, 0, 1, 1))},
+                {
+                    "subscriber": "ong-c",
+                    "endpoint": "http://c.invalid",
+                    "geometry_file": "area.geojson",
+                    "region_id": "C",
+                },
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    registry = SubscriptionRegistry.from_file(path)
+
+    assert len(registry) == 2
+    assert [s.alert_region for s in registry] == ["ong-a", "C"]
+    assert registry.subscriptions[1].geometry.equals(box(2, 0, 3, 1))
+
+
+def test_from_file_requires_geometry(tmp_path):
+    path = tmp_path / "subscriptions.json"
+    path.write_text(json.dumps([{"subscriber": "ong-a", "endpoint": "http://a.invalid"}]), encoding="utf-8")
+
+    with pytest.raises(ValueError, match="geometry"):
+        SubscriptionRegistry.from_file(path)
+
+
+def test_pipeline_notifies_subscribers(tmp_path, monkeypatch):
+    sent: list[tuple[str, list[dict]]] = []
+    monkeypatch.setattr("etl.subscriptions.post_alerts", lambda endpoint, alerts: sent.append((endpoint, alerts)))
+    fires = pd.DataFrame({"Latitude": [0.5, 5.5], "Longitude": [0.5, 5.5]})
+
+    run_pipeline(
+        PipelineConfig(
+            dataframe_output=tmp_path / "fires.csv",
+            fetch_fire_data=lambda **_: fires,
+            get_reserve_geometry=lambda **_: box(0, 0, 1, 1),
+            subscriptions=_registry(),
+        )
+    )
+
+    assert [(endpoint, [a["subscriber"] for a in alerts]) for endpoint, alerts in sorted(sent)] == [
+        ("http://a.invalid/hook", ["ong-a"]),
+        ("http://b.invalid/hook", ["ong-b"]),
+    ]
+
+
+def test_streaming_pipeline_posts_once_per_endpoint(tmp_path, monkeypatch):
+    sent: list[tuple[str, list[dict]]] = []
+    monkeypatch.setattr("etl.subscriptions.post_alerts", lambda endpoint, alerts: sent.append((endpoint, alerts)))
+    fires = pd.DataFrame({"Latitude": [0.5, 0.6, 0.5], "Longitude": [0.5, 0.6, 2.5]})
+
+    run_pipeline(
+        PipelineConfig(
+            dataframe_output=tmp_path / "fires.csv",
+            fetch_fire_data=lambda **_: fires,
+            get_reserve_geometry=lambda **_: box(0, 0, 1, 1),
+            subscriptions=_registry(),
+            chunk_size=1,
+        )
+    )
+
+    assert [(endpoint, len(alerts)) for endpoint, alerts in sorted(sent)] == [
+        ("http://a.invalid/hook", 3),
+        ("http://b.invalid/hook", 3),
+    ]
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import os
+
+import pandas as pd
+import pytest
+
+from etl.utils import atomic_target, detection_keys, pick_timestamp_column, replace_file, resolve_key_columns, row_keys
+
+
+def test_resolve_key_columns_defaults_and_explicit():
+    columns = ["Data / Hora", "Satélite", "Latitude", "Longitude", "FRP", "geometry"]
+
+    assert resolve_key_columns(columns, None) == ["Data / Hora", "Satélite", "Latitude", "Longitude"]
+    assert resolve_key_columns(["FRP", "geometry"], None) == ["FRP"]
+    assert resolve_key_columns(columns, ["FRP"]) == ["FRP"]
+    with pytest.raises(KeyError, match="Estado"):
+        resolve_key_columns(columns, ["Estado"])
+
+
+def test_row_keys_match_csv_text():
+    typed = pd.DataFrame({"Latitude": [-21.4, None], "Satélite": ["AQUA", "NPP"]})
+    text = pd.DataFrame({"Latitude": ["-21.4", ""], "Satélite": ["AQUA", "NPP"]})
+
+    assert row_keys(typed, ["Latitude", "Satélite"]).tolist() == row_keys(text, ["Latitude", "Satélite"]).tolist()
+
+
+def test_pick_timestamp_column_falls_back_to_lowercase_names():
+    assert pick_timestamp_column(pd.DataFrame(columns=["Data_Hora_GMT"])) == "Data_Hora_GMT"
+    assert pick_timestamp_column(pd.DataFrame(columns=["Latitude"])) is None
+
+
+def test_detection_keys_ignore_storage_format():
+    columns = ["Data / Hora", "Satélite", "Latitude", "Longitude"]
+    text = pd.DataFrame(
+        {
+            "Data / Hora": ["2025-11-10 16:32:00", "2025-11-10T13:50:00-03:00", "sem data"],
+            "Satélite": ["AQUA", "NPP-375", "AQUA"],
+            "Latitude": ["-21.4000001", "-21.3", "-21.5"],
+            "Longitude": ["-41.1", "-41.0", "-41.0"],
+        }
+    )
+    typed = text.assign(
+        **{"Data / Hora": pd.to_datetime(text["Data / Hora"], utc=True, errors="coerce", format="mixed")},
+        Latitude=[-21.4, -21.3, -21.5],
+        Longitude=[-41.1, -41.0, -41.0],
+    )
+
+    assert detection_keys(text, columns)[:2].tolist() == detection_keys(typed, columns)[:2].tolist()
+    assert len(set(detection_keys(text, columns).tolist())) == 3
+
+
+def test_atomic_target_writes_next_to_the_target(tmp_path):
+    target = tmp_path / "focos.csv"
+
+    fd, tmp_name = atomic_target(target)
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write("a\n")
+    replace_file(tmp_name, target)
+
+    assert os.path.dirname(tmp_name) == str(tmp_path)
+    assert target.read_text(encoding="utf-8") == "a\n"
+    assert list(tmp_path.iterdir()) == [target]
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import Point
+
+from etl.transform.cluster import cluster_detections, cluster_labels, connected_components
+
+# ~111 m per 0.001 degree of latitude.
+DEG_100M = 0.0009
+
+
+@pytest.fixture
+def nearby_fires() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Data / Hora": [
+                "2025-11-10 16:32:00",
+                "2025-11-10 16:40:00",
+                "2025-11-10 16:50:00",
+                "2025-11-10 18:30:00",
+                "2025-11-10 16:33:00",
+            ],
+            "Satélite": ["NPP-375", "AQUA_M-T", "GOES-16", "NPP-375", "NOAA-20"],
+            "FRP": [5.0, 12.0, None, 3.0, 1.0],
+            "geometry": [
+                Point(-41.1, -21.4),
+                Point(-41.1, -21.4 + 3 * DEG_100M),
+                Point(-41.1, -21.4 + 6 * DEG_100M),
+                Point(-41.1, -21.4),
+                Point(-41.0, -21.4),
+            ],
+        }
+    )
+
+
+def test_cluster_detections_links_nearby_detections_in_time(nearby_fires):
+    result = cluster_detections(nearby_fires, radius_m=400, window_minutes=30)
+
+    # The third point chains through the second (single linkage); the fourth is hours later.
+    assert list(result["cluster_id"]) == [0, 0, 0, 1, 2]
+    assert list(result["cluster_size"]) == [3, 3, 3, 1, 1]
+    assert list(result["cluster_representative"]) == [False, True, False, True, True]
+
+
+def test_cluster_detections_space_only_and_small_radius(nearby_fires):
+    space_only = cluster_detections(nearby_fires, radius_m=400, window_minutes=None)
+    tight = cluster_detections(nearby_fires, radius_m=200)
+
+    assert list(space_only["cluster_id"]) == [0, 0, 0, 0, 1]
+    assert tight["cluster_id"].nunique() == 5
+    assert tight["cluster_representative"].all()
+
+
+def test_cluster_detections_without_timestamp_or_priority_column(nearby_fires):
+    df = nearby_fires.drop(columns=["Data / Hora", "FRP"])
+
+    result = cluster_detections(df, radius_m=400, copy=False)
+
+    assert result is df
+    assert list(result["cluster_id"]) == [0, 0, 0, 0, 1]
+    assert list(result["cluster_representative"]) == [True, False, False, False, True]
+
+
+def test_missing_geometry_or_time_form_singletons(nearby_fires):
+    df = nearby_fires
+    df.loc[1, "geometry"] = None
+    df.loc[2, "Data / Hora"] = "not a date"
+
+    result = cluster_detections(df, radius_m=400)
+
+    assert list(result["cluster_id"]) == [0, 1, 2, 3, 4]
+
+
+def test_cluster_labels_match_brute_force():
+    rng = np.random.default_rng(7)
+    n = 400
+    lon = rng.uniform(-41.05, -41.0, n)
+    lat = rng.uniform(-21.45, -21.4, n)
+    seconds = rng.uniform(0, 7200, n)
+
+    labels = cluster_labels(lon, lat, seconds, radius_m=300, window_s=900)
+
+    lat_r, lon_r = np.radians(lat), np.radians(lon)
+    h = (
+        np.sin((lat_r[:, None] - lat_r[None, :]) / 2) ** 2
+        + np.cos(lat_r[:, None]) * np.cos(lat_r[None, :]) * np.sin((lon_r[:, None] - lon_r[None, :]) / 2) ** 2
+    )
+    close = (2 * 6_371_008.8 * np.arcsin(np.sqrt(h)) <= 300) & (np.abs(seconds[:, None] - seconds[None, :]) <= 900)
+    a, b = np.nonzero(np.triu(close, 1))
+    _, expected = np.unique(connected_components(n, a, b), return_inverse=True)
+    np.testing.assert_array_equal(labels, expected)
+    assert 1 < labels.max() < n - 1
+
+
+def test_connected_components_follows_chains():
+    roots = connected_components(6, np.array([4, 3, 1]), np.array([5, 4, 0]))
+
+    assert list(roots) == [0, 0, 2, 3, 3, 3]
+
+
+def test_invalid_radius_is_rejected():
+    with pytest.raises(ValueError):
+        cluster_labels(np.zeros(2), np.zeros(2), radius_m=0)
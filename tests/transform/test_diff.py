@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import stat
+
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import Point
+
+from etl.transform.diff import diff_frames, diff_with_state, load_state, row_hashes, save_state
+
+
+@pytest.fixture
+def fires(fires: pd.DataFrame) -> pd.DataFrame:
+    return fires[["Data / Hora", "Satélite", "Latitude", "Longitude", "FRP"]].assign(RiscoFogo=[0.2, 0.5, 0.9])
+
+
+def test_diff_reports_new_vanished_and_changed_rows(fires):
+    previous = fires
+    new_row = {
+        "Data / Hora": "2025-11-11 04:00:00",
+        "Satélite": "NOAA-20",
+        "Latitude": -21.0,
+        "Longitude": -41.2,
+        "FRP": 1.0,
+        "RiscoFogo": 0.1,
+    }
+    current = pd.concat(
+        [previous.iloc[1:].assign(FRP=[3.0, 7.5]), pd.DataFrame([new_row])],
+        ignore_index=True,
+    )
+
+    diff = diff_frames(previous, current)
+
+    assert diff.counts() == {"added": 1, "changed": 1, "removed": 1}
+    assert list(diff.added["Satélite"]) == ["NOAA-20"]
+    assert list(diff.removed["Satélite"]) == ["AQUA"]
+    assert diff.removed["FRP"].iloc[0] == 12.5
+    assert diff.changed["FRP"].iloc[0] == 7.5
+    assert list(diff.changed["changed_columns"]) == ["FRP"]
+    assert list(diff.current["Satélite"]) == ["NOAA-20", "AQUA"]
+
+    frame = diff.to_frame()
+    assert list(frame.columns[:2]) == ["change", "changed_columns"]
+    assert list(frame["change"]) == ["added", "changed", "removed"]
+
+
+def test_diff_ignores_row_order_dtypes_and_duplicates(fires):
+    previous = fires
+    current = pd.concat([previous, previous.iloc[:1]]).iloc[::-1].reset_index(drop=True)
+    current["Latitude"] = current["Latitude"].astype("float32").astype(float).round(1)
+    current["RiscoFogo"] = current["RiscoFogo"].astype(object)
+
+    diff = diff_frames(previous, current)
+
+    assert diff.counts() == {"added": 0, "changed": 0, "removed": 0}
+
+
+def test_first_run_marks_every_row_added(fires):
+    diff = diff_frames(None, fires)
+
+    assert diff.counts() == {"added": 3, "changed": 0, "removed": 0}
+    assert diff.to_frame()["changed_columns"].isna().all()
+
+
+def test_missing_key_columns_in_previous_run_are_rejected(fires):
+    with pytest.raises(KeyError):
+        diff_frames(fires.drop(columns=["Satélite"]), fires)
+
+
+def test_row_hashes_differ_per_value_and_column_order_matters(fires):
+    df = fires
+
+    hashes = row_hashes(df, ["Satélite", "Latitude"])
+
+    assert hashes.dtype == np.uint64
+    assert len(set(hashes)) == 3
+    assert not np.array_equal(hashes, row_hashes(df, ["Latitude", "Satélite"]))
+
+
+def test_state_round_trip_keeps_geometry(tmp_path, fires):
+    df = fires.assign(geometry=[Point(-41.1, -21.4), None, Point(-41.0, -21.5)])
+    path = tmp_path / "delta.csv.state.parquet"
+
+    save_state(df, path)
+    loaded = load_state(path)
+
+    assert loaded["geometry"].iloc[0].equals(Point(-41.1, -21.4))
+    assert loaded["geometry"].iloc[1] is None
+    assert load_state(tmp_path / "missing.parquet") is None
+
+
+def test_save_state_keeps_file_permissions(tmp_path, fires):
+    path = tmp_path / "delta.csv.state.parquet"
+    save_state(fires, path)
+    path.chmod(0o640)
+
+    save_state(fires, path)
+
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+
+
+def test_diff_with_state_compares_consecutive_runs(tmp_path, fires):
+    path = tmp_path / "state.parquet"
+
+    first = diff_with_state(fires, path)
+    second = diff_with_state(fires.assign(RiscoFogo=[0.2, 0.6, 0.9]), path)
+    third = diff_with_state(fires.assign(RiscoFogo=[0.2, 0.6, 0.9]), path)
+
+    assert first.counts()["added"] == 3
+    assert second.counts() == {"added": 0, "changed": 1, "removed": 0}
+    assert list(second.changed["changed_columns"]) == ["RiscoFogo"]
+    assert third.counts() == {"added": 0, "changed": 0, "removed": 0}
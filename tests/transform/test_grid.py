@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+from shapely.geometry import Polygon
+
+from etl.transform import grid as grid_module
+from etl.transform.grid import BOUNDARY, INSIDE, ClassificationGrid, grid_for
+from etl.transform.spatial import mark_points_inside
+
+
+@pytest.fixture(autouse=True)
+def _clear_memo():
+    grid_module.clear_memo()
+    yield
+    grid_module.clear_memo()
+
+
+def _reserve() -> Polygon:
+    # Concave polygon with a hole, so every cell label occurs.
+    shell = [(0, 0), (4, 0), (4, 3), (2, 1.5), (0, 3)]
+    hole = [(0.5, 0.5), (1.0, 0.5), (1.0, 1.0), (0.5, 1.0)]
+    return Polygon(shell, [hole])
+
+
+def test_grid_classify_matches_exact_predicate():
+    reserve = _reserve()
+    grid = ClassificationGrid.build(reserve, resolution=32)
+    rng = np.random.default_rng(3)
+    xs = rng.uniform(-1, 5, 50_000)
+    ys = rng.uniform(-1, 4, 50_000)
+    vertices = shapely.get_coordinates(reserve)
+    midpoints = (vertices[1:] + vertices[:-1]) / 2
+    xs = np.concatenate([xs, vertices[:, 0], midpoints[:, 0], [np.nan, 1e300, -1e300]])
+    ys = np.concatenate([ys, vertices[:, 1], midpoints[:, 1], [1.0, 1.0, 1.0]])
+
+    expected = shapely.intersects_xy(reserve, xs, ys)
+
+    np.testing.assert_array_equal(grid.classify(xs, ys), expected)
+    assert {INSIDE, BOUNDARY} <= set(np.unique(grid.cells).tolist())
+
+
+def test_grid_for_persists_and_validates_by_geometry(tmp_path):
+    reserve = _reserve()
+    built = grid_for(reserve, tmp_path, resolution=16)
+    files = list(tmp_path.glob("*.grid.npz"))
+    assert len(files) == 1
+
+    grid_module.clear_memo()
+    loaded = grid_for(reserve, tmp_path, resolution=16)
+    np.testing.assert_array_equal(loaded.cells, built.cells)
+    assert ClassificationGrid.load(files[0], reserve.buffer(1)) is None
+
+
+def test_mark_points_inside_with_grid_is_identical(tmp_path):
+    rng = np.random.default_rng(5)
+    points = list(shapely.points(rng.uniform(-1, 5, 2_000), rng.uniform(-1, 4, 2_000))) + [None]
+    df = pd.DataFrame({"geometry": points})
+
+    expected = mark_points_inside(df, _reserve())
+    result = mark_points_inside(df, _reserve(), grid=tmp_path)
+
+    assert result["inside"].tolist() == expected["inside"].tolist()
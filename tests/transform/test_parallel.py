@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import Polygon
+
+from etl.transform import parallel
+from etl.transform.parallel import intersects_xy
+from etl.transform.spatial import mark_points_inside
+
+
+def _polygon() -> Polygon:
+    return Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]).buffer(0.2)
+
+
+def test_intersects_xy_process_pool_matches_single_process():
+    rng = np.random.default_rng(7)
+    xs = rng.uniform(-0.5, 1.5, 20_000)
+    ys = rng.uniform(-0.5, 1.5, 20_000)
+    xs[::97] = np.nan
+
+    result = intersects_xy(_polygon(), xs, ys, workers=2, threshold=5_000)
+
+    np.testing.assert_array_equal(result, shapely.intersects_xy(_polygon(), xs, ys))
+    assert not result[::97].any()
+
+
+def test_intersects_xy_stays_single_process_below_threshold(monkeypatch):
+    def fail(*args, **kwargs):  # pragma: no cover - must not be reached
+        raise AssertionError("process pool started for a small input")
+
+    monkeypatch.setattr(parallel, "ProcessPoolExecutor", fail)
+
+    result = intersects_xy(_polygon(), np.array([0.5, 3.0]), np.array([0.5, 3.0]), workers=4)
+
+    assert result.tolist() == [True, False]
+
+
+def test_intersects_xy_pool_uses_every_worker_above_threshold(monkeypatch):
+    started: list[int] = []
+
+    class Started(Exception):
+        pass
+
+    def record(*, max_workers, **kwargs):
+        started.append(max_workers)
+        raise Started
+
+    monkeypatch.setattr(parallel, "ProcessPoolExecutor", record)
+
+    try:
+        intersects_xy(_polygon(), np.zeros(10), np.zeros(10), workers=4, threshold=5)
+    except Started:
+        pass
+
+    assert started == [4]
+
+
+def test_mark_points_inside_workers_matches_geopandas():
+    df = pd.DataFrame({"geometry": [shapely.Point(0.5, 0.5), None, shapely.Point(3, 3), shapely.Point(1.1, 0.5)]})
+
+    expected = mark_points_inside(df, _polygon())
+    result = mark_points_inside(df, _polygon(), workers=0)
+
+    assert result["inside"].tolist() == expected["inside"].tolist() == [True, False, False, True]
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+from shapely.geometry import Point, box
+
+from etl.transform import zones as zones_module
+from etl.transform.zones import DistanceZones, band_labels, mark_distance_bands, utm_epsg, zones_for
+
+
+@pytest.fixture(autouse=True)
+def _clear_memo():
+    zones_module.clear_memo()
+    yield
+    zones_module.clear_memo()
+
+
+def _reserve():
+    # Roughly 7 x 11 km around the Guaxindiba sample reserve.
+    return box(-41.12, -21.45, -41.05, -21.35)
+
+
+def test_utm_epsg_picks_southern_zone():
+    assert utm_epsg(-41.1, -21.4) == 32724
+    assert utm_epsg(-47.9, -15.8) == 32723
+    assert utm_epsg(10.0, 45.0) == 32632
+
+
+def test_classify_matches_projected_distances():
+    reserve = _reserve()
+    zones = DistanceZones.build(reserve, (1, 5, 10))
+    rng = np.random.default_rng(7)
+    lon = np.concatenate([rng.uniform(-41.35, -40.8, 3_000), [np.nan]])
+    lat = np.concatenate([rng.uniform(-21.65, -21.15, 3_000), [-21.4]])
+
+    zone, distance = zones.classify(lon, lat)
+
+    points = gpd.GeoSeries(gpd.points_from_xy(lon[:-1], lat[:-1]), crs=4326).to_crs(zones.epsg)
+    area = gpd.GeoSeries([reserve], crs=4326).to_crs(zones.epsg).iloc[0]
+    inside = points.intersects(area).to_numpy()
+    expected = np.where(inside, points.distance(area.boundary), points.distance(area))
+
+    labels = band_labels(zones.bands_m)
+    expected_zone = np.where(
+        inside,
+        "inside",
+        np.select([expected <= 1000, expected <= 5000, expected <= 10000], labels, "beyond"),
+    )
+    assert (np.where(zone[:-1] == None, "beyond", zone[:-1]) == expected_zone).all()  # noqa: E711
+    near = expected_zone != "beyond"
+    np.testing.assert_allclose(distance[:-1][near], expected[near], atol=1e-6)
+    assert np.isnan(distance[:-1][~near]).all()
+    assert zone[-1] is None and np.isnan(distance[-1])
+    assert {"inside", *labels} <= set(zone[:-1][near].tolist())
+
+
+def test_zones_for_persists_and_validates_by_geometry(tmp_path):
+    reserve = _reserve()
+    built = zones_for(reserve, (1, 5), tmp_path)
+    files = list(tmp_path.glob("*.zones.npz"))
+    assert len(files) == 1
+
+    zones_module.clear_memo()
+    loaded = zones_for(reserve, (5, 1), tmp_path)
+    assert loaded.bands_m == built.bands_m == (1000.0, 5000.0)
+    assert loaded.reach.equals(built.reach)
+    assert DistanceZones.load(files[0], reserve.buffer(0.1)) is None
+
+
+def test_mark_distance_bands_adds_columns():
+    df = pd.DataFrame({"geometry": [Point(-41.08, -21.40), Point(-41.04, -21.40), Point(-40.0, -21.40), None]})
+
+    result = mark_distance_bands(df, _reserve(), bands_km=(2,))
+
+    assert "zone" not in df.columns
+    assert result["zone"].tolist()[:2] == ["inside", "0-2 km"]
+    assert result["zone"].isna().tolist() == [False, False, True, True]
+    assert result["distance_to_boundary_m"].iloc[1] == pytest.approx(1040, rel=0.05)
+
+
+def test_band_labels_reject_non_positive_bands():
+    with pytest.raises(ValueError):
+        DistanceZones.build(_reserve(), (0, 1))
+    assert band_labels((500.0, 1500.0)) == ["0-0.5 km", "0.5-1.5 km"]
+    assert shapely.is_prepared(zones_for(_reserve()).reach)